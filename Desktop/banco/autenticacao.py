@@ -0,0 +1,110 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from errors import SenhaIncorretaError, ValorInvalidoError
+
+
+class SenhaHash(NamedTuple):
+    """Senha guardada como hash scrypt com sal; a senha em si nunca é guardada."""
+    custo: int
+    sal: bytes
+    digest: bytes
+
+
+class Autenticador:
+    """Gera e confere hashes de senha, com cache de logins recentes e bloqueio por tentativas.
+
+    - Conferir uma senha com scrypt é caro de propósito. Depois de um
+      login certo, um resumo rápido (sha256 com o sal) fica num cache LRU
+      limitado por validade segundos, e logins repetidos na mesma sessão
+      não pagam o scrypt de novo.
+    - Depois de max_falhas erros dentro de janela_falhas segundos, a conta
+      fica bloqueada por bloqueio segundos e toda tentativa levanta
+      SenhaIncorretaError, sem nem conferir a senha.
+    """
+
+    def __init__(self, custo: int = 2 ** 14, capacidade_cache: int = 10_000, validade: float = 300.0,
+                 max_falhas: int = 5, janela_falhas: float = 300.0, bloqueio: float = 300.0,
+                 usar_cache: bool = True, relogio=time.monotonic):
+        self.custo = custo
+        self._capacidade = capacidade_cache
+        self._validade = validade
+        self._max_falhas = max_falhas
+        self._janela_falhas = janela_falhas
+        self._bloqueio = bloqueio
+        self._usar_cache = usar_cache
+        self._relogio = relogio
+        # as duas tabelas usam o sal como chave: ele é único por conta e por senha
+        self._cache = OrderedDict()  # sal -> (resumo, expira_em)
+        self._falhas = {}  # sal -> [quantidade, primeira_falha, bloqueada_ate]
+        self._trava = threading.Lock()
+
+    def _scrypt(self, senha: str, sal: bytes, custo: int) -> bytes:
+        return hashlib.scrypt(senha.encode("utf-8"), salt=sal, n=custo, r=8, p=1, maxmem=2 ** 26)
+
+    @staticmethod
+    def _resumo(sal: bytes, senha: str) -> bytes:
+        return hashlib.sha256(sal + senha.encode("utf-8")).digest()
+
+    def gerar_hash(self, senha: str) -> SenhaHash:
+        if not senha:
+            raise ValorInvalidoError("Senha da conta não pode ser vazia.")
+        sal = os.urandom(16)
+        return SenhaHash(self.custo, sal, self._scrypt(senha, sal, self.custo))
+
+    def verificar(self, registro: SenhaHash, senha: str) -> bool:
+        agora = self._relogio()
+        sal = registro.sal
+        with self._trava:
+            falhas = self._falhas.get(sal)
+            if falhas is not None and falhas[2] > agora:
+                raise SenhaIncorretaError("Muitas tentativas de senha incorretas. Tente mais tarde.")
+            if self._usar_cache:
+                em_cache = self._cache.get(sal)
+                if em_cache is not None and em_cache[1] > agora:
+                    if hmac.compare_digest(em_cache[0], self._resumo(sal, senha)):
+                        self._cache.move_to_end(sal)
+                        return True
+
+        correta = hmac.compare_digest(self._scrypt(senha, sal, registro.custo), registro.digest)
+
+        with self._trava:
+            if correta:
+                self._falhas.pop(sal, None)
+                if self._usar_cache:
+                    self._cache[sal] = (self._resumo(sal, senha), agora + self._validade)
+                    self._cache.move_to_end(sal)
+                    while len(self._cache) > self._capacidade:
+                        self._cache.popitem(last=False)
+                return True
+
+            self._cache.pop(sal, None)
+            falhas = self._falhas.get(sal)
+            if falhas is None or agora - falhas[1] > self._janela_falhas:
+                falhas = self._falhas[sal] = [0, agora, 0.0]
+            falhas[0] += 1
+            if falhas[0] >= self._max_falhas:
+                falhas[2] = agora + self._bloqueio
+            return False
+
+
+if __name__ == "__main__":
+    # vazão de login com e sem cache: python autenticacao.py [logins]
+    import sys
+
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    for usar_cache in (False, True):
+        autenticador = Autenticador(usar_cache=usar_cache)
+        registro = autenticador.gerar_hash("segredo")
+        autenticador.verificar(registro, "segredo")  # primeiro login da sessão
+        inicio = time.perf_counter()
+        for _ in range(logins):
+            assert autenticador.verificar(registro, "segredo")
+        duracao = time.perf_counter() - inicio
+        print(f"cache {'ligado' if usar_cache else 'desligado'}: {logins / duracao:,.0f} logins/s")
@@ -0,0 +1,244 @@
+"""Benchmarks do Bank (classes.py).
+
+    python benchmark.py                          # roda e grava benchmark.json
+    python benchmark.py --base base.json         # compara com uma base gravada antes
+    python benchmark.py --gravar-base base.json  # roda e grava o resultado como base
+
+Cada caso é medido em várias escalas (quantidade de contas ou de
+lançamentos); o resultado de cada caso/escala é o melhor de algumas
+repetições, em ns por operação. Na comparação, um caso que ficou mais
+lento que a base além de --limite por cento é marcado como regressão, e
+o processo termina com código 1.
+
+O benchmark.py da raiz do repositório tem os mesmos casos para o Banco.
+Não há caso de transferência aqui porque o Bank não tem transferência.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from classes import Account, Bank, Branch, Current_account, Savings_account
+from exportacao import exportar_contas
+from historico import Historico
+
+ESCALAS = (1_000, 10_000, 100_000)
+OPERACOES = 20_000  # operações por medida nos casos que não dependem da escala
+AGENCIAS = 10
+
+CASOS = {}
+
+# o hash de senha de verdade (scrypt) levaria minutos para abrir 100 mil contas: ele é
+# gerado uma vez e as contas recebem a SenhaHash pronta; o custo dele é medido à parte
+# em autenticacao.py
+SENHA = Account.authenticator.gerar_hash("senha")
+
+
+def caso(funcao):
+    """Registra um caso: funcao(escala) prepara os dados e retorna (operacoes, rodar)."""
+    CASOS[funcao.__name__] = funcao
+    return funcao
+
+
+def _bank(escala: int):
+    bank = Bank("Banco", "123.456/0001-00", "Rua", "123")
+    # add_branch imprime uma confirmação por agência
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for numero in range(AGENCIAS):
+            bank.add_branch(Branch(str(numero), f"Agência {numero}", "Rua", "123"))
+    branches = [bank.get_branch_by_number(str(numero)) for numero in range(AGENCIAS)]
+    accounts = []
+    for i in range(escala):
+        if i % 2:
+            account = Savings_account(str(i), f"Cliente {i}", 1_000, SENHA, 0.005)
+        else:
+            account = Current_account(str(i), f"Cliente {i}", 1_000, SENHA, 100)
+        branches[i % AGENCIAS].add_account(account)
+        accounts.append(account)
+    return bank, accounts
+
+
+@caso
+def abertura(escala):
+    def rodar():
+        _bank(escala)
+    return escala, rodar
+
+
+@caso
+def busca(escala):
+    bank, _ = _bank(escala)
+    rng = random.Random(1)
+    numeros = [str(rng.randrange(escala)) for _ in range(OPERACOES)]
+    find_account = bank.find_account
+
+    def rodar():
+        for numero in numeros:
+            find_account(numero)
+    return OPERACOES, rodar
+
+
+@caso
+def deposito_e_saque(escala):
+    _, accounts = _bank(escala)
+    rng = random.Random(2)
+    sorteadas = [rng.choice(accounts) for _ in range(OPERACOES // 2)]
+
+    def rodar():
+        # a conta corrente imprime o saldo a cada operação; a impressão vai para o devnull
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for account in sorteadas:
+                account.deposit(10)
+                account.withdraw(5)
+    return OPERACOES, rodar
+
+
+@caso
+def deposito_e_saque_indexado(escala):
+    # o mesmo de deposito_e_saque, com o índice de saldos ligado
+    bank, accounts = _bank(escala)
+    bank.index_balances()
+    rng = random.Random(2)
+    sorteadas = [rng.choice(accounts) for _ in range(OPERACOES // 2)]
+
+    def rodar():
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for account in sorteadas:
+                account.deposit(10)
+                account.withdraw(5)
+    return OPERACOES, rodar
+
+
+@caso
+def maiores_saldos(escala):
+    bank, _ = _bank(escala)
+    bank.index_balances()
+
+    def rodar():
+        for _ in range(1_000):
+            bank.top_balances(100)
+    return 1_000, rodar
+
+
+@caso
+def extrato(escala):
+    # a escala aqui é o tamanho do histórico; cada consulta pega uma hora no meio dele
+    historico = Historico()
+    comeco = datetime(2026, 1, 1)
+    for i in range(escala):
+        historico.registrar("deposito", 100, data=comeco + timedelta(minutes=i))
+    rng = random.Random(4)
+    janelas = []
+    for _ in range(1_000):
+        inicio = comeco + timedelta(minutes=rng.randrange(escala))
+        janelas.append((inicio, inicio + timedelta(hours=1)))
+
+    def rodar():
+        for inicio, fim in janelas:
+            for _ in historico.extrato(inicio, fim):
+                pass
+    return len(janelas), rodar
+
+
+@caso
+def exportacao_csv(escala):
+    bank, _ = _bank(escala)
+
+    def rodar():
+        exportar_contas(bank, os.devnull, "csv")
+    return escala, rodar
+
+
+def medir(casos, escalas, repeticoes: int) -> dict:
+    resultados = {}
+    for nome in casos:
+        for escala in escalas:
+            operacoes, rodar = CASOS[nome](escala)
+            tempos = []
+            for _ in range(repeticoes):
+                # o coletor de lixo não roda no meio de uma medida
+                gc.collect()
+                gc.disable()
+                try:
+                    inicio = time.perf_counter()
+                    rodar()
+                    tempos.append(time.perf_counter() - inicio)
+                finally:
+                    gc.enable()
+            melhor = min(tempos)
+            resultados[f"{nome}/{escala}"] = {
+                "ns_por_op": melhor / operacoes * 1e9,
+                "ns_por_op_mediana": statistics.median(tempos) / operacoes * 1e9,
+                "ops_por_segundo": operacoes / melhor,
+            }
+            print(f"{nome}/{escala}: {melhor / operacoes * 1e9:,.0f} ns/op ({operacoes / melhor:,.0f}/s)")
+    return resultados
+
+
+def comparar(resultados: dict, base: dict, limite: float) -> list:
+    """Imprime a comparação com a base e retorna os casos que pioraram além de limite por cento."""
+    regressoes = []
+    for chave, atual in resultados.items():
+        anterior = base.get(chave)
+        if anterior is None:
+            print(f"  {chave}: sem base")
+            continue
+        variacao = (atual["ns_por_op"] / anterior["ns_por_op"] - 1) * 100
+        marca = ""
+        if variacao > limite:
+            regressoes.append(chave)
+            marca = "  <-- REGRESSÃO"
+        print(f"  {chave}: {anterior['ns_por_op']:,.0f} -> {atual['ns_por_op']:,.0f} ns/op ({variacao:+.1f}%){marca}")
+    return regressoes
+
+
+def principal(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do Bank.")
+    parser.add_argument("--escalas", default=",".join(map(str, ESCALAS)),
+                        help="escalas separadas por vírgula (padrão: %(default)s)")
+    parser.add_argument("--casos", default=",".join(CASOS), help="casos separados por vírgula")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", default="benchmark.json", help="onde gravar os resultados em JSON")
+    parser.add_argument("--base", help="resultados anteriores (JSON) para comparar")
+    parser.add_argument("--gravar-base", help="grava os resultados também neste arquivo, como nova base")
+    parser.add_argument("--limite", type=float, default=10.0, help="piora máxima aceita, em %% (padrão: 10)")
+    args = parser.parse_args(argv)
+
+    casos = [nome for nome in args.casos.split(",") if nome]
+    desconhecidos = [nome for nome in casos if nome not in CASOS]
+    if desconhecidos:
+        parser.error(f"casos desconhecidos: {', '.join(desconhecidos)} (disponíveis: {', '.join(CASOS)})")
+    escalas = [int(escala) for escala in args.escalas.split(",") if escala]
+
+    resultados = medir(casos, escalas, args.repeticoes)
+    documento = {
+        "suite": "bank",
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }
+    for caminho in filter(None, (args.saida, args.gravar_base)):
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(documento, arquivo, indent=2, ensure_ascii=False)
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        print(f"\ncomparação com {args.base} ({base.get('data')}), limite {args.limite:g}%:")
+        regressoes = comparar(resultados, base["resultados"], args.limite)
+        if regressoes:
+            print(f"\n{len(regressoes)} regressão(ões): {', '.join(regressoes)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(principal())
@@ -1,7 +1,16 @@
+import heapq
+import warnings
 from datetime import datetime
-from typing import List
+from itertools import islice
+from typing import Dict, List, Optional, Union
 from abc import ABC, abstractmethod
 
+from dinheiro import Dinheiro
+from historico import Historico
+from autenticacao import Autenticador, SenhaHash
+from lista_ordenada import ListaOrdenada
+from totais import Totais
+
 # importa as exceções do outro arquivo
 from errors import (
     ErroBanco,
@@ -22,11 +31,11 @@ from errors import (
 # Função auxiliar opcional (somente exceções!)
 # --------------------------------------
 
-def validar_valor(value: float) -> float:
-    """Valida valores numéricos para operações bancárias."""
+def validar_valor(value: float) -> Dinheiro:
+    """Valida valores numéricos para operações bancárias e os converte para Dinheiro."""
     try:
-        value = float(value)
-    except (TypeError, ValueError) as e:
+        value = Dinheiro(value)
+    except ValorInvalidoError as e:
         raise ValorInvalidoError("Valor inválido: não é um número.") from e
 
     if value == 0:
@@ -47,7 +56,13 @@ class Bank:
         self._cnpj = cnpj
         self._location = location
         self._phone = phone
-        self._branch: List['Branch'] = []
+        # agências indexadas pelo número e índice global de contas do banco
+        self._branch: Dict[str, 'Branch'] = {}
+        self._accounts: Dict[str, 'Account'] = {}
+        # se index_balances() foi chamado, as agências adicionadas depois também são indexadas
+        self._index_balances = False
+        # soma dos saldos e contagens de todas as agências, mantidas a cada mudança (ver totais.py)
+        self._totais = Totais()
 
         # validações básicas de CNPJ bem simples, só exemplo
         if not isinstance(cnpj, str) or len(cnpj.replace(".", "").replace("-", "").replace("/", "")) < 8:
@@ -99,22 +114,99 @@ class Bank:
             raise TipoInvalidoError("O objeto informado não é uma branch válida.")
 
         # valida se já existe agência com o mesmo número
-        for b in self._branch:
-            if b.number == branch.number:
-                raise AgenciaJaExistenteError(f"Já existe uma agência com o número {branch.number}.")
-
-        self._branch.append(branch)
+        if branch.number in self._branch:
+            raise AgenciaJaExistenteError(f"Já existe uma agência com o número {branch.number}.")
+
+        # contas que a agência já tinha entram no índice do banco
+        for number in branch._accounts:
+            if number in self._accounts:
+                raise ContaJaExistenteError(f"Já existe uma conta com o número {number} nesse banco.")
+        for number, account in branch._accounts.items():
+            self._accounts[number] = account
+
+        self._branch[branch.number] = branch
+        branch._bank = self
+        self._totais.somar(branch._totais)
+        if self._index_balances and branch._saldos is None:
+            branch.index_balances()
         print("Branch added successfully")
 
     def show_branches(self):
-        for branch in self._branch:
+        for branch in self._branch.values():
             print(f"Branch: {branch.name}")
 
     def get_branch_by_number(self, number: str) -> 'Branch':
-        for b in self._branch:
-            if b.number == number:
-                return b
-        raise AgenciaNaoEncontradaError(f"Agência com número {number} não encontrada.")
+        try:
+            return self._branch[number]
+        except KeyError:
+            raise AgenciaNaoEncontradaError(f"Agência com número {number} não encontrada.") from None
+
+    def iter_accounts(self, branch_number: str = None):
+        """Gera (agência, conta) de todas as agências, ou só da agência informada."""
+        if branch_number is None:
+            branches = self._branch.values()
+        else:
+            branches = (self.get_branch_by_number(branch_number),)
+        for branch in branches:
+            for account in branch._accounts.values():
+                yield branch, account
+
+    def find_account(self, number: str) -> 'Account':
+        """Busca uma conta em qualquer agência do banco, sem precisar da agência."""
+        try:
+            return self._accounts[number]
+        except KeyError:
+            raise ContaNaoEncontradaError(f"Conta número {number} não encontrada neste banco.") from None
+
+    def total(self) -> Dinheiro:
+        """Soma dos saldos de todas as contas do banco, em O(1)."""
+        return self._totais.saldo
+
+    def account_count(self) -> int:
+        return self._totais.contas
+
+    def count_by_type(self) -> Dict[str, int]:
+        """Quantidade de contas por tipo (nome da classe)."""
+        return dict(self._totais.por_tipo)
+
+    def print_total(self):
+        print(f"Bank {self.name}: {self._totais.contas} accounts, total {self._totais.saldo}")
+        for tipo, quantidade in sorted(self._totais.por_tipo.items()):
+            print(f"  {tipo}: {quantidade}")
+
+    def index_balances(self):
+        """Indexa por saldo todas as agências, as de agora e as adicionadas depois (ver Branch.index_balances)."""
+        self._index_balances = True
+        for branch in self._branch.values():
+            if branch._saldos is None:
+                branch.index_balances()
+
+    # as consultas por saldo intercalam as ordens das agências (heapq.merge)
+
+    def top_balances(self, n: int = 100) -> List['Account']:
+        """As n contas de maior saldo do banco, da maior para a menor."""
+        ordem = heapq.merge(*(branch._decrescente() for branch in self._branch.values()), reverse=True)
+        return [self._accounts[number] for _, number in islice(ordem, n)]
+
+    def accounts_with_balance_between(self, minimum, maximum) -> List['Account']:
+        """Contas com saldo entre minimum e maximum (inclusive), em ordem de saldo."""
+        minimo = Dinheiro(minimum).centavos
+        ordem = heapq.merge(*(branch._a_partir_de(minimo) for branch in self._branch.values()))
+        return [self._accounts[number] for number in _ate(ordem, Dinheiro(maximum).centavos)]
+
+    def overdrawn_accounts(self) -> List['Account']:
+        """Contas correntes usando o limite (saldo negativo), da mais negativa para a menos."""
+        ordem = heapq.merge(*(branch._a_partir_de(None) for branch in self._branch.values()))
+        contas = (self._accounts[number] for number in _ate(ordem, -1))
+        return [account for account in contas if isinstance(account, Current_account)]
+
+
+def _ate(ordem, maximo: int):
+    """Números das contas de ordem, um iterador de (centavos, número) crescente, até maximo centavos."""
+    for centavos, number in ordem:
+        if centavos > maximo:
+            return
+        yield number
 
 
 class Branch:
@@ -125,7 +217,11 @@ class Branch:
         self._name = name
         self._location = location
         self._phone = phone
-        self._accounts: List['Account'] = []
+        self._accounts: Dict[str, 'Account'] = {}
+        # (centavos, número) de cada conta em ordem de saldo, depois de index_balances()
+        self._saldos: Optional[ListaOrdenada] = None
+        self._totais = Totais()
+        self._bank: Optional['Bank'] = None
 
     @property
     def number(self):
@@ -135,6 +231,11 @@ class Branch:
     def number(self, value):
         if not value:
             raise ValorInvalidoError("Número da agência não pode ser vazio.")
+        if self._bank is not None and value != self._number:
+            if value in self._bank._branch:
+                raise AgenciaJaExistenteError(f"Já existe uma agência com o número {value}.")
+            del self._bank._branch[self._number]
+            self._bank._branch[value] = self
         self._number = value
 
     @property
@@ -171,17 +272,96 @@ class Branch:
         if not isinstance(account, Account):
             raise TipoInvalidoError("O objeto informado não é uma conta válida.")
 
-        for c in self._accounts:
-            if c.number == account.number:
-                raise ContaJaExistenteError(f"Já existe uma conta com o número {account.number} nessa agência.")
+        if account.number in self._accounts:
+            raise ContaJaExistenteError(f"Já existe uma conta com o número {account.number} nessa agência.")
+
+        if self._bank is not None:
+            if account.number in self._bank._accounts:
+                raise ContaJaExistenteError(f"Já existe uma conta com o número {account.number} nesse banco.")
+            self._bank._accounts[account.number] = account
+
+        self._accounts[account.number] = account
+        if self._saldos is not None:
+            self._saldos.adicionar((account._balance.centavos, account.number))
+        self._totais.adicionar(account)
+        if self._bank is not None:
+            self._bank._totais.adicionar(account)
+        account._branch = self
+
+    def _renumber_account(self, account: 'Account', new_number: str):
+        # mantém os índices da agência e do banco quando a conta muda de número
+        if new_number in self._accounts or (self._bank is not None and new_number in self._bank._accounts):
+            raise ContaJaExistenteError(f"Já existe uma conta com o número {new_number}.")
+        del self._accounts[account.number]
+        self._accounts[new_number] = account
+        if self._saldos is not None:
+            centavos = account._balance.centavos
+            self._saldos.trocar((centavos, account.number), (centavos, new_number))
+        if self._bank is not None:
+            del self._bank._accounts[account.number]
+            self._bank._accounts[new_number] = account
+
+    def total(self) -> Dinheiro:
+        """Soma dos saldos das contas da agência, em O(1)."""
+        return self._totais.saldo
+
+    def account_count(self) -> int:
+        return self._totais.contas
+
+    def count_by_type(self) -> Dict[str, int]:
+        """Quantidade de contas por tipo (nome da classe)."""
+        return dict(self._totais.por_tipo)
 
-        self._accounts.append(account)
+    def print_total(self):
+        print(f"Branch {self.number} ({self.name}): {self._totais.contas} accounts, total {self._totais.saldo}")
+        for tipo, quantidade in sorted(self._totais.por_tipo.items()):
+            print(f"  {tipo}: {quantidade}")
+
+    def index_balances(self):
+        """Passa a manter as contas da agência ordenadas por saldo (ver lista_ordenada.py).
+
+        Com o índice, top_balances, accounts_with_balance_between e
+        overdrawn_accounts custam O(log n + k) em vez de ordenar a agência
+        inteira; em troca, cada withdraw e deposit também atualiza o índice.
+        """
+        self._saldos = ListaOrdenada((account._balance.centavos, number) for number, account in self._accounts.items())
+
+    def _a_partir_de(self, centavos: Optional[int]):
+        """(centavos, número) das contas em ordem crescente de saldo, a partir de centavos (None: todas)."""
+        if self._saldos is None:
+            # sem índice: ordena na hora
+            return iter(sorted(
+                (account._balance.centavos, number) for number, account in self._accounts.items()
+                if centavos is None or account._balance.centavos >= centavos
+            ))
+        return iter(self._saldos) if centavos is None else self._saldos.a_partir_de((centavos,))
+
+    def _decrescente(self):
+        if self._saldos is None:
+            return iter(sorted(
+                ((account._balance.centavos, number) for number, account in self._accounts.items()), reverse=True
+            ))
+        return self._saldos.decrescente()
 
     def get_account_by_number(self, number: str) -> 'Account':
-        for c in self._accounts:
-            if c.number == number:
-                return c
-        raise ContaNaoEncontradaError(f"Conta número {number} não encontrada nesta agência.")
+        try:
+            return self._accounts[number]
+        except KeyError:
+            raise ContaNaoEncontradaError(f"Conta número {number} não encontrada nesta agência.") from None
+
+    def top_balances(self, n: int = 100) -> List['Account']:
+        """As n contas de maior saldo da agência, da maior para a menor."""
+        return [self._accounts[number] for _, number in islice(self._decrescente(), n)]
+
+    def accounts_with_balance_between(self, minimum, maximum) -> List['Account']:
+        """Contas com saldo entre minimum e maximum (inclusive), em ordem de saldo."""
+        ordem = self._a_partir_de(Dinheiro(minimum).centavos)
+        return [self._accounts[number] for number in _ate(ordem, Dinheiro(maximum).centavos)]
+
+    def overdrawn_accounts(self) -> List['Account']:
+        """Contas correntes usando o limite (saldo negativo), da mais negativa para a menos."""
+        contas = (self._accounts[number] for number in _ate(self._a_partir_de(None), -1))
+        return [account for account in contas if isinstance(account, Current_account)]
 
 
 class Client:
@@ -216,7 +396,16 @@ class Client:
 
 
 class Transaction:
+    """Obsoleta: nenhuma operação cria Transaction; os lançamentos de cada conta ficam no Historico.
+
+    Continua funcionando como antes, mas avisa com DeprecationWarning.
+    """
+
+    __slots__ = ('_type', '_value', '_account', '_date')
+
     def __init__(self, type: str, value: float, account: 'Account'):
+        warnings.warn("Transaction está obsoleta; use o histórico da conta (account.historico).",
+                      DeprecationWarning, stacklevel=2)
         self._type = type
         self._value = value
         self._account = account
@@ -255,6 +444,7 @@ class Transaction:
 
 
 class Authenticate(ABC):
+    __slots__ = ()
 
     @abstractmethod
     def auntheticate(self, password: str) -> bool:
@@ -262,19 +452,28 @@ class Authenticate(ABC):
 
 
 class Tax(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def get_tax_value(self) -> float:
         pass
 
 
 class Earning(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def get_Earning(self) -> float:
         pass
 
 
 class Account(Authenticate, ABC):
-    def __init__(self, number: str, client: str, balance: float, password: str):
+    __slots__ = ('_number', '_client', '_balance', '_password', '_historico', '_branch', '_last_closing')
+
+    # compartilhado por todas as contas: guarda o cache de logins e as tentativas erradas
+    authenticator = Autenticador()
+
+    def __init__(self, number: str, client: str, balance: float, password: Union[str, SenhaHash]):
         if not number:
             raise ValorInvalidoError("Número da conta não pode ser vazio.")
         if balance < 0:
@@ -284,9 +483,12 @@ class Account(Authenticate, ABC):
 
         self._number = number
         self._client = client
-        self._balance = balance
-        self._password = password
-        self._transactions: List['Transaction'] = []
+        self._balance = Dinheiro(balance)
+        self._password = self._hash_de(password)
+        self._historico = Historico()
+        self._branch: Optional['Branch'] = None
+        # último período (AAAA-MM) já fechado pelo fechamento mensal
+        self._last_closing: Optional[str] = None
 
     @property
     def number(self):
@@ -296,6 +498,8 @@ class Account(Authenticate, ABC):
     def number(self, value):
         if not value:
             raise ValorInvalidoError("Número da conta não pode ser vazio.")
+        if self._branch is not None and value != self._number:
+            self._branch._renumber_account(self, value)
         self._number = value
 
     @property
@@ -314,17 +518,47 @@ class Account(Authenticate, ABC):
 
     @balance.setter
     def balance(self, value):
-        self._balance = value
+        self._definir_saldo(Dinheiro(value))
+
+    def _definir_saldo(self, saldo: Dinheiro):
+        # toda mudança de saldo passa por aqui, para os totais e o índice da agência acompanharem
+        branch = self._branch
+        if branch is not None:
+            # _centavos direto: este é o caminho de todo saque e depósito
+            antes = self._balance._centavos
+            diferenca = saldo._centavos - antes
+            branch._totais.centavos += diferenca
+            if branch._bank is not None:
+                branch._bank._totais.centavos += diferenca
+            if branch._saldos is not None:
+                branch._saldos.trocar((antes, self._number), (saldo._centavos, self._number))
+        self._balance = saldo
 
     @property
     def password(self):
+        """Hash da senha (SenhaHash); a senha em texto puro não é guardada."""
         return self._password
 
     @password.setter
     def password(self, value):
         if not value:
             raise ValorInvalidoError("Senha da conta não pode ser vazia.")
-        self._password = value
+        self._password = self._hash_de(value)
+
+    def _hash_de(self, password) -> SenhaHash:
+        # uma SenhaHash pronta (de uma conta já cadastrada, ou gerada uma vez para
+        # várias contas) é guardada como está; só a senha em texto paga o scrypt
+        if isinstance(password, SenhaHash):
+            return password
+        return self.authenticator.gerar_hash(password)
+
+    @property
+    def historico(self):
+        return self._historico
+
+    def extrato(self, start=None, end=None):
+        """Lançamentos da conta entre as datas start e end (inclusive)."""
+        return self._historico.extrato(start, end)
 
     def authentication(self, password: str):
         # aqui podemos levantar uma exception se a senha estiver errada
@@ -341,24 +575,28 @@ class Account(Authenticate, ABC):
         pass
 
     def auntheticate(self, password: str) -> bool:
-        return self._password == password
+        return self.authenticator.verificar(self._password, password)
 
-    def total(Self):
-        pass
+    def total(self) -> Dinheiro:
+        """O que a conta soma no total da agência e do banco: o saldo."""
+        return self._balance
 
     def print_total(self):
-        pass
+        print(f"Account {self.number}: total {self._balance}")
 
 
 class Current_account(Account, Tax):
+    __slots__ = ('_limit', '_tax')
+
+    TAX_RATE = 0.07
+
     def __init__(self, number: str, client: str, balance: float,
-                 password: str, limit: float):
+                 password: Union[str, SenhaHash], limit: float):
         if limit < 0:
             raise ValorNegativoError("O limite da conta não pode ser negativo.")
         super().__init__(number, client, balance, password)
-        self._limit = limit
-        self._tax = 10.0
-        self._transactions: List['Transaction'] = []
+        self._limit = Dinheiro(limit)
+        self._tax = Dinheiro(10)
 
     @property
     def limit(self):
@@ -368,7 +606,7 @@ class Current_account(Account, Tax):
     def limit(self, value):
         if value < 0:
             raise ValorNegativoError("O limite não pode ser negativo.")
-        self._limit = value
+        self._limit = Dinheiro(value)
 
     @property
     def tax(self):
@@ -392,8 +630,8 @@ class Current_account(Account, Tax):
         if withdraw_value <= available:
             self.balance -= withdraw_value
             print(f"the remaining value on the account is: {self._balance}")
-            transaction = Transaction("current", value, self)
-            self._transactions.append(transaction)
+            self._historico.registrar("saque", value.centavos)
+            self._historico.registrar("tarifa", self._tax.centavos)
         else:
             raise SaldoInsuficienteError(
                 "Não é possível sacar: saldo + limite insuficientes."
@@ -401,24 +639,43 @@ class Current_account(Account, Tax):
 
     def deposit(self, value):
         value = validar_valor(value)
-        self._balance += value
+        self._definir_saldo(self._balance + value)
+        self._historico.registrar("deposito", value.centavos)
         print(f"Depósito realizado. Novo saldo: {self._balance}")
 
     def get_tax_value(self):
-        return self._balance * 0.07
+        return self._balance * self.TAX_RATE
 
 
 class Savings_account(Account, Earning):
+    __slots__ = ('_earnings', '_date')
+
     def __init__(self, number: str, titular: str, balance: float,
-                 password: str, earnings: float):
+                 password: Union[str, SenhaHash], earnings: float):
         if earnings < 0:
             raise ValorNegativoError("Taxa de rendimento não pode ser negativa.")
         super().__init__(number, titular, balance, password)
         self._earnings = earnings
         self._date = datetime.now().day
 
+    @property
+    def earnings(self):
+        return self._earnings
+
+    def withdraw(self, value):
+        value = validar_valor(value)
+        if value > self._balance:
+            raise SaldoInsuficienteError("Não é possível sacar: saldo insuficiente.")
+        self._definir_saldo(self._balance - value)
+        self._historico.registrar("saque", value.centavos)
+
+    def deposit(self, value):
+        value = validar_valor(value)
+        self._definir_saldo(self._balance + value)
+        self._historico.registrar("deposito", value.centavos)
+
     def get_Earning(self):
-        # Ex: poderia aplicar rendimento, só esquemático por enquanto
+        # o fechamento mensal (fechamento.py) aplica esse valor em lote
         return self._balance * self._earnings
 
 
@@ -0,0 +1,2 @@
+# Os testes daqui rodam a partir desta pasta (cd Desktop/banco && python -m pytest), que
+# entra no sys.path: from classes import Bank pega os módulos daqui, e não os da raiz.
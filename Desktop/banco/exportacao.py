@@ -0,0 +1,114 @@
+# _abrir, escrever_csv, escrever_jsonl e _escrever são cópias das de exportacao.py da raiz do
+# repositório, pelo mesmo motivo de dinheiro.py: levantam o ValorInvalidoError daqui.
+# tests/test_copias.py confere que continuam iguais.
+import csv
+import json
+import sys
+
+from dinheiro import Dinheiro
+from errors import ValorInvalidoError
+
+TAMANHO_BUFFER = 1 << 20
+_LINHAS_POR_ESCRITA = 1_000
+
+CAMPOS_CONTAS = ("agencia", "numero", "cliente", "tipo", "saldo")
+CAMPOS_LANCAMENTOS = ("agencia", "conta", "data", "tipo", "valor")
+
+
+def linhas_de_contas(bank, branch_number=None, min_balance=None, max_balance=None):
+    """Gera um dict por conta, filtrando por agência e/ou faixa de saldo."""
+    minimo = None if min_balance is None else Dinheiro(min_balance)
+    maximo = None if max_balance is None else Dinheiro(max_balance)
+    for branch, account in bank.iter_accounts(branch_number):
+        saldo = account.balance
+        if minimo is not None and saldo < minimo:
+            continue
+        if maximo is not None and saldo > maximo:
+            continue
+        yield {
+            "agencia": branch.number,
+            "numero": account.number,
+            "cliente": account.client,
+            "tipo": type(account).__name__,
+            "saldo": str(saldo),
+        }
+
+
+def linhas_de_lancamentos(bank, branch_number=None, start=None, end=None):
+    """Gera um dict por lançamento das contas do banco (ou de uma agência) entre start e end."""
+    for branch, account in bank.iter_accounts(branch_number):
+        for lancamento in account.extrato(start, end):
+            yield {
+                "agencia": branch.number,
+                "conta": account.number,
+                "data": lancamento.data.isoformat(),
+                "tipo": lancamento.tipo,
+                "valor": str(lancamento.valor),
+            }
+
+
+def _abrir(destino):
+    """Retorna (arquivo, deve_fechar) para um caminho, um arquivo aberto ou '-' (stdout)."""
+    if destino == "-":
+        return sys.stdout, False
+    if isinstance(destino, str):
+        return open(destino, "w", encoding="utf-8", newline="", buffering=TAMANHO_BUFFER), True
+    return destino, False
+
+
+def escrever_csv(linhas, destino, campos) -> int:
+    """Grava as linhas (dicts) em CSV, uma por vez, e retorna quantas foram gravadas."""
+    arquivo, fechar = _abrir(destino)
+    try:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(campos)
+        total = 0
+        for linha in linhas:
+            escritor.writerow([linha[campo] for campo in campos])
+            total += 1
+        return total
+    finally:
+        if fechar:
+            arquivo.close()
+
+
+def escrever_jsonl(linhas, destino) -> int:
+    """Grava as linhas (dicts) em JSON Lines, juntando várias por escrita."""
+    arquivo, fechar = _abrir(destino)
+    try:
+        dumps = json.JSONEncoder(ensure_ascii=False).encode
+        pendentes = []
+        total = 0
+        for linha in linhas:
+            pendentes.append(dumps(linha))
+            if len(pendentes) == _LINHAS_POR_ESCRITA:
+                arquivo.write("\n".join(pendentes) + "\n")
+                total += len(pendentes)
+                pendentes.clear()
+        if pendentes:
+            arquivo.write("\n".join(pendentes) + "\n")
+            total += len(pendentes)
+        return total
+    finally:
+        if fechar:
+            arquivo.close()
+
+
+def _escrever(linhas, destino, formato, campos) -> int:
+    if formato == "csv":
+        return escrever_csv(linhas, destino, campos)
+    if formato == "jsonl":
+        return escrever_jsonl(linhas, destino)
+    raise ValorInvalidoError(f"Formato de exportação '{formato}' não suportado (use csv ou jsonl).")
+
+
+def exportar_contas(bank, destino, formato: str = "csv", branch_number=None,
+                    min_balance=None, max_balance=None) -> int:
+    linhas = linhas_de_contas(bank, branch_number, min_balance, max_balance)
+    return _escrever(linhas, destino, formato, CAMPOS_CONTAS)
+
+
+def exportar_lancamentos(bank, destino, formato: str = "csv", branch_number=None,
+                         start=None, end=None) -> int:
+    linhas = linhas_de_lancamentos(bank, branch_number, start, end)
+    return _escrever(linhas, destino, formato, CAMPOS_LANCAMENTOS)
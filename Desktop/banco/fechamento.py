@@ -0,0 +1,174 @@
+from array import array
+from datetime import date, datetime
+from fractions import Fraction
+from typing import NamedTuple
+
+from classes import Bank, Branch, Current_account, Savings_account
+from dinheiro import Dinheiro
+from errors import DataInvalidaError, TipoInvalidoError
+
+
+class ResumoFechamento(NamedTuple):
+    periodo: str
+    contas: int
+    ignoradas: int
+    total_rendimentos: Dinheiro
+    total_tarifas: Dinheiro
+
+
+def _normalizar_periodo(periodo) -> str:
+    if isinstance(periodo, (date, datetime)):
+        return f"{periodo.year:04d}-{periodo.month:02d}"
+    try:
+        d = datetime.strptime(periodo, "%Y-%m")
+    except (TypeError, ValueError) as e:
+        raise DataInvalidaError(f"Período inválido: {periodo!r} (use AAAA-MM).") from e
+    # "2026-1" e "2026-01" são o mesmo mês e precisam da mesma chave de fechamento
+    return f"{d.year:04d}-{d.month:02d}"
+
+
+def _contas(alvo):
+    if isinstance(alvo, Bank):
+        return [account for _, account in alvo.iter_accounts()]
+    if isinstance(alvo, Branch):
+        return list(alvo._accounts.values())
+    raise TipoInvalidoError("O fechamento só pode ser feito em um Bank ou em uma Branch.")
+
+
+def _aplicar_taxa(saldos, taxas):
+    """Calcula saldo * taxa em centavos para a coluna inteira, só com inteiros.
+
+    As contas são agrupadas por taxa; cada taxa vira uma fração exata
+    (0.07 -> 7/100) e o grupo é calculado de uma vez, com arredondamento
+    para o centavo mais próximo. Saldos negativos ou zerados não geram valor.
+    """
+    grupos = {}
+    for posicao, taxa in enumerate(taxas):
+        grupos.setdefault(taxa, []).append(posicao)
+
+    resultado = array("q", bytes(8 * len(saldos)))
+    for taxa, posicoes in grupos.items():
+        fracao = Fraction(str(taxa))
+        dobro_numerador = 2 * fracao.numerator
+        denominador = fracao.denominator
+        dobro_denominador = 2 * denominador
+        valores = [(saldos[p] * dobro_numerador + denominador) // dobro_denominador for p in posicoes]
+        for posicao, valor in zip(posicoes, valores):
+            if valor > 0:
+                resultado[posicao] = valor
+    return resultado
+
+
+def fechar_mes(alvo, periodo) -> ResumoFechamento:
+    """Aplica rendimentos da poupança e a tarifa de 7% da conta corrente em lote.
+
+    alvo é um Bank ou uma Branch; periodo é "AAAA-MM" ou uma data. Cada
+    conta guarda o último período fechado, então rodar de novo o mesmo
+    período (ou um anterior) não altera nada. Cada valor aplicado vira um
+    lançamento "rendimento" ou "tarifa" no histórico da conta.
+    """
+    periodo = _normalizar_periodo(periodo)
+    poupancas = []
+    correntes = []
+    ignoradas = 0
+    for account in _contas(alvo):
+        if account._last_closing is not None and account._last_closing >= periodo:
+            ignoradas += 1
+        elif isinstance(account, Savings_account):
+            poupancas.append(account)
+        elif isinstance(account, Current_account):
+            correntes.append(account)
+
+    # colunas de saldo (em centavos) e de taxa, calculadas de uma vez
+    rendimentos = _aplicar_taxa(
+        array("q", [account._balance.centavos for account in poupancas]),
+        [account._earnings for account in poupancas],
+    )
+    tarifas = _aplicar_taxa(
+        array("q", [account._balance.centavos for account in correntes]),
+        [account.TAX_RATE for account in correntes],
+    )
+
+    diferencas = {}  # agência -> quanto os saldos dela mudaram, em centavos
+    for account, valor in zip(poupancas, rendimentos):
+        if valor:
+            account._balance = Dinheiro.de_centavos(account._balance.centavos + valor)
+            account._historico.registrar("rendimento", valor)
+            diferencas[account._branch] = diferencas.get(account._branch, 0) + valor
+        account._last_closing = periodo
+    for account, valor in zip(correntes, tarifas):
+        if valor:
+            account._balance = Dinheiro.de_centavos(account._balance.centavos - valor)
+            account._historico.registrar("tarifa", valor)
+            diferencas[account._branch] = diferencas.get(account._branch, 0) - valor
+        account._last_closing = periodo
+
+    # os saldos mudaram direto em _balance: os totais recebem a diferença de cada
+    # agência, e cada agência indexada reordena o índice de saldos uma vez só
+    for branch, diferenca in diferencas.items():
+        if branch is None:
+            continue
+        branch._totais.centavos += diferenca
+        if branch._bank is not None:
+            branch._bank._totais.centavos += diferenca
+        if branch._saldos is not None:
+            branch.index_balances()
+
+    return ResumoFechamento(
+        periodo,
+        len(poupancas) + len(correntes),
+        ignoradas,
+        Dinheiro.de_centavos(sum(rendimentos)),
+        Dinheiro.de_centavos(sum(tarifas)),
+    )
+
+
+if __name__ == "__main__":
+    # lote x laço ingênuo: python fechamento.py [contas]
+    import sys
+    import time
+
+    from classes import Account
+
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    # um scrypt por conta levaria horas: o hash é gerado uma vez e as contas recebem ele pronto
+    senha = Account.authenticator.gerar_hash("senha")
+
+    def montar_banco():
+        bank = Bank("Banco", "123.456/0001-00", "Rua", "123")
+        for numero_agencia in range(10):
+            bank.add_branch(Branch(str(numero_agencia), f"Agência {numero_agencia}", "Rua", "123"))
+        for i in range(quantidade):
+            branch = bank.get_branch_by_number(str(i % 10))
+            if i % 2:
+                account = Savings_account(str(i), "Cliente", 1000 + i % 997, senha, 0.005)
+            else:
+                account = Current_account(str(i), "Cliente", 1000 + i % 997, senha, 100)
+            branch.add_account(account)
+        return bank
+
+    # o laço ingênuo faz o mesmo trabalho: controle de período e lançamento no histórico
+    bank = montar_banco()
+    inicio = time.perf_counter()
+    for _, account in bank.iter_accounts():
+        if account._last_closing is not None and account._last_closing >= "2026-01":
+            continue
+        if isinstance(account, Savings_account):
+            valor = account.get_Earning()
+            account.balance = account.balance + valor
+            account.historico.registrar("rendimento", valor.centavos)
+        else:
+            valor = account.get_tax_value()
+            account.balance = account.balance - valor
+            account.historico.registrar("tarifa", valor.centavos)
+        account._last_closing = "2026-01"
+    ingenuo = time.perf_counter() - inicio
+
+    bank = montar_banco()
+    inicio = time.perf_counter()
+    resumo = fechar_mes(bank, "2026-01")
+    lote = time.perf_counter() - inicio
+    assert fechar_mes(bank, "2026-01").contas == 0
+
+    print(f"{quantidade} contas: laço por objeto {ingenuo:.2f}s, lote {lote:.2f}s")
+    print(resumo)
@@ -0,0 +1,105 @@
+# Cópia da ListaOrdenada de indice_saldos.py da raiz do repositório, pelo mesmo motivo de
+# dinheiro.py: Desktop/banco roda sozinho, a partir da própria pasta, e não importa módulos
+# da raiz. Só a ListaOrdenada veio; tests/test_copias.py confere que ela continua igual.
+from bisect import bisect_left, insort
+from itertools import islice
+
+_CARGA = 1_000  # tamanho de referência dos blocos da ListaOrdenada
+
+
+class ListaOrdenada:
+    """Valores sempre em ordem, guardados em blocos de até 2 * _CARGA itens.
+
+    É a ideia da SortedList do sortedcontainers: uma lista de listas
+    ordenadas mais o maior valor de cada bloco. Um bisect nos máximos
+    acha o bloco e outro acha a posição dentro dele; inserir ou remover
+    só desloca os itens de um bloco, e um bloco que passa do dobro da
+    carga é dividido em dois. Percorrer k valores a partir de um ponto
+    custa O(log n + k).
+    """
+
+    def __init__(self, valores=()):
+        valores = sorted(valores)
+        self._blocos = [valores[i:i + _CARGA] for i in range(0, len(valores), _CARGA)]
+        self._maximos = [bloco[-1] for bloco in self._blocos]
+        self._tamanho = len(valores)
+
+    def __len__(self) -> int:
+        return self._tamanho
+
+    def adicionar(self, valor):
+        blocos = self._blocos
+        maximos = self._maximos
+        self._tamanho += 1
+        if not blocos:
+            blocos.append([valor])
+            maximos.append(valor)
+            return
+        i = bisect_left(maximos, valor)
+        if i == len(maximos):
+            # maior que tudo: entra no fim do último bloco
+            i -= 1
+            blocos[i].append(valor)
+            maximos[i] = valor
+        else:
+            insort(blocos[i], valor)
+        bloco = blocos[i]
+        if len(bloco) > 2 * _CARGA:
+            blocos[i:i + 1] = [bloco[:_CARGA], bloco[_CARGA:]]
+            maximos[i:i + 1] = [bloco[_CARGA - 1], bloco[-1]]
+
+    def remover(self, valor):
+        """Remove uma ocorrência de valor; ValueError se ele não está na lista."""
+        maximos = self._maximos
+        i = bisect_left(maximos, valor)
+        if i < len(maximos):
+            bloco = self._blocos[i]
+            j = bisect_left(bloco, valor)
+            if bloco[j] == valor:
+                del bloco[j]
+                self._tamanho -= 1
+                if not bloco:
+                    del self._blocos[i]
+                    del maximos[i]
+                elif j == len(bloco):
+                    maximos[i] = bloco[-1]
+                return
+        raise ValueError(f"{valor!r} não está na lista.")
+
+    def trocar(self, antigo, novo):
+        """Substitui antigo por novo; quando os dois caem no mesmo bloco, num passo só."""
+        maximos = self._maximos
+        i = bisect_left(maximos, antigo)
+        # o bloco i guarda os valores em (maximos[i - 1], maximos[i]]; o último aceita qualquer maior
+        if (i < len(maximos) and (i == 0 or maximos[i - 1] < novo)
+                and (novo <= maximos[i] or i == len(maximos) - 1)):
+            bloco = self._blocos[i]
+            j = bisect_left(bloco, antigo)
+            if bloco[j] != antigo:
+                raise ValueError(f"{antigo!r} não está na lista.")
+            del bloco[j]
+            insort(bloco, novo)
+            maximos[i] = bloco[-1]
+            return
+        self.remover(antigo)
+        self.adicionar(novo)
+
+    def a_partir_de(self, valor):
+        """Percorre em ordem crescente os valores >= valor."""
+        blocos = self._blocos
+        i = bisect_left(self._maximos, valor)
+        if i == len(blocos):
+            return
+        bloco = blocos[i]
+        yield from islice(bloco, bisect_left(bloco, valor), None)
+        for bloco in islice(blocos, i + 1, None):
+            yield from bloco
+
+    def __iter__(self):
+        for bloco in self._blocos:
+            yield from bloco
+
+    def decrescente(self):
+        """Percorre os valores do maior para o menor."""
+        for bloco in reversed(self._blocos):
+            yield from reversed(bloco)
@@ -0,0 +1,49 @@
+from autenticacao import SenhaHash
+import contextlib
+import io
+
+import pytest
+
+from classes import Account, Bank, Branch, Current_account, Savings_account, Transaction
+
+
+def test_conta_aceita_senha_hash_pronta():
+    senha = Account.authenticator.gerar_hash("segredo")
+    corrente = Current_account("1", "Ana", 100, senha, 50)
+    poupanca = Savings_account("2", "Ana", 100, senha, 0.005)
+    assert corrente.password is senha and poupanca.password is senha
+    assert corrente.auntheticate("segredo") and not poupanca.auntheticate("errada")
+
+
+def test_senha_em_texto_vira_hash():
+    conta = Current_account("1", "Ana", 100, "segredo", 50)
+    assert isinstance(conta.password, SenhaHash)
+    assert conta.auntheticate("segredo")
+    conta.password = "outra"
+    assert conta.auntheticate("outra") and not conta.auntheticate("segredo")
+
+
+def test_consultas_por_saldo_com_indice():
+    bank = Bank("Banco", "123.456/0001-00", "Rua", "123")
+    with contextlib.redirect_stdout(io.StringIO()):
+        bank.add_branch(Branch("1", "Centro", "Rua", "123"))
+    branch = bank.get_branch_by_number("1")
+    saldos = [300, 0, 50, 1_000, 10]
+    contas = [Current_account(str(i), f"Cliente {i}", saldo, "senha", 100) for i, saldo in enumerate(saldos)]
+    for conta in contas:
+        branch.add_account(conta)
+    bank.index_balances()
+    with contextlib.redirect_stdout(io.StringIO()):
+        # os saques (com a tarifa) deixam as duas contas no limite; o índice acompanha
+        contas[1].withdraw(10)
+        contas[2].withdraw(80)
+    assert bank.top_balances(2) == [contas[3], contas[0]]
+    assert bank.accounts_with_balance_between(0, 300) == [contas[4], contas[0]]
+    assert bank.overdrawn_accounts() == [contas[2], contas[1]]
+
+
+def test_transaction_obsoleta_continua_funcionando():
+    conta = Current_account("1", "Ana", 100, "senha", 100)
+    with pytest.warns(DeprecationWarning):
+        transacao = Transaction("deposito", 10, conta)
+    assert (transacao.type, transacao.value, transacao.account) == ("deposito", 10, conta)
@@ -0,0 +1,48 @@
+import ast
+from pathlib import Path
+
+import pytest
+
+AQUI = Path(__file__).resolve().parents[1]
+RAIZ = AQUI.parents[1]
+
+
+def _definicoes(caminho: Path) -> dict:
+    """Funções, classes e métodos do arquivo, sem docstrings, como texto comparável."""
+    definicoes = {}
+
+    def visitar(no, prefixo=""):
+        for filho in ast.iter_child_nodes(no):
+            if isinstance(filho, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                corpo = filho.body
+                if corpo and isinstance(corpo[0], ast.Expr) and isinstance(corpo[0].value, ast.Constant) \
+                        and isinstance(corpo[0].value.value, str):
+                    filho.body = corpo[1:] or [ast.Pass()]
+                nome = prefixo + filho.name
+                if isinstance(filho, ast.ClassDef):
+                    visitar(filho, nome + ".")
+                    filho.body = [b for b in filho.body if not isinstance(b, (ast.FunctionDef, ast.ClassDef))]
+                definicoes[nome] = ast.dump(filho)
+
+    visitar(ast.parse(caminho.read_text(encoding="utf-8")))
+    return definicoes
+
+
+@pytest.mark.parametrize("arquivo, original, apenas", [
+    ("dinheiro.py", "dinheiro.py", None),
+    ("historico.py", "historico.py", None),
+    ("lista_ordenada.py", "indice_saldos.py", None),
+    # as linhas exportadas são outras aqui (agências, tipos de conta); só a escrita é copiada
+    ("exportacao.py", "exportacao.py", ("_abrir", "escrever_csv", "escrever_jsonl", "_escrever")),
+])
+def test_copia_igual_a_da_raiz(arquivo, original, apenas):
+    if not (RAIZ / original).exists():
+        pytest.skip("fora do repositório, sem a cópia original para comparar")
+    raiz = _definicoes(RAIZ / original)
+    copia = _definicoes(AQUI / arquivo)
+    if apenas is not None:
+        copia = {nome: copia[nome] for nome in apenas}
+    assert copia, arquivo
+    for nome, codigo in copia.items():
+        assert nome in raiz, f"{arquivo}: {nome} só existe na cópia"
+        assert codigo == raiz[nome], f"{arquivo}: {nome} divergiu da raiz"
@@ -0,0 +1,44 @@
+import contextlib
+import csv
+import io
+import json
+
+from classes import Bank, Branch, Current_account, Savings_account
+from exportacao import exportar_contas, exportar_lancamentos
+
+
+def _banco():
+    bank = Bank("Banco", "123.456/0001-00", "Rua", "123")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for numero in ("1", "2"):
+            bank.add_branch(Branch(numero, f"Agência {numero}", "Rua", "123"))
+    bank.get_branch_by_number("1").add_account(Savings_account("10", "Ana", 100, "senha", 0.005))
+    bank.get_branch_by_number("1").add_account(Current_account("11", "Bia", 50, "senha", 100))
+    bank.get_branch_by_number("2").add_account(Savings_account("20", "Caio", 300, "senha", 0.005))
+    return bank
+
+
+def test_contas_por_agencia_e_faixa_de_saldo():
+    bank = _banco()
+    saida = io.StringIO()
+    assert exportar_contas(bank, saida) == 3
+    linhas = list(csv.DictReader(io.StringIO(saida.getvalue())))
+    assert [(l["agencia"], l["numero"], l["cliente"], l["tipo"], l["saldo"]) for l in linhas] == [
+        ("1", "10", "Ana", "Savings_account", "100.00"),
+        ("1", "11", "Bia", "Current_account", "50.00"),
+        ("2", "20", "Caio", "Savings_account", "300.00"),
+    ]
+    saida = io.StringIO()
+    assert exportar_contas(bank, saida, "jsonl", branch_number="1", min_balance=60) == 1
+    assert json.loads(saida.getvalue())["numero"] == "10"
+
+
+def test_lancamentos_da_agencia():
+    bank = _banco()
+    bank.find_account("10").deposit(25)
+    bank.find_account("20").withdraw(5)
+    saida = io.StringIO()
+    exportar_lancamentos(bank, saida, "jsonl", branch_number="1")
+    linhas = [json.loads(linha) for linha in saida.getvalue().splitlines()]
+    assert {l["agencia"] for l in linhas} == {"1"}
+    assert ("10", "deposito", "25.00") in [(l["conta"], l["tipo"], l["valor"]) for l in linhas]
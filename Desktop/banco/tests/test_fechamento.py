@@ -0,0 +1,33 @@
+from datetime import date
+
+import pytest
+
+from classes import Bank, Branch, Current_account, Savings_account
+from errors import DataInvalidaError
+from fechamento import fechar_mes
+
+
+def _banco():
+    bank = Bank("Banco", "123.456/0001-00", "Rua", "123")
+    bank.add_branch(Branch("1", "Agência 1", "Rua", "123"))
+    branch = bank.get_branch_by_number("1")
+    branch.add_account(Savings_account("1", "Ana", 1000, "senha", 0.005))
+    branch.add_account(Current_account("2", "Bia", 1000, "senha", 100))
+    return bank
+
+
+@pytest.mark.parametrize("repetido", ["2026-01", "2026-1", date(2026, 1, 31)])
+def test_mesmo_mes_escrito_de_outro_jeito_nao_fecha_de_novo(repetido):
+    bank = _banco()
+    resumo = fechar_mes(bank, "2026-1")
+    assert resumo.periodo == "2026-01" and resumo.contas == 2
+    saldos = [account.balance for _, account in bank.iter_accounts()]
+
+    assert fechar_mes(bank, repetido).contas == 0
+    assert [account.balance for _, account in bank.iter_accounts()] == saldos
+    assert fechar_mes(bank, "2026-02").contas == 2
+
+
+def test_periodo_invalido():
+    with pytest.raises(DataInvalidaError):
+        fechar_mes(_banco(), "janeiro")
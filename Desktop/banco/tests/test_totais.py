@@ -0,0 +1,68 @@
+import contextlib
+import io
+from decimal import Decimal
+
+from classes import Account, Bank, Branch, Current_account, Savings_account
+from fechamento import fechar_mes
+from totais import verificar_totais
+
+SENHA = Account.authenticator.gerar_hash("senha")
+
+
+def _banco():
+    bank = Bank("Banco", "123.456/0001-00", "Rua", "123")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for numero in ("1", "2"):
+            bank.add_branch(Branch(numero, f"Agência {numero}", "Rua", "123"))
+    um, dois = bank.get_branch_by_number("1"), bank.get_branch_by_number("2")
+    um.add_account(Savings_account("10", "Ana", 1_000, SENHA, 0.01))
+    um.add_account(Current_account("11", "Bia", 500, SENHA, 1_000))
+    dois.add_account(Current_account("20", "Caio", 2_000, SENHA, 1_000))
+    return bank, um, dois
+
+
+def _conferir(bank, branches):
+    # os totais mantidos contra a soma conta por conta
+    for branch in branches:
+        contas = list(branch._accounts.values())
+        assert branch.total().centavos == sum(conta.balance.centavos for conta in contas)
+        assert branch._totais.contas == len(contas)
+    assert bank.total().centavos == sum(branch.total().centavos for branch in branches)
+    assert bank._totais.contas == sum(branch._totais.contas for branch in branches)
+
+
+def test_totais_acompanham_as_operacoes_em_varias_agencias():
+    bank, um, dois = _banco()
+    assert (um.total(), dois.total(), bank.total()) == (1_500, 2_000, 3_500)
+    assert bank._totais.por_tipo == {"Savings_account": 1, "Current_account": 2}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        bank.find_account("10").deposit(250)
+        bank.find_account("11").withdraw(100)
+        # o Bank não tem transferência: o valor sai de uma agência e entra na outra
+        bank.find_account("20").withdraw(300)
+        bank.find_account("10").deposit(300)
+    _conferir(bank, (um, dois))
+    assert bank.find_account("10").balance == 1_550
+
+    antes = bank.total()
+    resumo = fechar_mes(bank, "2026-01")
+    assert resumo.total_rendimentos > 0 and resumo.total_tarifas > 0
+    _conferir(bank, (um, dois))
+    assert bank.total() == antes + resumo.total_rendimentos - resumo.total_tarifas
+    assert verificar_totais(bank, processos=2) == []
+
+
+def test_verificacao_acha_e_corrige_divergencia():
+    bank, um, dois = _banco()
+    dois._totais.centavos += 1
+    um._totais.por_tipo["Savings_account"] += 1
+    bank._totais.contas += 1
+    divergencias = verificar_totais(bank, processos=2, corrigir=True)
+    assert [(d.escopo, d.campo, d.registrado, d.recalculado) for d in divergencias] == [
+        ("agência 1", "Savings_account", 2, 1),
+        ("agência 2", "saldo", Decimal("2000.01"), 2_000),
+        ("banco", "contas", 4, 3),
+    ]
+    assert verificar_totais(bank, processos=2) == []
+    assert dois.total() == 2_000 and um._totais.por_tipo["Savings_account"] == 1
@@ -0,0 +1,168 @@
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from dinheiro import Dinheiro
+
+_CONTAS_POR_PEDACO = 50_000  # contas mandadas a cada processo de uma vez na verificação
+
+
+class Totais:
+    """Soma dos saldos e contagem das contas (no total e por tipo) de uma agência ou de um banco.
+
+    Os valores são mantidos enquanto as contas mudam (ver
+    Account._definir_saldo e Branch.add_account), então ler qualquer
+    total é O(1).
+    """
+
+    __slots__ = ("centavos", "contas", "por_tipo")
+
+    def __init__(self):
+        self.centavos = 0
+        self.contas = 0
+        self.por_tipo = Counter()  # nome da classe da conta -> quantidade
+
+    def adicionar(self, account):
+        self.centavos += account._balance.centavos
+        self.contas += 1
+        self.por_tipo[type(account).__name__] += 1
+
+    def somar(self, outros: "Totais"):
+        self.centavos += outros.centavos
+        self.contas += outros.contas
+        self.por_tipo.update(outros.por_tipo)
+
+    @property
+    def saldo(self) -> Dinheiro:
+        return Dinheiro.de_centavos(self.centavos)
+
+
+class Divergencia(NamedTuple):
+    escopo: str  # "banco" ou "agência <número>"
+    campo: str  # "saldo", "contas" ou o nome de um tipo de conta
+    registrado: object
+    recalculado: object
+
+
+def _somar_pedaco(centavos: bytes, tipos: list):
+    # roda num processo do pool: recebe os saldos como bytes de um array("q")
+    saldos = array("q")
+    saldos.frombytes(centavos)
+    return sum(saldos), len(saldos), Counter(tipos)
+
+
+def _pedacos(branch):
+    contas = list(branch._accounts.values())
+    for inicio in range(0, len(contas), _CONTAS_POR_PEDACO):
+        pedaco = contas[inicio:inicio + _CONTAS_POR_PEDACO]
+        saldos = array("q", [account._balance.centavos for account in pedaco])
+        yield saldos.tobytes(), [type(account).__name__ for account in pedaco]
+
+
+def _comparar(escopo: str, registrado: Totais, recalculado: Totais) -> list:
+    divergencias = []
+    if registrado.centavos != recalculado.centavos:
+        divergencias.append(Divergencia(escopo, "saldo", registrado.saldo, recalculado.saldo))
+    if registrado.contas != recalculado.contas:
+        divergencias.append(Divergencia(escopo, "contas", registrado.contas, recalculado.contas))
+    for tipo in sorted(set(registrado.por_tipo) | set(recalculado.por_tipo)):
+        if registrado.por_tipo[tipo] != recalculado.por_tipo[tipo]:
+            divergencias.append(Divergencia(escopo, tipo, registrado.por_tipo[tipo], recalculado.por_tipo[tipo]))
+    return divergencias
+
+
+def verificar_totais(bank, processos: int = None, corrigir: bool = False) -> list:
+    """Recalcula os totais de cada agência e do banco e os compara com os mantidos.
+
+    As contas de cada agência são mandadas em pedaços (saldos num array
+    compacto e nomes dos tipos) para um pool de processos, que soma e
+    conta em paralelo; processos=None usa um por CPU. Retorna a lista de
+    Divergencia (vazia se está tudo certo). Com corrigir=True, os totais
+    mantidos passam a ser os recalculados.
+    """
+    branches = list(bank._branch.values())
+    recalculados = {branch: Totais() for branch in branches}
+    with ProcessPoolExecutor(processos) as executor:
+        futuros = [
+            (branch, executor.submit(_somar_pedaco, centavos, tipos))
+            for branch in branches
+            for centavos, tipos in _pedacos(branch)
+        ]
+        for branch, futuro in futuros:
+            soma, contas, por_tipo = futuro.result()
+            total = recalculados[branch]
+            total.centavos += soma
+            total.contas += contas
+            total.por_tipo.update(por_tipo)
+
+    divergencias = []
+    do_banco = Totais()
+    for branch in branches:
+        divergencias += _comparar(f"agência {branch.number}", branch._totais, recalculados[branch])
+        do_banco.somar(recalculados[branch])
+    divergencias += _comparar("banco", bank._totais, do_banco)
+
+    if corrigir:
+        for branch in branches:
+            branch._totais = recalculados[branch]
+        bank._totais = do_banco
+    return divergencias
+
+
+if __name__ == "__main__":
+    # total mantido x somar tudo, e a verificação com 1 e com vários processos: python totais.py [contas]
+    import contextlib
+    import os
+    import random
+    import sys
+    import time
+
+    from classes import Account, Bank, Branch, Current_account, Savings_account
+    from errors import ErroBanco
+
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    # o custo do hash de senha não interessa aqui: as contas recebem o mesmo hash pronto
+    senha = Account.authenticator.gerar_hash("senha")
+
+    bank = Bank("Banco", "123.456/0001-00", "Rua", "123")
+    rng = random.Random(6)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for numero in range(10):
+            bank.add_branch(Branch(str(numero), f"Agência {numero}", "Rua", "123"))
+        branches = list(bank._branch.values())
+        accounts = []
+        for i in range(quantidade):
+            if i % 2:
+                account = Savings_account(str(i), "Cliente", rng.randrange(1, 5_000), senha, 0.005)
+            else:
+                account = Current_account(str(i), "Cliente", rng.randrange(1, 5_000), senha, 100)
+            branches[i % 10].add_account(account)
+            accounts.append(account)
+        for _ in range(100_000):
+            account = rng.choice(accounts)
+            try:
+                if rng.random() < 0.5:
+                    account.deposit(rng.randrange(1, 100))
+                else:
+                    account.withdraw(rng.randrange(1, 100))
+            except ErroBanco:
+                pass
+
+    inicio = time.perf_counter()
+    for _ in range(1_000):
+        bank.total()
+    print(f"{quantidade} contas: total mantido em {(time.perf_counter() - inicio) / 1_000 * 1e6:.2f} µs")
+    inicio = time.perf_counter()
+    soma = sum(account._balance.centavos for _, account in bank.iter_accounts())
+    print(f"  somando conta por conta: {(time.perf_counter() - inicio) * 1e3:.0f} ms")
+    assert soma == bank.total().centavos
+
+    for processos in sorted({1, os.cpu_count() or 1}):
+        inicio = time.perf_counter()
+        divergencias = verificar_totais(bank, processos)
+        print(f"  verificação com {processos} processo(s): {time.perf_counter() - inicio:.2f} s, "
+              f"{len(divergencias)} divergência(s)")
+    bank._branch["3"]._totais.centavos += 1
+    print(f"  depois de estragar a agência 3: {verificar_totais(bank, corrigir=True)}")
+    assert not verificar_totais(bank)
@@ -1,24 +1,459 @@
-from errors import ValorInvalidoError
-from cliente import Cliente
-from conta import ContaBancaria
+import heapq
+from array import array
+
+from errors import (
+    BancoError, ValorInvalidoError, ContaNaoEncontradaError, ContaJaExisteError, ContaError, SaldoInsuficienteError,
+)
+from clientes import RegistroClientes
+from conta import ContaBancaria, ContextoContas
+from dinheiro import Dinheiro, para_centavos
+from idempotencia import RegistroIdempotencia
+from indice_saldos import IndiceSaldos
+from limites import TRANSFERENCIA
+from repositorio import RepositorioMemoria
+
+def _agrupar(numeros, contrapartes, valores) -> dict:
+    """As pernas de cada conta: numero -> (centavos, contraparte) se for uma só,
+    ou (array de centavos, lista de contrapartes) se forem várias."""
+    grupos = {}
+    for numero, contraparte, centavos in zip(numeros, contrapartes, valores):
+        grupo = grupos.get(numero)
+        if grupo is None:
+            grupos[numero] = (centavos, contraparte)
+        elif type(grupo[0]) is int:
+            grupos[numero] = (array("q", (grupo[0], centavos)), [grupo[1], contraparte])
+        else:
+            grupo[0].append(centavos)
+            grupo[1].append(contraparte)
+    return grupos
+
+
+def _registrar_grupo(historico, tipo: str, grupo):
+    # a conta que paga uma folha inteira recebe todos os lançamentos numa chamada só
+    if grupo is None:
+        return
+    if type(grupo[0]) is int:
+        historico.registrar(tipo, grupo[0], grupo[1])
+    else:
+        historico.registrar_varios(tipo, grupo[0], grupo[1])
+
 
 class Banco:
-    def __init__(self, nome: str):
+    def __init__(self, nome: str, repositorio=None):
         self.nome = nome
-        self.contas = []
+        # onde as contas são guardadas (ver repositorio.py); o padrão é só memória
+        self._repositorio = repositorio if repositorio is not None else RepositorioMemoria()
+        # índice número -> conta; como os números são crescentes,
+        # a ordem de inserção do dict já é a ordem das contas
+        self._contas_por_numero = {}
+        # diário, limites, eventos etc., num objeto só que todas as contas do banco referenciam
+        self._contexto = ContextoContas()
+        if self._repositorio.duravel:
+            self._contexto.repositorio = self._repositorio
+        # contas de um snapshot ainda não carregadas (ver snapshot.py)
+        self._mapeadas = None
+        # um Cliente por titular, com as contas de cada um (ver clientes.py)
+        self._clientes = RegistroClientes()
+        self._clientes.ao_renomear = self._gravar_titular
+        self._clientes_completos = False
+
+    def anexar_diario(self, diario):
+        """Passa a registrar no diário as operações de todas as contas do banco."""
+        self._contexto.diario = diario
+
+    def definir_limites(self, motor):
+        """Aplica um MotorLimites (ver limites.py) aos saques e transferências de todas as contas."""
+        self._contexto.limites = motor
+
+    def definir_eventos(self, barramento):
+        """Publica no BarramentoEventos (ver eventos.py) as operações de todas as contas."""
+        self._contexto.eventos = barramento
+
+    def definir_idempotencia(self, registro: RegistroIdempotencia = None) -> RegistroIdempotencia:
+        """Passa a aceitar chaves de idempotência em depositar, sacar e transferir.
+
+        Sem registro, é criado um RegistroIdempotencia com a validade e a
+        capacidade padrão.
+        """
+        if registro is None:
+            registro = RegistroIdempotencia()
+        self._contexto.idempotencia = registro
+        return registro
+
+    def indexar_saldos(self) -> IndiceSaldos:
+        """Passa a manter as contas ordenadas por saldo (ver indice_saldos.py).
 
-    def criar_conta(self, nome_titular: str, saldo_inicial: float = 0.0):
+        Com o índice, maiores_saldos e contas_com_saldo_entre custam
+        O(log n + k) em vez de percorrer todas as contas; em troca, cada
+        depósito, saque e transferência também atualiza o índice.
+        """
+        from snapshot import dados_das_contas
+
+        indice = IndiceSaldos((numero, centavos) for numero, _, centavos in dados_das_contas(self))
+        self._contexto.indice_saldos = indice
+        return indice
+
+    def fechar(self):
+        """Grava o que falta no diário (se houver) e o fecha."""
+        if self._contexto.diario is not None:
+            self._contexto.diario.fechar()
+        if self._mapeadas is not None:
+            self._mapeadas.fechar()
+            self._mapeadas = None
+        self._repositorio.fechar()
+
+    def _materializar(self, numero: int, nome: str, centavos: int) -> ContaBancaria:
+        """Cria o objeto de uma conta lida do snapshot ou do repositório e o põe no índice."""
+        # o nome guardado com a conta é o do momento da gravação; se o cliente foi renomeado
+        # depois, o registro sabe quem ele é agora
+        titular = self._clientes.titular_de(numero) or self._clientes.obter(nome)
+        conta = ContaBancaria(titular, 0, numero)
+        conta._saldo = centavos
+        # o saldo de uma conta ainda não carregada já está no índice
+        conta._contexto = self._contexto
+        # setdefault: se outra thread carregou a mesma conta antes, vale a dela
+        carregada = self._contas_por_numero.setdefault(numero, conta)
+        # depois de _indexar_clientes, as contas ainda não carregadas já estão vinculadas
+        if carregada is conta and numero not in self._clientes.contas_de(titular):
+            self._clientes.vincular(titular, numero)
+        return carregada
+
+    def _carregar_mapeada(self, numero: int):
+        dados = self._mapeadas.buscar(numero)
+        if dados is None:
+            return None
+        _, nome, centavos = dados
+        return self._materializar(numero, nome, centavos)
+
+    def _carregar_todas(self):
+        """Carrega todas as contas do snapshot e volta a ordenar o índice por número."""
+        if self._mapeadas is None:
+            return
+        for numero in self._mapeadas.numeros():
+            if numero not in self._contas_por_numero:
+                self._carregar_mapeada(numero)
+        self._contas_por_numero = dict(sorted(self._contas_por_numero.items()))
+        self._mapeadas.fechar()
+        self._mapeadas = None
+
+    def _existe(self, numero: int) -> bool:
+        if numero in self._contas_por_numero:
+            return True
+        if self._mapeadas is not None and self._mapeadas.buscar(numero) is not None:
+            return True
+        return self._repositorio.buscar(numero) is not None
+
+    def _cadastrar(self, conta: ContaBancaria):
+        contas = self._contas_por_numero
+        numero = conta.numero
+        if numero in contas:
+            raise ContaJaExisteError(f"Já existe uma conta com o número {numero}.")
+        fora_de_ordem = bool(contas) and numero < next(reversed(contas))
+        contas[numero] = conta
+        if fora_de_ordem:
+            # um número escolhido abaixo do maior já usado: o índice volta à ordem de número,
+            # de que dependem iterar_contas e o snapshot
+            ordenadas = sorted(contas.items())
+            contas.clear()
+            contas.update(ordenadas)
+        contexto = self._contexto
+        conta._contexto = contexto
+        if contexto.indice_saldos is not None:
+            contexto.indice_saldos.adicionar(conta.numero, conta._saldo)
+        if contexto.diario is not None:
+            contexto.diario.registrar_criacao(conta.numero, conta.titular.nome, conta._saldo)
+
+    @property
+    def contas(self) -> list:
+        """Lista das contas cadastradas (cópia, em ordem de número)."""
+        return list(self.iterar_contas())
+
+    @staticmethod
+    def _validar_abertura(nome_titular: str, saldo_inicial: float):
         if not nome_titular.strip():
             raise ValorInvalidoError("O nome do titular não pode ser vazio.")
 
-        
+
         if saldo_inicial == 0:
             raise ValorInvalidoError("O saldo inicial não pode ser zero.")
 
         if saldo_inicial < 0:
             raise ValorInvalidoError("O saldo inicial não pode ser negativo.")
 
-        titular = Cliente(nome_titular)
-        conta = ContaBancaria(titular, saldo_inicial)
-        self.contas.append(conta)
+    def criar_conta(self, nome_titular: str, saldo_inicial: float = 0.0, numero: int = None):
+        self._validar_abertura(nome_titular, saldo_inicial)
+        if numero is not None and self._existe(numero):
+            raise ContaJaExisteError(f"Já existe uma conta com o número {numero}.")
+
+        # convertido e validado antes de o titular entrar no registro: um valor recusado
+        # (0.001, inf) não pode deixar um cliente sem contas na busca por nome
+        centavos = para_centavos(saldo_inicial)
+        if centavos <= 0:
+            raise ValorInvalidoError("O saldo inicial deve ser de pelo menos um centavo.")
+        titular = self._clientes.obter(nome_titular)
+        conta = ContaBancaria(titular, Dinheiro.de_centavos(centavos), numero)
+        self._cadastrar(conta)
+        self._clientes.vincular(titular, conta.numero)
+        self._repositorio.adicionar_lote(((conta.numero, titular.nome, conta._saldo),))
         return conta
+
+    def criar_contas_em_lote(self, linhas):
+        """Abre várias contas de uma vez a partir de linhas (nome_titular, saldo_inicial).
+
+        Retorna (contas_criadas, erros), onde erros é uma lista de
+        (indice_da_linha, erro). Uma linha inválida não interrompe o lote.
+        """
+        validas = []
+        erros = []
+        # os titulares novos são ordenados no índice de busca uma vez só, no fim
+        with self._clientes.em_lote():
+            for indice, linha in enumerate(linhas):
+                try:
+                    nome_titular, saldo_inicial = linha
+                    self._validar_abertura(nome_titular, saldo_inicial)
+                    # a mesma conversão que a conta faz: 0.001, inf ou True não passam daqui
+                    centavos = para_centavos(saldo_inicial)
+                    if centavos <= 0:
+                        raise ValorInvalidoError("O saldo inicial deve ser de pelo menos um centavo.")
+                    titular = self._clientes.obter(nome_titular)
+                except BancoError as e:
+                    erros.append((indice, e))
+                except (ValueError, TypeError, AttributeError):
+                    erros.append((indice, ValorInvalidoError(f"Linha inválida: {linha!r}")))
+                else:
+                    validas.append((titular, centavos))
+
+        # todas as contas são criadas antes de a primeira ser cadastrada
+        numeros = ContaBancaria.reservar_numeros(len(validas))
+        criadas = [
+            ContaBancaria(titular, Dinheiro.de_centavos(centavos), numero)
+            for numero, (titular, centavos) in zip(numeros, validas)
+        ]
+        for conta in criadas:
+            self._cadastrar(conta)
+            self._clientes.vincular(conta.titular, conta.numero)
+        # um executemany só para o lote inteiro, quando o repositório grava
+        self._repositorio.adicionar_lote((conta.numero, conta.titular.nome, conta._saldo) for conta in criadas)
+        return criadas, erros
+
+    def buscar_conta_por_numero(self, numero: int) -> ContaBancaria:
+        """Busca a conta pelo número em O(1)."""
+        try:
+            return self._contas_por_numero[numero]
+        except KeyError:
+            if self._mapeadas is not None:
+                conta = self._carregar_mapeada(numero)
+                if conta is not None:
+                    return conta
+            dados = self._repositorio.buscar(numero)
+            if dados is not None:
+                return self._materializar(numero, *dados)
+            raise ContaNaoEncontradaError(f"Conta número {numero} não existe.") from None
+
+    def transferir_em_lote(self, pernas, chave=None):
+        """Faz de uma vez as transferências em pernas, linhas (origem, destino, valor) com números de conta.
+
+        As pernas são compensadas por conta: cada conta envolvida é
+        travada uma vez (em ordem de número, como em
+        ContaBancaria.transferir) e recebe só a variação líquida do saldo.
+        Ou todas as pernas valem ou nenhuma: se alguma conta terminaria
+        negativa, nada é aplicado e o SaldoInsuficienteError traz em
+        .pernas as pernas que debitam essas contas, como (indice, origem,
+        destino, valor). O histórico e os eventos continuam tendo um
+        lançamento por perna; no diário e no repositório o lote é um
+        registro só, para que uma queda não deixe parte dele aplicada.
+        Com MotorLimites, os limites valem para o que cada conta envia,
+        sem descontar o que ela recebe no mesmo lote (pernas que se
+        compensam não escapam dos limites): cada perna enviada é
+        verificada contra o limite por operação, e a soma das pernas
+        enviadas por uma conta conta como uma transferência dela no
+        limite diário. Se alguma conta passaria dos limites, nada é
+        aplicado. chave funciona como em transferir, para o lote inteiro.
+        """
+        origens = array("q")
+        destinos = array("q")
+        valores = array("q")
+        variacoes = {}  # numero -> centavos
+        variacao = variacoes.get
+        for indice, perna in enumerate(pernas):
+            try:
+                origem, destino, valor = perna
+                centavos = para_centavos(valor)
+                # o array("q") também recusa números de conta que não são int
+                origens.append(origem)
+                destinos.append(destino)
+                valores.append(centavos)
+            except (BancoError, ValueError, TypeError, OverflowError):
+                raise ValorInvalidoError(f"Perna {indice} inválida: {perna!r}") from None
+            if centavos <= 0:
+                raise ValorInvalidoError(f"Perna {indice}: o valor da transferência deve ser positivo.")
+            if origem == destino:
+                raise ContaError(f"Perna {indice}: origem e destino são a mesma conta.")
+            variacoes[origem] = variacao(origem, 0) - centavos
+            variacoes[destino] = variacao(destino, 0) + centavos
+        contexto = self._contexto
+        if chave is not None and contexto.idempotencia is None:
+            raise ContaError("Operações com chave exigem um registro de idempotência "
+                             "(ver Banco.definir_idempotencia).")
+
+        # agrupados antes de travar: uma entrada por conta, com as pernas dela
+        enviadas = _agrupar(origens, destinos, valores)
+        recebidas = _agrupar(destinos, origens, valores)
+
+        numeros = sorted(variacoes)
+        contas = []
+        try:
+            for numero in numeros:
+                conta = self.buscar_conta_por_numero(numero)
+                conta._trava.acquire()
+                contas.append(conta)
+            if chave is not None and chave in contexto.idempotencia:
+                return
+            negativas = {numero for numero, conta in zip(numeros, contas) if conta._saldo + variacoes[numero] < 0}
+            if negativas:
+                erro = SaldoInsuficienteError(
+                    f"Saldo insuficiente em {len(negativas)} conta(s) do lote; nenhuma transferência foi feita."
+                )
+                erro.pernas = [
+                    (indice, origem, destino, Dinheiro.de_centavos(centavos))
+                    for indice, (origem, destino, centavos) in enumerate(zip(origens, destinos, valores))
+                    if origem in negativas
+                ]
+                raise erro
+            if chave is not None and not contexto.idempotencia.registrar(chave):
+                return
+            if contexto.limites is not None:
+                enviados = {}
+                maiores = {}
+                for numero, (centavos, _) in enviadas.items():
+                    if type(centavos) is int:
+                        enviados[numero] = maiores[numero] = centavos
+                    else:
+                        enviados[numero] = sum(centavos)
+                        maiores[numero] = max(centavos)
+                try:
+                    contexto.limites.consumir_lote(TRANSFERENCIA, enviados, maiores)
+                except Exception:
+                    if chave is not None:
+                        contexto.idempotencia.liberar(chave)
+                    raise
+
+            saldos = contexto.indice_saldos
+            for numero, conta in zip(numeros, contas):
+                centavos = variacoes[numero]
+                conta._saldo += centavos
+                if saldos is not None and centavos:
+                    saldos.mover(numero, conta._saldo - centavos, conta._saldo)
+                historico = conta._historico if conta._historico is not None else conta.historico
+                _registrar_grupo(historico, "transferencia_enviada", enviadas.get(numero))
+                _registrar_grupo(historico, "transferencia_recebida", recebidas.get(numero))
+            if contexto.diario is not None:
+                contexto.diario.registrar_lote(variacoes)
+            if contexto.repositorio is not None:
+                contexto.repositorio.registrar_lote(variacoes)
+            if contexto.eventos is not None:
+                publicar = contexto.eventos.publicar
+                for origem, destino, centavos in zip(origens, destinos, valores):
+                    publicar(("transferencia", origem, centavos, destino))
+        finally:
+            for conta in contas:
+                conta._trava.release()
+
+    def _indexar_clientes(self):
+        """Vincula aos titulares as contas que ainda estão só no snapshot ou no repositório,
+        para que o registro de clientes conheça todos; as contas em si não são carregadas."""
+        if self._clientes_completos:
+            return
+        if self._mapeadas is not None or self._repositorio.duravel:
+            carregadas = self._contas_por_numero
+            linhas = self._repositorio.dados() if self._repositorio.duravel else self._mapeadas
+            obter = self._clientes.obter
+            vincular = self._clientes.vincular
+            with self._clientes.em_lote():
+                for numero, nome, _ in linhas:
+                    # as já carregadas foram vinculadas ao carregar
+                    if numero not in carregadas:
+                        vincular(obter(nome), numero)
+        self._clientes_completos = True
+
+    def buscar_clientes(self, prefixo: str, limite: int = 20) -> list:
+        """Clientes cujo nome começa com prefixo, sem diferença de maiúsculas nem de acentos."""
+        self._indexar_clientes()
+        return self._clientes.buscar(prefixo, limite)
+
+    def renomear_titular(self, numero: int, novo_nome: str) -> ContaBancaria:
+        """Passa a conta para o titular chamado novo_nome; as outras contas do titular atual não mudam.
+
+        Os clientes são identificados pelo nome: se já existe um cliente
+        com novo_nome, a conta passa a ser dele, senão um cliente novo é
+        criado. Um titular que fica sem contas sai do registro.
+        """
+        conta = self.buscar_conta_por_numero(numero)
+        self._indexar_clientes()
+        novo = self._clientes.obter(novo_nome)
+        antigo = conta._cliente
+        if novo is not antigo:
+            self._clientes.desvincular(antigo, numero)
+            self._clientes.vincular(novo, numero)
+            conta._cliente = novo
+            self._gravar_titular(numero, novo.nome)
+        return conta
+
+    def _gravar_titular(self, numero: int, nome: str):
+        # o nome guardado com a conta no diário e no repositório; o snapshot grava o nome atual
+        if self._contexto.diario is not None:
+            self._contexto.diario.registrar_renomeacao(numero, nome)
+        if self._contexto.repositorio is not None:
+            self._contexto.repositorio.registrar_renomeacao(numero, nome)
+
+    def contas_do_cliente(self, cliente) -> list:
+        """Contas de um cliente (o objeto ou o nome exato), em ordem de abertura."""
+        self._indexar_clientes()
+        if isinstance(cliente, str):
+            cliente = self._clientes.pelo_nome(cliente)
+            if cliente is None:
+                return []
+        return [self.buscar_conta_por_numero(numero) for numero in self._clientes.contas_de(cliente)]
+
+    def maiores_saldos(self, n: int = 100) -> list:
+        """As n contas de maior saldo, da maior para a menor."""
+        saldos = self._contexto.indice_saldos
+        if saldos is None:
+            # sem índice: uma passada por todas as contas
+            return heapq.nlargest(n, self.iterar_contas(), key=lambda conta: (conta._saldo, conta._numero))
+        return [self.buscar_conta_por_numero(numero) for numero, _ in saldos.maiores(n)]
+
+    def contas_com_saldo_entre(self, minimo, maximo) -> list:
+        """Contas com saldo entre minimo e maximo reais (inclusive), em ordem de saldo."""
+        minimo = para_centavos(minimo)
+        maximo = para_centavos(maximo)
+        saldos = self._contexto.indice_saldos
+        if saldos is None:
+            return sorted(
+                (conta for conta in self.iterar_contas() if minimo <= conta._saldo <= maximo),
+                key=lambda conta: (conta._saldo, conta._numero),
+            )
+        return [self.buscar_conta_por_numero(numero) for numero, _ in saldos.entre(minimo, maximo)]
+
+    def iterar_contas(self):
+        """Percorre as contas em ordem de número, sem copiar a lista."""
+        self._carregar_todas()
+        if not self._repositorio.duravel:
+            yield from self._contas_por_numero.values()
+            return
+        # a ordem vem do repositório; as contas ainda não usadas são carregadas no caminho
+        carregadas = self._contas_por_numero
+        for numero, nome, centavos in self._repositorio.dados():
+            conta = carregadas.get(numero)
+            yield conta if conta is not None else self._materializar(numero, nome, centavos)
+
+    def listar_contas(self):
+        contas = self.iterar_contas()
+        primeira = next(contas, None)
+        if primeira is None:
+            print("\nNenhuma conta cadastrada.")
+            return
+        print(f"\n=== Contas do {self.nome} ===")
+        primeira.exibir_resumo()
+        for conta in contas:
+            conta.exibir_resumo()
@@ -0,0 +1,302 @@
+import itertools
+import multiprocessing
+
+from banco import Banco
+from conta import ContaBancaria
+from dinheiro import Dinheiro, para_centavos
+from errors import BancoError, ValorInvalidoError
+
+
+def _executar_particao(conexao, nome: str):
+    """Laço de um processo trabalhador: é dono de um Banco e atende pedidos do coordenador."""
+    banco = Banco(nome)
+    # transferências entre partições em andamento: id -> (numero, centavos)
+    reservas = {}
+    creditos_pendentes = {}
+
+    def criar(nome_titular, saldo_inicial, numero):
+        return banco.criar_conta(nome_titular, saldo_inicial, numero).numero
+
+    def depositar(numero, valor):
+        banco.buscar_conta_por_numero(numero).depositar(valor)
+
+    def sacar(numero, valor):
+        banco.buscar_conta_por_numero(numero).sacar(valor)
+
+    def saldo(numero):
+        return banco.buscar_conta_por_numero(numero).saldo
+
+    def transferir(origem, destino, valor):
+        banco.buscar_conta_por_numero(origem).transferir(banco.buscar_conta_por_numero(destino), valor)
+
+    def preparar_debito(id_transferencia, numero, centavos):
+        # fase 1 na origem: o valor sai da conta e fica reservado
+        banco.buscar_conta_por_numero(numero).sacar(Dinheiro.de_centavos(centavos))
+        reservas[id_transferencia] = (numero, centavos)
+
+    def preparar_credito(id_transferencia, numero, centavos):
+        # fase 1 no destino: só garante que a conta existe
+        banco.buscar_conta_por_numero(numero)
+        creditos_pendentes[id_transferencia] = (numero, centavos)
+
+    def confirmar(id_transferencia):
+        reservas.pop(id_transferencia, None)
+        pendente = creditos_pendentes.pop(id_transferencia, None)
+        if pendente is not None:
+            numero, centavos = pendente
+            banco.buscar_conta_por_numero(numero).depositar(Dinheiro.de_centavos(centavos))
+
+    def abortar(id_transferencia):
+        creditos_pendentes.pop(id_transferencia, None)
+        reserva = reservas.pop(id_transferencia, None)
+        if reserva is not None:
+            numero, centavos = reserva
+            banco.buscar_conta_por_numero(numero).depositar(Dinheiro.de_centavos(centavos))
+
+    def pendentes():
+        # transferências preparadas aqui e ainda não confirmadas nem desfeitas
+        return len(reservas) + len(creditos_pendentes)
+
+    def lote(operacoes):
+        # devolve só os erros, com a posição de cada um no lote
+        erros = []
+        for posicao, (operacao, numero, valor) in enumerate(operacoes):
+            try:
+                comandos[operacao](numero, valor)
+            except Exception as e:
+                erros.append((posicao, e))
+        return erros
+
+    comandos = {
+        "criar": criar,
+        "depositar": depositar,
+        "sacar": sacar,
+        "saldo": saldo,
+        "transferir": transferir,
+        "preparar_debito": preparar_debito,
+        "preparar_credito": preparar_credito,
+        "confirmar": confirmar,
+        "abortar": abortar,
+        "pendentes": pendentes,
+        "lote": lote,
+    }
+
+    while True:
+        comando, args = conexao.recv()
+        if comando == "encerrar":
+            conexao.close()
+            return
+        # qualquer erro volta ao coordenador como resposta; se o processo morresse,
+        # quem pediu ficaria esperando
+        try:
+            resposta = ("ok", comandos[comando](*args))
+        except Exception as e:
+            resposta = ("erro", e)
+        try:
+            conexao.send(resposta)
+        except Exception as e:
+            # um resultado ou erro que não pode ser serializado
+            conexao.send(("erro", BancoError(f"Resposta inválida da partição: {e!r}")))
+
+
+class BancoParticionado:
+    """Coordenador de um banco dividido entre vários processos.
+
+    Cada partição é um processo com o próprio Banco; a conta de número n
+    fica na partição n % particoes. Os números de conta são atribuídos
+    aqui, no coordenador, para não se repetirem entre partições.
+    Transferências entre partições usam confirmação em duas fases.
+    """
+
+    def __init__(self, nome: str, particoes: int = None):
+        self.nome = nome
+        particoes = particoes or multiprocessing.cpu_count()
+        self._conexoes = []
+        self._processos = []
+        for indice in range(particoes):
+            local, remota = multiprocessing.Pipe()
+            processo = multiprocessing.Process(
+                target=_executar_particao, args=(remota, f"{nome} #{indice}"), daemon=True
+            )
+            processo.start()
+            # só o trabalhador fica com a outra ponta: se ele morrer, recv() recebe EOF
+            remota.close()
+            self._conexoes.append(local)
+            self._processos.append(processo)
+        self._ids_transferencia = itertools.count(1)
+        # de quanto em quanto tempo (s) quem espera uma resposta confere se a partição está viva
+        self._espera = 1.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.encerrar()
+
+    @property
+    def particoes(self) -> int:
+        return len(self._conexoes)
+
+    def _conexao(self, numero: int):
+        return self._conexoes[numero % len(self._conexoes)]
+
+    def _parada(self, conexao) -> BancoError:
+        indice = self._conexoes.index(conexao)
+        return BancoError(f"A partição {indice} parou (código de saída {self._processos[indice].exitcode}).")
+
+    def _enviar(self, conexao, comando, *args):
+        try:
+            conexao.send((comando, args))
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise self._parada(conexao) from e
+
+    def _resposta(self, conexao):
+        try:
+            while not conexao.poll(self._espera):
+                if not self._processos[self._conexoes.index(conexao)].is_alive():
+                    raise self._parada(conexao)
+            status, resultado = conexao.recv()
+        except (EOFError, ConnectionResetError) as e:
+            raise self._parada(conexao) from e
+        if status == "erro":
+            raise resultado
+        return resultado
+
+    def _pedir(self, conexao, comando, *args):
+        self._enviar(conexao, comando, *args)
+        return self._resposta(conexao)
+
+    def criar_conta(self, nome_titular: str, saldo_inicial: float = 0.0) -> int:
+        numero = ContaBancaria.reservar_numeros(1)[0]
+        return self._pedir(self._conexao(numero), "criar", nome_titular, saldo_inicial, numero)
+
+    def depositar(self, numero: int, valor):
+        self._pedir(self._conexao(numero), "depositar", numero, valor)
+
+    def sacar(self, numero: int, valor):
+        self._pedir(self._conexao(numero), "sacar", numero, valor)
+
+    def saldo(self, numero: int) -> Dinheiro:
+        return self._pedir(self._conexao(numero), "saldo", numero)
+
+    def transferir(self, origem: int, destino: int, valor):
+        conexao_origem = self._conexao(origem)
+        conexao_destino = self._conexao(destino)
+        if conexao_origem is conexao_destino:
+            self._pedir(conexao_origem, "transferir", origem, destino, valor)
+            return
+
+        centavos = para_centavos(valor)
+        if centavos <= 0:
+            raise ValorInvalidoError("Valor da transferência deve ser positivo.")
+
+        # fase 1: as duas partições se preparam em paralelo
+        id_transferencia = next(self._ids_transferencia)
+        erros = []
+        enviadas = []
+        for conexao, comando, numero in ((conexao_origem, "preparar_debito", origem),
+                                         (conexao_destino, "preparar_credito", destino)):
+            try:
+                self._enviar(conexao, comando, id_transferencia, numero, centavos)
+            except BancoError as e:
+                erros.append(e)
+            else:
+                enviadas.append(conexao)
+        # toda partição que recebeu o pedido responde, mesmo que outra já tenha falhado:
+        # uma resposta deixada na conexão seria lida como a do próximo pedido
+        for conexao in enviadas:
+            try:
+                self._resposta(conexao)
+            except Exception as e:
+                erros.append(e)
+
+        # fase 2: confirma primeiro na origem, que guarda o débito; se ela falhar, nada foi
+        # creditado e o destino é desfeito
+        if not erros:
+            try:
+                self._pedir(conexao_origem, "confirmar", id_transferencia)
+            except BancoError as e:
+                erros.append(e)
+            else:
+                try:
+                    self._pedir(conexao_destino, "confirmar", id_transferencia)
+                except BancoError:
+                    # o destino parou sem creditar: o débito já confirmado volta para a origem
+                    self._pedir(conexao_origem, "depositar", origem, Dinheiro.de_centavos(centavos))
+                    raise
+                return
+        # desfaz em todas as partições que receberam o preparo, qualquer que tenha falhado
+        # (abortar é inofensivo onde nada ficou reservado); uma que parou no caminho não
+        # impede as outras de desfazer
+        for conexao in enviadas:
+            try:
+                self._pedir(conexao, "abortar", id_transferencia)
+            except BancoError:
+                pass
+        raise erros[0]
+
+    def executar_lote(self, operacoes):
+        """Executa uma lista de (operacao, numero, valor), com operacao "depositar" ou "sacar".
+
+        As operações são agrupadas por partição e todas as partições
+        trabalham ao mesmo tempo. Retorna a lista de (posicao, erro).
+        """
+        grupos = [[] for _ in self._conexoes]
+        posicoes = [[] for _ in self._conexoes]
+        for posicao, operacao in enumerate(operacoes):
+            if operacao[0] not in ("depositar", "sacar"):
+                raise ValorInvalidoError(f"Operação '{operacao[0]}' não é permitida em lote.")
+            indice = operacao[1] % len(self._conexoes)
+            grupos[indice].append(operacao)
+            posicoes[indice].append(posicao)
+
+        for conexao, grupo in zip(self._conexoes, grupos):
+            self._enviar(conexao, "lote", grupo)
+        erros = []
+        for conexao, posicoes_grupo in zip(self._conexoes, posicoes):
+            for posicao_local, erro in self._resposta(conexao):
+                erros.append((posicoes_grupo[posicao_local], erro))
+        erros.sort(key=lambda item: item[0])
+        return erros
+
+    def encerrar(self):
+        for conexao in self._conexoes:
+            try:
+                conexao.send(("encerrar", ()))
+            except OSError:
+                pass  # a partição já tinha parado
+            conexao.close()
+        for processo in self._processos:
+            processo.join()
+        self._conexoes = []
+        self._processos = []
+
+
+if __name__ == "__main__":
+    # escalabilidade: python banco_particionado.py [operacoes] [max_particoes]
+    import random
+    import sys
+    import time
+
+    operacoes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    max_particoes = int(sys.argv[2]) if len(sys.argv) > 2 else multiprocessing.cpu_count()
+    num_contas = 10_000
+    lote = 50_000
+
+    for particoes in sorted({1, 2, 4, 8, max_particoes}):
+        if particoes > max_particoes:
+            continue
+        with BancoParticionado("Banco de Teste", particoes) as banco:
+            numeros = [banco.criar_conta(f"Cliente {i}", 1_000) for i in range(num_contas)]
+            rng = random.Random(3)
+            carga = [
+                ("depositar" if rng.random() < 0.5 else "sacar", rng.choice(numeros), 1)
+                for _ in range(lote)
+            ]
+
+            inicio = time.perf_counter()
+            for _ in range(operacoes // lote):
+                banco.executar_lote(carga)
+            duracao = time.perf_counter() - inicio
+            feitas = (operacoes // lote) * lote
+            print(f"{particoes:>2} partições: {feitas / duracao:>12,.0f} ops/s")
@@ -0,0 +1,262 @@
+"""Benchmarks do núcleo do banco (banco.py / conta.py).
+
+    python benchmark.py                          # roda e grava benchmark.json
+    python benchmark.py --base base.json         # compara com uma base gravada antes
+    python benchmark.py --gravar-base base.json  # roda e grava o resultado como base
+
+Cada caso é medido em várias escalas (quantidade de contas ou de
+lançamentos); o resultado de cada caso/escala é o melhor de algumas
+repetições, em ns por operação. Na comparação, um caso que ficou mais
+lento que a base além de --limite por cento é marcado como regressão, e
+o processo termina com código 1.
+
+Desktop/banco/benchmark.py tem os mesmos casos para o Bank.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from banco import Banco
+from conta import ContaBancaria
+from errors import SaldoInsuficienteError
+from exportacao import exportar_contas
+from historico import Historico
+
+ESCALAS = (1_000, 10_000, 100_000)
+OPERACOES = 20_000  # operações por medida nos casos que não dependem da escala
+
+CASOS = {}
+
+
+def caso(funcao):
+    """Registra um caso: funcao(escala) prepara os dados e retorna (operacoes, rodar)."""
+    CASOS[funcao.__name__] = funcao
+    return funcao
+
+
+def _banco(escala: int):
+    ContaBancaria._proximo_numero = 1
+    banco = Banco("Banco")
+    contas, _ = banco.criar_contas_em_lote((f"Cliente {i}", 1_000) for i in range(escala))
+    return banco, contas
+
+
+@caso
+def abertura_em_lote(escala):
+    def rodar():
+        _banco(escala)
+    return escala, rodar
+
+
+@caso
+def abertura(escala):
+    def rodar():
+        ContaBancaria._proximo_numero = 1
+        banco = Banco("Banco")
+        for i in range(escala):
+            banco.criar_conta(f"Cliente {i}", 1_000)
+    return escala, rodar
+
+
+@caso
+def busca(escala):
+    banco, _ = _banco(escala)
+    rng = random.Random(1)
+    numeros = [rng.randint(1, escala) for _ in range(OPERACOES)]
+    buscar = banco.buscar_conta_por_numero
+
+    def rodar():
+        for numero in numeros:
+            buscar(numero)
+    return OPERACOES, rodar
+
+
+@caso
+def deposito_e_saque(escala):
+    _, contas = _banco(escala)
+    rng = random.Random(2)
+    sorteadas = [rng.choice(contas) for _ in range(OPERACOES // 2)]
+
+    def rodar():
+        for conta in sorteadas:
+            conta.depositar(10)
+            conta.sacar(10)
+    return OPERACOES, rodar
+
+
+@caso
+def deposito_e_saque_indexado(escala):
+    # o mesmo de deposito_e_saque, com o índice de saldos ligado
+    banco, contas = _banco(escala)
+    banco.indexar_saldos()
+    rng = random.Random(2)
+    sorteadas = [rng.choice(contas) for _ in range(OPERACOES // 2)]
+
+    def rodar():
+        for conta in sorteadas:
+            conta.depositar(10)
+            conta.sacar(10)
+    return OPERACOES, rodar
+
+
+@caso
+def maiores_saldos(escala):
+    banco, _ = _banco(escala)
+    banco.indexar_saldos()
+
+    def rodar():
+        for _ in range(1_000):
+            banco.maiores_saldos(100)
+    return 1_000, rodar
+
+
+@caso
+def transferencia(escala):
+    _, contas = _banco(escala)
+    rng = random.Random(3)
+    pares = [tuple(rng.sample(contas, 2)) for _ in range(OPERACOES)]
+
+    def rodar():
+        for origem, destino in pares:
+            try:
+                origem.transferir(destino, 1)
+            except SaldoInsuficienteError:
+                pass
+    return OPERACOES, rodar
+
+
+@caso
+def transferencia_em_lote(escala):
+    # as mesmas pernas de transferencia, num lote só
+    banco, contas = _banco(escala)
+    rng = random.Random(3)
+    pernas = [(origem.numero, destino.numero, 1) for origem, destino in
+              (rng.sample(contas, 2) for _ in range(OPERACOES))]
+
+    def rodar():
+        banco.transferir_em_lote(pernas)
+    return OPERACOES, rodar
+
+
+@caso
+def extrato(escala):
+    # a escala aqui é o tamanho do histórico; cada consulta pega uma hora no meio dele
+    historico = Historico()
+    comeco = datetime(2026, 1, 1)
+    for i in range(escala):
+        historico.registrar("deposito", 100, data=comeco + timedelta(minutes=i))
+    rng = random.Random(4)
+    janelas = []
+    for _ in range(1_000):
+        inicio = comeco + timedelta(minutes=rng.randrange(escala))
+        janelas.append((inicio, inicio + timedelta(hours=1)))
+
+    def rodar():
+        for inicio, fim in janelas:
+            for _ in historico.extrato(inicio, fim):
+                pass
+    return len(janelas), rodar
+
+
+@caso
+def exportacao_csv(escala):
+    banco, _ = _banco(escala)
+
+    def rodar():
+        exportar_contas(banco, os.devnull, "csv")
+    return escala, rodar
+
+
+def medir(casos, escalas, repeticoes: int) -> dict:
+    resultados = {}
+    for nome in casos:
+        for escala in escalas:
+            operacoes, rodar = CASOS[nome](escala)
+            tempos = []
+            for _ in range(repeticoes):
+                # o coletor de lixo não roda no meio de uma medida
+                gc.collect()
+                gc.disable()
+                try:
+                    inicio = time.perf_counter()
+                    rodar()
+                    tempos.append(time.perf_counter() - inicio)
+                finally:
+                    gc.enable()
+            melhor = min(tempos)
+            resultados[f"{nome}/{escala}"] = {
+                "ns_por_op": melhor / operacoes * 1e9,
+                "ns_por_op_mediana": statistics.median(tempos) / operacoes * 1e9,
+                "ops_por_segundo": operacoes / melhor,
+            }
+            print(f"{nome}/{escala}: {melhor / operacoes * 1e9:,.0f} ns/op ({operacoes / melhor:,.0f}/s)")
+    return resultados
+
+
+def comparar(resultados: dict, base: dict, limite: float) -> list:
+    """Imprime a comparação com a base e retorna os casos que pioraram além de limite por cento."""
+    regressoes = []
+    for chave, atual in resultados.items():
+        anterior = base.get(chave)
+        if anterior is None:
+            print(f"  {chave}: sem base")
+            continue
+        variacao = (atual["ns_por_op"] / anterior["ns_por_op"] - 1) * 100
+        marca = ""
+        if variacao > limite:
+            regressoes.append(chave)
+            marca = "  <-- REGRESSÃO"
+        print(f"  {chave}: {anterior['ns_por_op']:,.0f} -> {atual['ns_por_op']:,.0f} ns/op ({variacao:+.1f}%){marca}")
+    return regressoes
+
+
+def principal(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do núcleo do banco.")
+    parser.add_argument("--escalas", default=",".join(map(str, ESCALAS)),
+                        help="escalas separadas por vírgula (padrão: %(default)s)")
+    parser.add_argument("--casos", default=",".join(CASOS), help="casos separados por vírgula")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", default="benchmark.json", help="onde gravar os resultados em JSON")
+    parser.add_argument("--base", help="resultados anteriores (JSON) para comparar")
+    parser.add_argument("--gravar-base", help="grava os resultados também neste arquivo, como nova base")
+    parser.add_argument("--limite", type=float, default=10.0, help="piora máxima aceita, em %% (padrão: 10)")
+    args = parser.parse_args(argv)
+
+    casos = [nome for nome in args.casos.split(",") if nome]
+    desconhecidos = [nome for nome in casos if nome not in CASOS]
+    if desconhecidos:
+        parser.error(f"casos desconhecidos: {', '.join(desconhecidos)} (disponíveis: {', '.join(CASOS)})")
+    escalas = [int(escala) for escala in args.escalas.split(",") if escala]
+
+    resultados = medir(casos, escalas, args.repeticoes)
+    documento = {
+        "suite": "banco",
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }
+    for caminho in filter(None, (args.saida, args.gravar_base)):
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(documento, arquivo, indent=2, ensure_ascii=False)
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        print(f"\ncomparação com {args.base} ({base.get('data')}), limite {args.limite:g}%:")
+        regressoes = comparar(resultados, base["resultados"], args.limite)
+        if regressoes:
+            print(f"\n{len(regressoes)} regressão(ões): {', '.join(regressoes)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(principal())
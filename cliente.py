@@ -1,7 +1,11 @@
 from errors import ClienteError
 class Cliente:
+    __slots__ = ('_nome', '_registro')
+
     def __init__(self, nome: str):
         self._nome = None
+        # RegistroClientes que indexa este cliente pelo nome (ver clientes.py)
+        self._registro = None
         self.nome = nome  
 
     @property
@@ -12,7 +16,11 @@ class Cliente:
     def nome(self, novo_nome: str):
         if not isinstance(novo_nome, str) or novo_nome.strip() == "":
             raise ClienteError("Nome do cliente não pode ser vazio.")
-        self._nome = novo_nome.strip()
+        if self._registro is not None:
+            # o registro confere se o nome está livre e indexa o cliente de novo
+            self._registro._renomear(self, novo_nome.strip())
+        else:
+            self._nome = novo_nome.strip()
 
     def __str__(self):
         return self.nome
@@ -0,0 +1,288 @@
+import threading
+import unicodedata
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from cliente import Cliente
+from errors import ClienteError
+
+_TAMANHO_BUFFER = 256  # clientes novos que ficam fora de ordem antes de virar um trecho ordenado
+_TRECHOS_POR_FUSAO = 4
+_REMOVIDO = object()  # em _renomeados: o cliente saiu do registro e nenhuma entrada dele vale mais
+
+
+def normalizar(nome: str) -> str:
+    """Chave de busca de um nome: sem acentos e sem diferença entre maiúsculas e minúsculas."""
+    if nome.isascii():
+        return nome.casefold()
+    decomposto = unicodedata.normalize("NFKD", nome)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def _ordenar(chaves: list, clientes: list):
+    ordem = sorted(range(len(chaves)), key=chaves.__getitem__)
+    return [chaves[i] for i in ordem], [clientes[i] for i in ordem]
+
+
+class RegistroClientes:
+    """Os clientes do banco, um objeto por nome, com as contas de cada um.
+
+    obter(nome) devolve sempre o mesmo Cliente para o mesmo nome, e
+    contas_de(cliente) os números das contas dele. buscar(prefixo) acha
+    os clientes cujo nome começa com prefixo, sem diferença de
+    maiúsculas nem de acentos ("jose" acha "José").
+
+    O índice de busca é um conjunto de trechos ordenados pela chave
+    normalizada, procurados com bisect: os clientes novos entram num
+    buffer pequeno, que vira um trecho ordenado quando enche, e a cada
+    quatro trechos de tamanho parecido eles são fundidos num só (como
+    numa LSM-tree). Assim há O(log n) trechos, a busca faz um bisect em
+    cada um e cada cliente é reordenado O(log n) vezes no total. Dentro
+    de em_lote() o buffer não é descarregado, e o lote inteiro é
+    ordenado de uma vez no fim.
+
+    O nome é a identidade do cliente: Cliente.nome só pode mudar para um
+    nome que nenhum outro cliente usa (para passar uma conta a outro
+    titular, ver Banco.renomear_titular e desvincular). Quando o nome
+    muda, o cliente é indexado de novo pelo nome novo. A entrada antiga
+    continua no trecho, mas a busca a ignora (a chave não bate mais com a
+    atual, guardada em _renomeados); quando as entradas velhas passam da
+    metade, o índice é refeito. Um cliente que fica sem contas sai do
+    registro.
+
+    As contas de um cliente renomeado que ainda não foram carregadas do
+    snapshot ou do repositório guardam lá o nome antigo; titular_de(numero)
+    diz a quem elas pertencem agora.
+    """
+
+    def __init__(self):
+        self._por_nome = {}  # nome -> Cliente
+        # Cliente -> número da conta, lista de números se for mais de uma, ou None
+        # (um int no caso comum custa menos memória e não é seguido pelo coletor de lixo)
+        self._contas = {}
+        self._trechos = []  # (chaves, clientes), ordenados pela chave; do maior trecho para o menor
+        self._buffer_chaves = []
+        self._buffer_clientes = []
+        self._renomeados = {}  # Cliente -> chave atual, só dos que mudaram de nome
+        self._titulares = {}  # número -> Cliente, só das contas de clientes renomeados
+        self._entradas = 0
+        self._obsoletas = 0
+        self._lotes = 0
+        self._trava = threading.Lock()
+        # chamado com (numero, nome) para cada conta de um cliente renomeado; o Banco usa para
+        # gravar o nome novo no diário e no repositório
+        self.ao_renomear = None
+
+    def __len__(self) -> int:
+        return len(self._contas)
+
+    def obter(self, nome: str) -> Cliente:
+        """O cliente com este nome; é criado e indexado na primeira vez."""
+        cliente = self._por_nome.get(nome)
+        if cliente is not None:
+            return cliente
+        novo = Cliente(nome)  # valida e tira os espaços das pontas
+        with self._trava:
+            cliente = self._por_nome.setdefault(novo.nome, novo)
+            if cliente is novo:
+                novo._registro = self
+                self._contas[novo] = None
+                self._indexar(novo)
+        return cliente
+
+    def pelo_nome(self, nome: str):
+        """O cliente com exatamente este nome, ou None."""
+        return self._por_nome.get(nome.strip())
+
+    def vincular(self, cliente: Cliente, numero: int):
+        contas = self._contas[cliente]
+        if contas is None:
+            self._contas[cliente] = numero
+        elif type(contas) is int:
+            self._contas[cliente] = [contas, numero]
+        else:
+            contas.append(numero)
+
+    def desvincular(self, cliente: Cliente, numero: int):
+        """Tira a conta do cliente; se era a última, o cliente sai do registro."""
+        with self._trava:
+            contas = self._contas.get(cliente)
+            if type(contas) is list and numero in contas:
+                contas.remove(numero)
+                if len(contas) == 1:
+                    self._contas[cliente] = contas[0]
+                return
+            if contas != numero:
+                raise ClienteError(f"A conta {numero} não é de {cliente.nome}.")
+            del self._contas[cliente]
+            if self._por_nome.get(cliente.nome) is cliente:
+                del self._por_nome[cliente.nome]
+            self._titulares.pop(numero, None)
+            cliente._registro = None
+            self._renomeados[cliente] = _REMOVIDO
+            self._obsoletas += 1
+            if self._obsoletas * 2 > self._entradas:
+                self._refazer()
+
+    def titular_de(self, numero: int):
+        """O cliente da conta, se o nome guardado com ela pode estar desatualizado; senão None."""
+        return self._titulares.get(numero)
+
+    def contas_de(self, cliente: Cliente) -> list:
+        """Números das contas do cliente, na ordem em que foram vinculadas."""
+        contas = self._contas.get(cliente)
+        if contas is None:
+            return []
+        return [contas] if type(contas) is int else list(contas)
+
+    @contextmanager
+    def em_lote(self):
+        """Adia a ordenação dos clientes novos até o fim do bloco."""
+        self._lotes += 1
+        try:
+            yield self
+        finally:
+            with self._trava:
+                self._lotes -= 1
+                if not self._lotes and self._buffer_chaves:
+                    self._descarregar()
+
+    def buscar(self, prefixo: str, limite: int = 20) -> list:
+        """Até limite clientes cujo nome começa com prefixo, em ordem alfabética."""
+        chave = normalizar(prefixo.strip())
+        achados = []
+        # trechos e buffer são trocados por listas novas, nunca reordenados no lugar,
+        # então a busca não precisa da trava
+        for chaves, clientes in self._trechos:
+            achados.extend(self._no_trecho(chaves, clientes, chave, limite))
+        chaves, clientes = self._buffer_chaves, self._buffer_clientes
+        for indice in range(len(chaves)):
+            if chaves[indice].startswith(chave) and self._valida(chaves[indice], clientes[indice]):
+                achados.append((chaves[indice], clientes[indice]))
+        achados.sort(key=lambda achado: achado[0])
+        resultado = []
+        vistos = set()
+        for _, cliente in achados:
+            if cliente not in vistos:
+                vistos.add(cliente)
+                resultado.append(cliente)
+                if len(resultado) == limite:
+                    break
+        return resultado
+
+    def _valida(self, chave: str, cliente: Cliente) -> bool:
+        atual = self._renomeados.get(cliente)
+        return atual is None or atual == chave
+
+    def _no_trecho(self, chaves: list, clientes: list, chave: str, limite: int):
+        indice = bisect_left(chaves, chave)
+        achados = 0
+        while indice < len(chaves) and achados < limite and chaves[indice].startswith(chave):
+            if self._valida(chaves[indice], clientes[indice]):
+                achados += 1
+                yield chaves[indice], clientes[indice]
+            indice += 1
+
+    def _renomear(self, cliente: Cliente, nome: str):
+        """Chamado pelo setter de Cliente.nome, com o nome já validado."""
+        with self._trava:
+            dono = self._por_nome.get(nome)
+            if dono is not None and dono is not cliente:
+                raise ClienteError(f"Já existe um cliente chamado {nome!r}. "
+                                   f"Para passar uma conta a ele, use Banco.renomear_titular.")
+            antigo = cliente._nome
+            cliente._nome = nome
+            if self._por_nome.get(antigo) is cliente:
+                del self._por_nome[antigo]
+            self._por_nome[nome] = cliente
+            for numero in self.contas_de(cliente):
+                self._titulares[numero] = cliente
+            chave = normalizar(nome)
+            if chave != self._renomeados.get(cliente, normalizar(antigo)):
+                self._renomeados[cliente] = chave
+                self._obsoletas += 1
+                self._indexar(cliente)
+            numeros = self.contas_de(cliente)
+        if self.ao_renomear is not None and nome != antigo:
+            for numero in numeros:
+                self.ao_renomear(numero, nome)
+
+    def _indexar(self, cliente: Cliente):
+        # chamado com a trava adquirida
+        self._buffer_chaves.append(normalizar(cliente.nome))
+        self._buffer_clientes.append(cliente)
+        self._entradas += 1
+        if self._obsoletas * 2 > self._entradas:
+            self._refazer()
+        elif len(self._buffer_chaves) >= _TAMANHO_BUFFER and not self._lotes:
+            self._descarregar()
+
+    def _descarregar(self):
+        trechos = list(self._trechos)
+        trechos.append(_ordenar(self._buffer_chaves, self._buffer_clientes))
+        # funde os últimos trechos enquanto eles tiverem tamanho parecido: fica O(log n) trechos
+        n = _TRECHOS_POR_FUSAO
+        while len(trechos) >= n and len(trechos[-n][0]) < n * len(trechos[-1][0]):
+            chaves = []
+            clientes = []
+            for trecho in trechos[-n:]:
+                chaves += trecho[0]
+                clientes += trecho[1]
+            # o sort do Python acha as sequências já ordenadas e só as intercala
+            trechos[-n:] = [_ordenar(chaves, clientes)]
+        self._trechos = trechos
+        self._buffer_chaves = []
+        self._buffer_clientes = []
+
+    def _refazer(self):
+        clientes = list(self._contas)
+        self._trechos = [_ordenar([normalizar(cliente.nome) for cliente in clientes], clientes)]
+        self._buffer_chaves = []
+        self._buffer_clientes = []
+        self._renomeados = {}
+        self._entradas = len(self._contas)
+        self._obsoletas = 0
+
+
+if __name__ == "__main__":
+    # busca com muitos clientes: python clientes.py [clientes]
+    import random
+    import sys
+    import time
+
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    primeiros = ["José", "João", "Maria", "Ana", "Antônio", "Francisco", "Luís", "Márcia", "Cecília", "Inês",
+                 "Pedro", "Paulo", "Lúcia", "Sérgio", "Júlia", "André", "Fábio", "Mônica", "Caio", "Vitória"]
+    sobrenomes = ["Silva", "Santos", "Oliveira", "Souza", "Conceição", "Araújo", "Gonçalves", "Simões",
+                  "Magalhães", "Brandão", "Lima", "Pereira", "Gomes", "Falcão", "Damião", "Assunção"]
+    rng = random.Random(5)
+    sorteados = set(rng.sample(range(quantidade), 1_000))
+    nomes = []
+    registro = RegistroClientes()
+    inicio = time.perf_counter()
+    for i in range(quantidade):
+        nome = f"{rng.choice(primeiros)} {rng.choice(sobrenomes)} {i:07d}"
+        registro.obter(nome)
+        if i in sorteados:
+            nomes.append(nome)
+    duracao = time.perf_counter() - inicio
+    print(f"{quantidade} clientes: {duracao:.1f} s ({quantidade / duracao:,.0f}/s), {len(registro._trechos)} trechos")
+
+    def medir(rotulo, consultas, funcao):
+        tempos = []
+        for consulta in consultas:
+            antes = time.perf_counter()
+            funcao(consulta)
+            tempos.append(time.perf_counter() - antes)
+        tempos.sort()
+        print(f"  {rotulo}: mediana {tempos[len(tempos) // 2] * 1e6:.0f} µs, "
+              f"p99 {tempos[len(tempos) * 99 // 100] * 1e6:.0f} µs, máximo {tempos[-1] * 1e6:.0f} µs")
+
+    medir("obter (já existe)", nomes, registro.obter)
+    prefixos = [f"{normalizar(rng.choice(primeiros))} {rng.choice(sobrenomes).upper()[:3]}" for _ in range(1_000)]
+    medir("buscar prefixo, 20 resultados", prefixos, registro.buscar)
+    medir("buscar nome inteiro", [normalizar(nome) for nome in nomes], lambda nome: registro.buscar(nome, 1))
+    clientes = [registro.obter(nome) for nome in nomes[:100]]
+    medir("renomear", range(100), lambda i: setattr(clientes[i], "nome", f"{clientes[i].nome} Filho"))
+    assert registro.buscar(clientes[0].nome, 1) == [clientes[0]]
+    medir("buscar prefixo, depois de renomear", prefixos, registro.buscar)
@@ -0,0 +1,4 @@
+# Os testes importam os módulos da raiz pelo nome (from banco import Banco), como o resto do código.
+# Desktop/banco tem módulos com os mesmos nomes (errors, dinheiro, historico...), então os testes
+# de lá rodam à parte: cd Desktop/banco && python -m pytest
+collect_ignore = ["Desktop"]
@@ -1,20 +1,81 @@
 
+import threading
+import time
+
 from cliente import Cliente
 from errors import ContaError, ValorInvalidoError, SaldoInsuficienteError
+from dinheiro import Dinheiro, para_centavos
+from historico import Historico
+from limites import SAQUE, TRANSFERENCIA
+
+
+class ContextoContas:
+    """O que o banco liga às suas contas, num objeto só compartilhado por todas.
+
+    Cada conta guarda só uma referência ao contexto do seu banco; o Banco
+    troca o diário, os limites etc. aqui e todas as contas já veem a
+    mudança. Um campo None desliga o recurso.
+    """
+
+    __slots__ = ('diario', 'limites', 'eventos', 'repositorio', 'indice_saldos', 'idempotencia')
+
+    def __init__(self):
+        # Diario onde as operações são registradas
+        self.diario = None
+        # MotorLimites aplicado a saques e transferências
+        self.limites = None
+        # BarramentoEventos que recebe as operações feitas
+        self.eventos = None
+        # repositório durável (ver repositorio.py) que grava os saldos
+        self.repositorio = None
+        # IndiceSaldos (ver indice_saldos.py) que mantém as contas ordenadas por saldo
+        self.indice_saldos = None
+        # RegistroIdempotencia (ver idempotencia.py) com as chaves das operações já feitas
+        self.idempotencia = None
+
+
+# contexto das contas criadas fora de um banco: nenhum recurso ligado
+_SEM_CONTEXTO = ContextoContas()
 
 
 class ContaBancaria:
+    __slots__ = ('_cliente', '_saldo', '_numero', '_trava', '_contexto', '_historico', '_abertura', '_aberta_em')
+
     _proximo_numero = 1  
 
-    def __init__(self, cliente: Cliente, saldo_inicial: float = 0.0):
+    def __init__(self, cliente: Cliente, saldo_inicial: float = 0.0, numero: int = None):
         if not isinstance(cliente, Cliente):
             raise ContaError("Titular deve ser um objeto Cliente.")
         self._cliente = cliente
-        self._saldo = 0.0
+        self._saldo = 0  # em centavos
+        # depósito de abertura (centavos e microssegundos); só vira lançamento quando o histórico é criado
+        self._abertura = 0
+        self._aberta_em = 0
+        self._trava = threading.Lock()
+        # ContextoContas do banco (diário, limites, eventos...); o Banco define ao cadastrar a conta
+        self._contexto = _SEM_CONTEXTO
+        # criado no primeiro lançamento, para não pesar em contas paradas
+        self._historico = None
         if saldo_inicial > 0:
-            self.depositar(saldo_inicial)
-        self._numero = ContaBancaria._proximo_numero
-        ContaBancaria._proximo_numero += 1
+            centavos = para_centavos(saldo_inicial)
+            if centavos <= 0:
+                raise ValorInvalidoError("Valor do depósito deve ser positivo.")
+            self._saldo = self._abertura = centavos
+            self._aberta_em = time.time_ns() // 1000
+        if numero is None:
+            numero = ContaBancaria._proximo_numero
+            ContaBancaria._proximo_numero += 1
+        elif numero >= ContaBancaria._proximo_numero:
+            # um número escolhido à mão não pode ser dado de novo a uma conta automática
+            ContaBancaria._proximo_numero = numero + 1
+        self._numero = numero
+
+    @classmethod
+    def reservar_numeros(cls, quantidade: int) -> range:
+        """Reserva um bloco contíguo de números de conta e o retorna."""
+        inicio = cls._proximo_numero
+        cls._proximo_numero += quantidade
+        return range(inicio, inicio + quantidade)
 
     
 
@@ -24,35 +85,149 @@ class ContaBancaria:
         return self._cliente
 
     @property
-    def saldo(self) -> float:
+    def saldo(self) -> Dinheiro:
         """Saldo atual (somente leitura)."""
-        return self._saldo
+        return Dinheiro.de_centavos(self._saldo)
 
     @property
     def numero(self) -> int:
         """Número da conta (somente leitura)."""
         return self._numero
 
+    @property
+    def historico(self) -> Historico:
+        """Lançamentos da conta em ordem de tempo."""
+        if self._historico is None:
+            if self._abertura:
+                self._historico = Historico.com_abertura(self._abertura, self._aberta_em)
+            else:
+                self._historico = Historico()
+        return self._historico
+
+    def extrato(self, inicio=None, fim=None):
+        """Lançamentos entre as datas inicio e fim (inclusive)."""
+        if self._historico is None:
+            # conta parada: o depósito de abertura é lido sem guardar um histórico
+            if not self._abertura:
+                return iter(())
+            return Historico.com_abertura(self._abertura, self._aberta_em).extrato(inicio, fim)
+        return self._historico.extrato(inicio, fim)
+
+    def _chaves(self):
+        idempotencia = self._contexto.idempotencia
+        if idempotencia is None:
+            raise ContaError("Operações com chave exigem um registro de idempotência "
+                             "(ver Banco.definir_idempotencia).")
+        return idempotencia
+
     
-    def depositar(self, valor: float):
-        if valor <= 0:
+    def depositar(self, valor: float, chave=None):
+        # chave (opcional, também em sacar e transferir): identifica a operação; repetir a
+        # operação com a mesma chave (um reenvio depois de timeout, por exemplo) não faz nada
+        centavos = para_centavos(valor)
+        if centavos <= 0:
             raise ValorInvalidoError("Valor do depósito deve ser positivo.")
-        self._saldo += valor
+        with self._trava:
+            if chave is not None and not self._chaves().registrar(chave):
+                return
+            contexto = self._contexto
+            self._saldo += centavos
+            if contexto.indice_saldos is not None:
+                contexto.indice_saldos.mover(self._numero, self._saldo - centavos, self._saldo)
+            # a property historico só é usada para criar o histórico; aqui é o caminho quente
+            historico = self._historico if self._historico is not None else self.historico
+            historico.registrar("deposito", centavos)
+            if contexto.diario is not None:
+                contexto.diario.registrar_deposito(self._numero, centavos)
+            if contexto.repositorio is not None:
+                contexto.repositorio.registrar_deposito(self._numero, centavos)
+            if contexto.eventos is not None:
+                contexto.eventos.publicar(("deposito", self._numero, centavos, None))
 
-    def sacar(self, valor: float):
-        if valor <= 0:
+    def sacar(self, valor: float, chave=None):
+        centavos = para_centavos(valor)
+        if centavos <= 0:
             raise ValorInvalidoError("Valor do saque deve ser positivo.")
-        if valor > self._saldo:
-            raise SaldoInsuficienteError("Saldo insuficiente para o saque.")
-        self._saldo -= valor
-
-    def transferir(self, outra_conta: "ContaBancaria", valor: float):
-        from errors import ContaError  
+        with self._trava:
+            # um reenvio não pode falhar por falta do saldo que o original já sacou; a chave é
+            # registrada depois do saldo e antes dos limites (um reenvio concorrente não os
+            # consome) e liberada se os limites recusarem a operação
+            if chave is not None and chave in self._chaves():
+                return
+            if centavos > self._saldo:
+                raise SaldoInsuficienteError("Saldo insuficiente para o saque.")
+            contexto = self._contexto
+            if chave is not None and not contexto.idempotencia.registrar(chave):
+                return
+            if contexto.limites is not None:
+                try:
+                    contexto.limites.consumir(self._numero, SAQUE, centavos)
+                except Exception:
+                    if chave is not None:
+                        contexto.idempotencia.liberar(chave)
+                    raise
+            self._saldo -= centavos
+            if contexto.indice_saldos is not None:
+                contexto.indice_saldos.mover(self._numero, self._saldo + centavos, self._saldo)
+            historico = self._historico if self._historico is not None else self.historico
+            historico.registrar("saque", centavos)
+            if contexto.diario is not None:
+                contexto.diario.registrar_saque(self._numero, centavos)
+            if contexto.repositorio is not None:
+                contexto.repositorio.registrar_saque(self._numero, centavos)
+            if contexto.eventos is not None:
+                contexto.eventos.publicar(("saque", self._numero, centavos, None))
 
+    def transferir(self, outra_conta: "ContaBancaria", valor: float, chave=None):
         if not isinstance(outra_conta, ContaBancaria):
             raise ContaError("A conta de destino deve ser uma ContaBancaria.")
-        self.sacar(valor)         
-        outra_conta.depositar(valor)
+        centavos = para_centavos(valor)
+        if centavos <= 0:
+            raise ValorInvalidoError("Valor da transferência deve ser positivo.")
+
+        # a mesma conta pode chegar por dois objetos (duas visões de um ContaStore, por exemplo):
+        # o que a identifica é a trava, que não pode ser adquirida duas vezes
+        trava = self._trava
+        if outra_conta._trava is trava:
+            with trava:
+                if centavos > self._saldo:
+                    raise SaldoInsuficienteError("Saldo insuficiente para a transferência.")
+            return
+
+        # as travas são sempre adquiridas em ordem de número de conta,
+        # então duas transferências cruzadas não entram em deadlock
+        primeira, segunda = (self, outra_conta) if self._numero < outra_conta._numero else (outra_conta, self)
+        with primeira._trava, segunda._trava:
+            if chave is not None and chave in self._chaves():
+                return
+            if centavos > self._saldo:
+                raise SaldoInsuficienteError("Saldo insuficiente para a transferência.")
+            contexto = self._contexto
+            if chave is not None and not contexto.idempotencia.registrar(chave):
+                return
+            if contexto.limites is not None:
+                try:
+                    contexto.limites.consumir(self._numero, TRANSFERENCIA, centavos)
+                except Exception:
+                    if chave is not None:
+                        contexto.idempotencia.liberar(chave)
+                    raise
+            self._saldo -= centavos
+            outra_conta._saldo += centavos
+            indice = contexto.indice_saldos
+            if indice is not None:
+                indice.mover(self._numero, self._saldo + centavos, self._saldo)
+                indice.mover(outra_conta._numero, outra_conta._saldo - centavos, outra_conta._saldo)
+            historico = self._historico if self._historico is not None else self.historico
+            historico.registrar("transferencia_enviada", centavos, outra_conta._numero)
+            historico = outra_conta._historico if outra_conta._historico is not None else outra_conta.historico
+            historico.registrar("transferencia_recebida", centavos, self._numero)
+            if contexto.diario is not None:
+                contexto.diario.registrar_transferencia(self._numero, outra_conta._numero, centavos)
+            if contexto.repositorio is not None:
+                contexto.repositorio.registrar_transferencia(self._numero, outra_conta._numero, centavos)
+            if contexto.eventos is not None:
+                contexto.eventos.publicar(("transferencia", self._numero, centavos, outra_conta._numero))
 
     def resumo(self) -> str:
         return (
@@ -62,3 +237,37 @@ class ContaBancaria:
 
     def exibir_resumo(self):
         print(self.resumo())
+
+
+if __name__ == "__main__":
+    # teste de estresse: python conta.py [threads] [transferencias_por_thread]
+    import random
+    import sys
+    import time
+
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    por_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    contas = [ContaBancaria(Cliente(f"Cliente {i}"), 1000) for i in range(100)]
+    total_inicial = sum(conta._saldo for conta in contas)
+
+    def trabalhar(semente):
+        rng = random.Random(semente)
+        for _ in range(por_thread):
+            origem, destino = rng.sample(contas, 2)
+            try:
+                origem.transferir(destino, rng.randint(1, 500))
+            except SaldoInsuficienteError:
+                pass
+
+    trabalhadores = [threading.Thread(target=trabalhar, args=(i,)) for i in range(threads)]
+    inicio = time.perf_counter()
+    for t in trabalhadores:
+        t.start()
+    for t in trabalhadores:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    total_final = sum(conta._saldo for conta in contas)
+    assert total_final == total_inicial, "Saldo global não foi conservado"
+    print(f"{threads} threads, {threads * por_thread} transferências em {duracao:.2f}s "
+          f"({threads * por_thread / duracao:,.0f}/s); saldo global conservado")
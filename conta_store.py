@@ -0,0 +1,165 @@
+import time
+from array import array
+from bisect import bisect_left
+from threading import Lock
+
+from cliente import Cliente
+from conta import ContaBancaria, ContextoContas
+from dinheiro import para_centavos
+from errors import ContaError, ContaNaoEncontradaError, ValorInvalidoError
+
+
+class ContaStore:
+    """Armazena contas em colunas (números, saldos e titulares).
+
+    Em vez de um objeto por conta, cada campo fica em um array compacto.
+    As contas são acessadas por meio de ContaArmazenada, uma visão leve
+    que se comporta como uma ContaBancaria normal.
+    """
+
+    def __init__(self):
+        self._numeros = array("q")
+        self._saldos = array("q")  # centavos
+        # depósito de abertura de cada conta (centavos e microssegundos), lido ao criar o histórico
+        self._aberturas = array("q")
+        self._abertas_em = array("q")
+        self._titulares = []
+        # travas criadas sob demanda, só para contas que já foram usadas
+        self._travas = {}
+        self._historicos = {}
+        # diário, limites etc. de todas as contas do store (o índice de saldos não é mantido)
+        self._contexto = ContextoContas()
+
+    def __len__(self) -> int:
+        return len(self._numeros)
+
+    def adicionar(self, titular: Cliente, saldo_inicial: float = 0.0, numero: int = None) -> "ContaArmazenada":
+        if not isinstance(titular, Cliente):
+            raise ContaError("Titular deve ser um objeto Cliente.")
+        if numero is None:
+            numero = ContaBancaria.reservar_numeros(1)[0]
+        # a busca por número usa bisect, então os números precisam ser crescentes
+        if self._numeros and numero <= self._numeros[-1]:
+            raise ContaError("Números de conta devem ser adicionados em ordem crescente.")
+
+        # como em ContaBancaria, o saldo inicial não passa por depositar: a trava e o
+        # histórico da conta só são criados quando ela for usada
+        centavos = aberta_em = 0
+        if saldo_inicial > 0:
+            centavos = para_centavos(saldo_inicial)
+            if centavos <= 0:
+                raise ValorInvalidoError("Valor do depósito deve ser positivo.")
+            aberta_em = time.time_ns() // 1000
+
+        indice = len(self._numeros)
+        self._numeros.append(numero)
+        self._saldos.append(centavos)
+        self._aberturas.append(centavos)
+        self._abertas_em.append(aberta_em)
+        self._titulares.append(titular)
+        return ContaArmazenada(self, indice)
+
+    def conta(self, indice: int) -> "ContaArmazenada":
+        if not 0 <= indice < len(self._numeros):
+            raise ContaNaoEncontradaError(f"Índice {indice} fora do armazenamento.")
+        return ContaArmazenada(self, indice)
+
+    def buscar_conta_por_numero(self, numero: int) -> "ContaArmazenada":
+        indice = bisect_left(self._numeros, numero)
+        if indice == len(self._numeros) or self._numeros[indice] != numero:
+            raise ContaNaoEncontradaError(f"Conta número {numero} não existe.")
+        return ContaArmazenada(self, indice)
+
+    def __iter__(self):
+        for indice in range(len(self._numeros)):
+            yield ContaArmazenada(self, indice)
+
+
+class ContaArmazenada(ContaBancaria):
+    """Visão de uma conta guardada em um ContaStore.
+
+    Os atributos internos de ContaBancaria são redirecionados para as
+    colunas do store, então depositar, sacar, transferir e resumo
+    funcionam sem alteração.
+    """
+
+    __slots__ = ("_store", "_indice")
+
+    def __init__(self, store: ContaStore, indice: int):
+        self._store = store
+        self._indice = indice
+
+    @property
+    def _cliente(self):
+        return self._store._titulares[self._indice]
+
+    @property
+    def _numero(self):
+        return self._store._numeros[self._indice]
+
+    @property
+    def _trava(self):
+        travas = self._store._travas
+        return travas.get(self._indice) or travas.setdefault(self._indice, Lock())
+
+    @property
+    def _contexto(self):
+        return self._store._contexto
+
+    @property
+    def _historico(self):
+        return self._store._historicos.get(self._indice)
+
+    @_historico.setter
+    def _historico(self, historico):
+        self._store._historicos[self._indice] = historico
+
+    @property
+    def _abertura(self):
+        return self._store._aberturas[self._indice]
+
+    @property
+    def _aberta_em(self):
+        return self._store._abertas_em[self._indice]
+
+    @property
+    def _saldo(self):
+        return self._store._saldos[self._indice]
+
+    @_saldo.setter
+    def _saldo(self, valor):
+        self._store._saldos[self._indice] = valor
+
+    def __eq__(self, outra):
+        if isinstance(outra, ContaArmazenada):
+            return self._store is outra._store and self._indice == outra._indice
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self._store), self._indice))
+
+
+if __name__ == "__main__":
+    # mede bytes por conta nos dois modos: python conta_store.py [quantidade]
+    import sys
+    import tracemalloc
+
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    titular = Cliente("Titular")
+
+    tracemalloc.start()
+    contas = [ContaBancaria(titular, 100.0) for _ in range(quantidade)]
+    objetos, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del contas
+
+    tracemalloc.start()
+    store = ContaStore()
+    for _ in range(quantidade):
+        store.adicionar(titular, 100.0)
+    colunas, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{quantidade} contas")
+    print(f"ContaBancaria (objetos): {objetos / quantidade:.1f} bytes/conta")
+    print(f"ContaStore (colunas):    {colunas / quantidade:.1f} bytes/conta")
@@ -0,0 +1,297 @@
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+
+# cada registro: crc32 (I) + tipo (B) + dados do tipo
+_CABECALHO = struct.Struct("<IB")
+_CRIACAO = struct.Struct("<qqH")  # numero, centavos, tamanho do nome (seguido do nome)
+_MOVIMENTO = struct.Struct("<qq")  # numero, centavos
+_TRANSFERENCIA = struct.Struct("<qqq")  # origem, destino, centavos
+_LOTE = struct.Struct("<I")  # quantidade de contas (seguida de pares numero, centavos em int64)
+_RENOMEACAO = struct.Struct("<qH")  # numero, tamanho do nome (seguido do nome)
+
+CRIACAO = 1
+DEPOSITO = 2
+SAQUE = 3
+TRANSFERENCIA = 4
+LOTE = 5
+RENOMEACAO = 6
+
+
+def _int64_le(dados: bytes) -> array:
+    valores = array("q", dados)
+    if sys.byteorder == "big":
+        valores.byteswap()
+    return valores
+
+
+class Diario:
+    """Diário binário, só de acréscimo, com as operações de um Banco.
+
+    O commit é assíncrono: a operação volta assim que o registro entra
+    num buffer em memória, antes do fsync, e fica durável em até cerca
+    de intervalo segundos (5 ms por padrão). O buffer é gravado com um
+    único fsync quando passa de tamanho_lote bytes ou quando intervalo
+    segundos se passaram desde o último; um fio de fundo faz a gravação
+    por tempo mesmo sem novas operações. Uma queda perde no máximo esses
+    últimos milissegundos de operações, que o chamador já viu
+    concluídas; quem precisa de uma operação durável antes de seguir
+    chama sincronizar(), que grava e faz fsync na hora.
+    """
+
+    def __init__(self, caminho: str, tamanho_lote: int = 256 * 1024, intervalo: float = 0.005):
+        self.caminho = caminho
+        self._arquivo = open(caminho, "ab")
+        self._buffer = bytearray()
+        self._tamanho_lote = tamanho_lote
+        self._intervalo = intervalo
+        self._ultimo_fsync = time.monotonic()
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._descarregador = threading.Thread(target=self._descarregar_periodicamente,
+                                               name=f"diario {caminho}", daemon=True)
+        self._descarregador.start()
+
+    def registrar_criacao(self, numero: int, nome: str, centavos: int):
+        nome_bytes = nome.encode("utf-8")
+        self._registrar(CRIACAO, _CRIACAO.pack(numero, centavos, len(nome_bytes)) + nome_bytes)
+
+    def registrar_deposito(self, numero: int, centavos: int):
+        self._registrar(DEPOSITO, _MOVIMENTO.pack(numero, centavos))
+
+    def registrar_saque(self, numero: int, centavos: int):
+        self._registrar(SAQUE, _MOVIMENTO.pack(numero, centavos))
+
+    def registrar_transferencia(self, origem: int, destino: int, centavos: int):
+        self._registrar(TRANSFERENCIA, _TRANSFERENCIA.pack(origem, destino, centavos))
+
+    def registrar_lote(self, variacoes: dict):
+        """Os saldos líquidos (numero -> centavos) de uma transferência em lote, num registro só."""
+        pares = array("q")
+        for numero, centavos in variacoes.items():
+            if centavos:
+                pares.append(numero)
+                pares.append(centavos)
+        if sys.byteorder == "big":
+            pares.byteswap()
+        self._registrar(LOTE, _LOTE.pack(len(pares) // 2) + pares.tobytes())
+
+    def registrar_renomeacao(self, numero: int, nome: str):
+        """A conta passou a ser do titular chamado nome."""
+        nome_bytes = nome.encode("utf-8")
+        self._registrar(RENOMEACAO, _RENOMEACAO.pack(numero, len(nome_bytes)) + nome_bytes)
+
+    def _registrar(self, tipo: int, dados: bytes):
+        crc = zlib.crc32(dados, tipo)
+        with self._trava:
+            self._buffer += _CABECALHO.pack(crc, tipo)
+            self._buffer += dados
+            if (len(self._buffer) >= self._tamanho_lote
+                    or time.monotonic() - self._ultimo_fsync >= self._intervalo):
+                self._descarregar()
+
+    def _descarregar(self):
+        if self._buffer:
+            self._arquivo.write(self._buffer)
+            self._buffer.clear()
+            self._arquivo.flush()
+            os.fsync(self._arquivo.fileno())
+        self._ultimo_fsync = time.monotonic()
+
+    def _descarregar_periodicamente(self):
+        # sem operações novas, _registrar não é chamado e o buffer ficaria parado
+        while not self._parar.wait(self._intervalo):
+            with self._trava:
+                if self._buffer and time.monotonic() - self._ultimo_fsync >= self._intervalo:
+                    self._descarregar()
+
+    def sincronizar(self):
+        """Grava e faz fsync de tudo o que está no buffer."""
+        with self._trava:
+            self._descarregar()
+
+    def posicao(self) -> int:
+        """Tamanho do diário em bytes, contando o que ainda está no buffer."""
+        with self._trava:
+            return self._arquivo.tell() + len(self._buffer)
+
+    def fechar(self):
+        self._parar.set()
+        self._descarregador.join()
+        with self._trava:
+            self._descarregar()
+            self._arquivo.close()
+
+
+def ler_registros(caminho: str, inicio: int = 0):
+    """Lê os registros do diário a partir do byte inicio.
+
+    Gera (tipo, campos, posicao_final). Para no primeiro registro
+    incompleto ou corrompido, que é o que sobra de uma queda no meio
+    de uma gravação.
+    """
+    with open(caminho, "rb") as arquivo:
+        if os.fstat(arquivo.fileno()).st_size <= inicio:
+            return
+        # mmap evita carregar o diário inteiro na memória de uma vez
+        with mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            yield from _percorrer(mapa, inicio)
+
+
+def _percorrer(dados, inicio: int):
+    posicao = inicio
+    total = len(dados)
+    while posicao + _CABECALHO.size <= total:
+        crc, tipo = _CABECALHO.unpack_from(dados, posicao)
+        comeco = posicao + _CABECALHO.size
+        if tipo == CRIACAO:
+            if comeco + _CRIACAO.size > total:
+                return
+            numero, centavos, tamanho = _CRIACAO.unpack_from(dados, comeco)
+            fim = comeco + _CRIACAO.size + tamanho
+            if fim > total:
+                return
+            campos = (numero, dados[comeco + _CRIACAO.size:fim].decode("utf-8", "replace"), centavos)
+        elif tipo in (DEPOSITO, SAQUE):
+            fim = comeco + _MOVIMENTO.size
+            if fim > total:
+                return
+            campos = _MOVIMENTO.unpack_from(dados, comeco)
+        elif tipo == TRANSFERENCIA:
+            fim = comeco + _TRANSFERENCIA.size
+            if fim > total:
+                return
+            campos = _TRANSFERENCIA.unpack_from(dados, comeco)
+        elif tipo == LOTE:
+            if comeco + _LOTE.size > total:
+                return
+            (quantidade,) = _LOTE.unpack_from(dados, comeco)
+            fim = comeco + _LOTE.size + 16 * quantidade
+            if fim > total:
+                return
+            campos = _int64_le(dados[comeco + _LOTE.size:fim])  # numero, centavos, numero, centavos...
+        elif tipo == RENOMEACAO:
+            if comeco + _RENOMEACAO.size > total:
+                return
+            numero, tamanho = _RENOMEACAO.unpack_from(dados, comeco)
+            fim = comeco + _RENOMEACAO.size + tamanho
+            if fim > total:
+                return
+            campos = (numero, dados[comeco + _RENOMEACAO.size:fim].decode("utf-8", "replace"))
+        else:
+            return
+        if zlib.crc32(dados[comeco:fim], tipo) != crc:
+            return
+        posicao = fim
+        yield tipo, campos, posicao
+
+
+def reaplicar(banco, caminho: str, inicio: int = 0) -> int:
+    """Reaplica no banco os registros do diário a partir do byte inicio.
+
+    Os saldos são alterados direto, sem validar de novo nem registrar
+    outra vez no diário. Retorna a posição do fim do último registro válido.
+    """
+    from conta import ContaBancaria
+
+    # contas que ainda estão só no snapshot são carregadas pela busca do banco
+    buscar = banco.buscar_conta_por_numero
+    posicao = inicio
+    for tipo, campos, posicao in ler_registros(caminho, inicio):
+        if tipo == CRIACAO:
+            numero, nome, centavos = campos
+            banco._materializar(numero, nome, centavos)
+            if numero >= ContaBancaria._proximo_numero:
+                ContaBancaria._proximo_numero = numero + 1
+        elif tipo == DEPOSITO:
+            numero, centavos = campos
+            buscar(numero)._saldo += centavos
+        elif tipo == SAQUE:
+            numero, centavos = campos
+            buscar(numero)._saldo -= centavos
+        elif tipo == TRANSFERENCIA:
+            origem, destino, centavos = campos
+            buscar(origem)._saldo -= centavos
+            buscar(destino)._saldo += centavos
+        elif tipo == RENOMEACAO:
+            numero, nome = campos
+            banco.renomear_titular(numero, nome)
+        else:
+            for i in range(0, len(campos), 2):
+                buscar(campos[i])._saldo += campos[i + 1]
+    return posicao
+
+
+def abrir_banco(nome: str, caminho: str, caminho_snapshot: str = None, **opcoes):
+    """Recupera um Banco a partir do diário em caminho e continua registrando nele.
+
+    Se caminho_snapshot existir, o banco parte do snapshot e só a parte
+    do diário posterior a ele é reaplicada. Se a última gravação ficou
+    pela metade, o resto incompleto é descartado antes de novos registros
+    serem acrescentados.
+    """
+    from banco import Banco
+    from snapshot import carregar_snapshot
+
+    inicio = 0
+    if caminho_snapshot is not None and os.path.exists(caminho_snapshot):
+        banco = carregar_snapshot(nome, caminho_snapshot)
+        inicio = banco._mapeadas.posicao_diario
+    else:
+        banco = Banco(nome)
+    fim = inicio
+    if os.path.exists(caminho):
+        fim = reaplicar(banco, caminho, inicio)
+        if os.path.getsize(caminho) > fim:
+            with open(caminho, "r+b") as arquivo:
+                arquivo.truncate(fim)
+    banco.anexar_diario(Diario(caminho, **opcoes))
+    return banco
+
+
+if __name__ == "__main__":
+    # desempenho e recuperação: python diario.py [operacoes]
+    # (as quedas simuladas estão em tests/test_diario.py)
+    import random
+    import sys
+    import tempfile
+
+    operacoes = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    pasta = tempfile.mkdtemp()
+    caminho = os.path.join(pasta, "banco.diario")
+
+    banco = abrir_banco("Banco", caminho)
+    contas = [banco.criar_conta(f"Cliente {i}", 1_000) for i in range(1_000)]
+    rng = random.Random(11)
+    inicio = time.perf_counter()
+    for _ in range(operacoes):
+        conta = rng.choice(contas)
+        escolha = rng.random()
+        if escolha < 0.4:
+            conta.depositar(5)
+        elif escolha < 0.7 and conta.saldo >= 5:
+            conta.sacar(5)
+        elif conta.saldo >= 5:
+            conta.transferir(rng.choice(contas), 5)
+    banco.transferir_em_lote((origem.numero, destino.numero, 1)
+                             for origem, destino in (rng.sample(contas, 2) for _ in range(5_000)))
+    banco._contexto.diario.sincronizar()
+    duracao = time.perf_counter() - inicio
+    # cada operação volta antes do fsync do seu lote (commit assíncrono): isto não é vazão de
+    # operações que esperaram ficar duráveis uma a uma; todas estão duráveis só no fim
+    diario = banco._contexto.diario
+    print(f"{operacoes} operações registradas em {duracao:.2f}s ({operacoes / duracao:,.0f}/s), "
+          f"duráveis em até {diario._intervalo * 1000:g} ms (ou a cada {diario._tamanho_lote // 1024} KiB)")
+    esperado = {conta.numero: conta._saldo for conta in contas}
+    diario.fechar()
+
+    inicio = time.perf_counter()
+    recuperado = abrir_banco("Banco", caminho)
+    print(f"recuperação em {time.perf_counter() - inicio:.2f}s")
+    assert {c.numero: c._saldo for c in recuperado.iterar_contas()} == esperado
+    recuperado._contexto.diario.fechar()
@@ -0,0 +1,206 @@
+# Desktop/banco/dinheiro.py é uma cópia deste arquivo; mudanças vão nos dois.
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+from fractions import Fraction
+from math import isfinite
+
+from errors import ValorInvalidoError
+
+_novo = object.__new__
+
+
+def para_centavos(valor) -> int:
+    """Converte um valor em reais (int, float, str, Decimal ou Dinheiro) para centavos.
+
+    Floats são arredondados para o centavo mais próximo; é a única etapa
+    inexata, e acontece só na entrada do valor.
+    """
+    tipo = type(valor)
+    if tipo is Dinheiro:
+        return valor._centavos
+    if tipo is float:
+        if not isfinite(valor):
+            raise ValorInvalidoError("Valor monetário inválido.")
+        return round(valor * 100)
+    if tipo is int:
+        return valor * 100
+    if isinstance(valor, (str, Decimal)):
+        try:
+            decimal = Decimal(valor.strip() if tipo is str else valor)
+            return int((decimal * 100).quantize(Decimal(1), ROUND_HALF_EVEN))
+        except (InvalidOperation, ValueError) as e:
+            raise ValorInvalidoError(f"Valor monetário inválido: {valor!r}") from e
+    raise ValorInvalidoError(f"Valor monetário inválido: {valor!r}")
+
+
+class Dinheiro:
+    """Valor monetário exato guardado em centavos inteiros.
+
+    Aceita int, float, str, Decimal ou outro Dinheiro (sempre em reais).
+    As contas guardam o saldo direto em centavos (int) e usam Dinheiro
+    apenas para expor o valor.
+    """
+
+    __slots__ = ("_centavos",)
+
+    def __init__(self, valor=0):
+        self._centavos = para_centavos(valor)
+
+    @classmethod
+    def de_centavos(cls, centavos: int) -> "Dinheiro":
+        dinheiro = _novo(cls)
+        dinheiro._centavos = centavos
+        return dinheiro
+
+    @property
+    def centavos(self) -> int:
+        return self._centavos
+
+    _centavos_de = staticmethod(para_centavos)
+
+    # aritmética
+
+    def __add__(self, outro):
+        resultado = _novo(Dinheiro)
+        if type(outro) is Dinheiro:
+            resultado._centavos = self._centavos + outro._centavos
+            return resultado
+        try:
+            resultado._centavos = self._centavos + self._centavos_de(outro)
+        except ValorInvalidoError:
+            return NotImplemented
+        return resultado
+
+    __radd__ = __add__
+
+    def __sub__(self, outro):
+        resultado = _novo(Dinheiro)
+        if type(outro) is Dinheiro:
+            resultado._centavos = self._centavos - outro._centavos
+            return resultado
+        try:
+            resultado._centavos = self._centavos - self._centavos_de(outro)
+        except ValorInvalidoError:
+            return NotImplemented
+        return resultado
+
+    def __rsub__(self, outro):
+        try:
+            return Dinheiro.de_centavos(self._centavos_de(outro) - self._centavos)
+        except ValorInvalidoError:
+            return NotImplemented
+
+    def __mul__(self, fator):
+        """Multiplica por uma taxa (ex: 0.07), arredondando para o centavo."""
+        if type(fator) is int:
+            return Dinheiro.de_centavos(self._centavos * fator)
+        if isinstance(fator, (float, Decimal, Fraction)):
+            return Dinheiro.de_centavos(round(Fraction(self._centavos) * Fraction(fator)))
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Dinheiro.de_centavos(-self._centavos)
+
+    def __abs__(self):
+        return Dinheiro.de_centavos(abs(self._centavos))
+
+    # comparações: exatas, e só com Dinheiro, int (reais) e Decimal; um float não
+    # tem valor exato em centavos, então a comparação com ele é NotImplemented
+
+    def _par(self, outro):
+        """Os dois lados em grandezas que se comparam sem arredondar, ou None."""
+        tipo = type(outro)
+        if tipo is Dinheiro:
+            return self._centavos, outro._centavos
+        if tipo is int:
+            return self._centavos, outro * 100
+        if isinstance(outro, Decimal):
+            return self.para_decimal(), outro
+        return None
+
+    def __eq__(self, outro):
+        par = self._par(outro)
+        return NotImplemented if par is None else par[0] == par[1]
+
+    def __lt__(self, outro):
+        par = self._par(outro)
+        return NotImplemented if par is None else par[0] < par[1]
+
+    def __le__(self, outro):
+        par = self._par(outro)
+        return NotImplemented if par is None else par[0] <= par[1]
+
+    def __gt__(self, outro):
+        par = self._par(outro)
+        return NotImplemented if par is None else par[0] > par[1]
+
+    def __ge__(self, outro):
+        par = self._par(outro)
+        return NotImplemented if par is None else par[0] >= par[1]
+
+    def __hash__(self):
+        # igual ao hash do int ou Decimal de mesmo valor, que são os únicos iguais a ele
+        if self._centavos % 100 == 0:
+            return hash(self._centavos // 100)
+        return hash(Fraction(self._centavos, 100))
+
+    def __bool__(self):
+        return self._centavos != 0
+
+    # conversões
+
+    def __float__(self):
+        return self._centavos / 100
+
+    def para_decimal(self) -> Decimal:
+        return Decimal(self._centavos).scaleb(-2)
+
+    def __str__(self):
+        return str(self.para_decimal())
+
+    def __repr__(self):
+        return f"Dinheiro('{self}')"
+
+    def __format__(self, especificacao):
+        if not especificacao:
+            return str(self)
+        return format(self.para_decimal(), especificacao)
+
+
+if __name__ == "__main__":
+    # micro-benchmark e verificação de exatidão: python dinheiro.py [operacoes]
+    import random
+    import sys
+    import time
+
+    operacoes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(42)
+    centavos = [rng.randint(-100_000, 100_000) for _ in range(operacoes)]
+
+    textos = [f"{c / 100:.2f}" for c in centavos]
+    floats = [float(t) for t in textos]
+    decimais = [Decimal(t) for t in textos]
+    valores = [Dinheiro(f) for f in floats]
+    inteiros = [para_centavos(f) for f in floats]
+
+    def medir(nome, parcelas, inicial):
+        inicio = time.perf_counter()
+        total = inicial
+        for parcela in parcelas:
+            total += parcela
+        duracao = time.perf_counter() - inicio
+        print(f"{nome:<9} {duracao / operacoes * 1e9:8.1f} ns/op  total={total}")
+        return total
+
+    medir("float", floats, 0.0)
+    total_decimal = medir("Decimal", decimais, Decimal(0))
+    total_dinheiro = medir("Dinheiro", valores, Dinheiro(0))
+    # caminho usado pelas contas: saldo em centavos inteiros
+    total_centavos = medir("centavos", inteiros, 0)
+
+    esperado = sum(centavos)
+    assert total_dinheiro.centavos == esperado, "Dinheiro divergiu da soma exata"
+    assert total_centavos == esperado
+    assert total_decimal == Decimal(esperado).scaleb(-2)
+    print(f"exato em {operacoes} operações")
@@ -44,6 +44,21 @@ class LimiteTransferenciaExcedidoError(BancoError):
     pass
 
 
+class LimiteDeTransacoesErro(BancoError):
+    """Quantidade diária de transações da conta foi atingida."""
+    pass
+
+
 class ContaJaExisteError(BancoError):
     """Já existe uma conta com este identificador (ex: CPF)."""
     pass
+
+
+class ClienteError(BancoError):
+    """Dados do cliente (titular) inválidos."""
+    pass
+
+
+class ContaError(BancoError):
+    """Operação inválida sobre a conta."""
+    pass
@@ -0,0 +1,43 @@
+def _ignorar(evento):
+    pass
+
+
+class BarramentoEventos:
+    """Distribui os eventos das contas para os assinantes.
+
+    Cada evento é uma tupla (tipo, numero, centavos, contraparte), publicada
+    depois que a operação foi aplicada. tipo é "deposito", "saque" ou
+    "transferencia"; contraparte é o número da conta de destino nas
+    transferências e None nos outros tipos.
+
+    Os assinantes são chamados na thread da operação, com a trava da
+    conta adquirida, então precisam ser rápidos e não podem levantar
+    erro: quem tem trabalho pesado deve só enfileirar o evento (ver
+    DetectorFraude em fraude.py).
+    """
+
+    def __init__(self):
+        self._assinantes = []
+        self.publicar = _ignorar
+
+    def assinar(self, funcao):
+        self._assinantes.append(funcao)
+        self._montar()
+
+    def cancelar(self, funcao):
+        self._assinantes.remove(funcao)
+        self._montar()
+
+    def _montar(self):
+        # publicar é trocado conforme os assinantes, para que o caso comum
+        # (zero ou um assinante) custe uma chamada só
+        assinantes = tuple(self._assinantes)
+        if not assinantes:
+            self.publicar = _ignorar
+        elif len(assinantes) == 1:
+            self.publicar = assinantes[0]
+        else:
+            def publicar(evento):
+                for funcao in assinantes:
+                    funcao(evento)
+            self.publicar = publicar
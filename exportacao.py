@@ -0,0 +1,147 @@
+# _abrir, escrever_csv, escrever_jsonl e _escrever têm uma cópia em Desktop/banco/exportacao.py;
+# mudanças vão nas duas.
+import csv
+import json
+import sys
+
+from dinheiro import Dinheiro, para_centavos
+from errors import ValorInvalidoError
+from snapshot import dados_das_contas
+
+TAMANHO_BUFFER = 1 << 20
+_LINHAS_POR_ESCRITA = 1_000
+
+CAMPOS_CONTAS = ("numero", "titular", "saldo")
+CAMPOS_LANCAMENTOS = ("conta", "data", "tipo", "valor", "contraparte")
+
+
+def linhas_de_contas(banco, saldo_minimo=None, saldo_maximo=None):
+    """Gera um dict por conta, em ordem de número, opcionalmente filtrando por faixa de saldo.
+
+    Contas que ainda estão só no snapshot são lidas direto dele, sem
+    criar objetos ContaBancaria.
+    """
+    minimo = None if saldo_minimo is None else para_centavos(saldo_minimo)
+    maximo = None if saldo_maximo is None else para_centavos(saldo_maximo)
+    for numero, nome, centavos in dados_das_contas(banco):
+        if minimo is not None and centavos < minimo:
+            continue
+        if maximo is not None and centavos > maximo:
+            continue
+        yield {"numero": numero, "titular": nome, "saldo": str(Dinheiro.de_centavos(centavos))}
+
+
+def linhas_de_lancamentos(banco, inicio=None, fim=None):
+    """Gera um dict por lançamento, conta por conta em ordem de número, entre as datas inicio e fim.
+
+    O histórico das contas só existe em memória, desde que o processo
+    abriu o banco: das contas que vêm do snapshot ou do repositório, só
+    as já carregadas podem ter lançamentos. As outras ficam de fora sem
+    ser carregadas, já que não teriam nenhum.
+    """
+    carregadas = banco._contas_por_numero
+    if banco._mapeadas is not None or banco._repositorio.duravel:
+        # carregadas sob demanda, na ordem em que foram usadas
+        contas = [carregadas[numero] for numero in sorted(carregadas)]
+    else:
+        contas = carregadas.values()
+    for conta in contas:
+        for lancamento in conta.extrato(inicio, fim):
+            yield {
+                "conta": conta.numero,
+                "data": lancamento.data.isoformat(),
+                "tipo": lancamento.tipo,
+                "valor": str(lancamento.valor),
+                "contraparte": lancamento.contraparte,
+            }
+
+
+def _abrir(destino):
+    """Retorna (arquivo, deve_fechar) para um caminho, um arquivo aberto ou '-' (stdout)."""
+    if destino == "-":
+        return sys.stdout, False
+    if isinstance(destino, str):
+        return open(destino, "w", encoding="utf-8", newline="", buffering=TAMANHO_BUFFER), True
+    return destino, False
+
+
+def escrever_csv(linhas, destino, campos) -> int:
+    """Grava as linhas (dicts) em CSV, uma por vez, e retorna quantas foram gravadas."""
+    arquivo, fechar = _abrir(destino)
+    try:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(campos)
+        total = 0
+        for linha in linhas:
+            escritor.writerow([linha[campo] for campo in campos])
+            total += 1
+        return total
+    finally:
+        if fechar:
+            arquivo.close()
+
+
+def escrever_jsonl(linhas, destino) -> int:
+    """Grava as linhas (dicts) em JSON Lines, juntando várias por escrita."""
+    arquivo, fechar = _abrir(destino)
+    try:
+        dumps = json.JSONEncoder(ensure_ascii=False).encode
+        pendentes = []
+        total = 0
+        for linha in linhas:
+            pendentes.append(dumps(linha))
+            if len(pendentes) == _LINHAS_POR_ESCRITA:
+                arquivo.write("\n".join(pendentes) + "\n")
+                total += len(pendentes)
+                pendentes.clear()
+        if pendentes:
+            arquivo.write("\n".join(pendentes) + "\n")
+            total += len(pendentes)
+        return total
+    finally:
+        if fechar:
+            arquivo.close()
+
+
+def _escrever(linhas, destino, formato, campos) -> int:
+    if formato == "csv":
+        return escrever_csv(linhas, destino, campos)
+    if formato == "jsonl":
+        return escrever_jsonl(linhas, destino)
+    raise ValorInvalidoError(f"Formato de exportação '{formato}' não suportado (use csv ou jsonl).")
+
+
+def exportar_contas(banco, destino, formato: str = "csv", saldo_minimo=None, saldo_maximo=None) -> int:
+    return _escrever(linhas_de_contas(banco, saldo_minimo, saldo_maximo), destino, formato, CAMPOS_CONTAS)
+
+
+def exportar_lancamentos(banco, destino, formato: str = "csv", inicio=None, fim=None) -> int:
+    return _escrever(linhas_de_lancamentos(banco, inicio, fim), destino, formato, CAMPOS_LANCAMENTOS)
+
+
+if __name__ == "__main__":
+    # exportação em memória constante: python exportacao.py [contas]
+    import os
+    import tempfile
+    import time
+    import tracemalloc
+
+    from banco import Banco
+
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    banco = Banco("Banco")
+    banco.criar_contas_em_lote((f"Cliente {i}", 1 + i % 10_000) for i in range(quantidade))
+    pasta = tempfile.mkdtemp()
+
+    for formato in ("csv", "jsonl"):
+        caminho = os.path.join(pasta, f"contas.{formato}")
+        inicio = time.perf_counter()
+        total = exportar_contas(banco, caminho, formato)
+        duracao = time.perf_counter() - inicio
+        # segunda passada só para medir o pico (tracemalloc deixa tudo mais lento)
+        tracemalloc.start()
+        exportar_contas(banco, caminho, formato)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{formato}: {total} contas em {duracao:.2f}s ({total / duracao:,.0f}/s), "
+              f"{os.path.getsize(caminho) / 1e6:.0f} MB, pico de memória {pico / 1e6:.1f} MB")
@@ -0,0 +1,166 @@
+# Desktop/banco/historico.py é uma cópia deste arquivo; mudanças vão nos dois.
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from dinheiro import Dinheiro
+
+TIPOS = ("deposito", "saque", "transferencia_enviada", "transferencia_recebida", "tarifa", "rendimento")
+_CODIGOS = {tipo: codigo for codigo, tipo in enumerate(TIPOS)}
+
+
+class Lancamento(NamedTuple):
+    data: datetime
+    tipo: str
+    valor: Dinheiro
+    contraparte: Optional[object] = None
+
+
+def _microssegundos(data: datetime) -> int:
+    return round(data.timestamp() * 1_000_000)
+
+
+class _Bloco:
+    __slots__ = ("momentos", "tipos", "valores", "contrapartes")
+
+    def __init__(self):
+        self.momentos = array("q")  # microssegundos desde a época
+        self.tipos = array("b")
+        self.valores = array("q")  # centavos
+        self.contrapartes = []
+
+
+class Historico:
+    """Lançamentos de uma conta em ordem de tempo, guardados em blocos compactos.
+
+    Cada bloco tem colunas em array; o extrato de um período acha o
+    primeiro bloco e a primeira posição com busca binária, sem
+    percorrer o histórico inteiro.
+    """
+
+    __slots__ = ("_blocos", "_inicios", "_ultimo_momento")
+
+    TAMANHO_BLOCO = 1024
+
+    def __init__(self):
+        self._blocos = []
+        self._inicios = []  # primeiro momento de cada bloco
+        self._ultimo_momento = 0
+
+    @classmethod
+    def com_abertura(cls, centavos: int, momento: int) -> "Historico":
+        """Histórico cujo primeiro lançamento é o depósito de abertura, feito em momento (microssegundos)."""
+        historico = cls()
+        bloco = _Bloco()
+        bloco.momentos.append(momento)
+        bloco.tipos.append(_CODIGOS["deposito"])
+        bloco.valores.append(centavos)
+        bloco.contrapartes.append(None)
+        historico._blocos.append(bloco)
+        historico._inicios.append(momento)
+        historico._ultimo_momento = momento
+        return historico
+
+    def __len__(self) -> int:
+        if not self._blocos:
+            return 0
+        return (len(self._blocos) - 1) * self.TAMANHO_BLOCO + len(self._blocos[-1].momentos)
+
+    def registrar(self, tipo: str, centavos: int, contraparte=None, data: datetime = None):
+        momento = time.time_ns() // 1000 if data is None else _microssegundos(data)
+        # o relógio pode voltar; o histórico nunca volta
+        if momento < self._ultimo_momento:
+            momento = self._ultimo_momento
+        self._ultimo_momento = momento
+
+        if not self._blocos or len(self._blocos[-1].momentos) == self.TAMANHO_BLOCO:
+            self._blocos.append(_Bloco())
+            self._inicios.append(momento)
+        bloco = self._blocos[-1]
+        bloco.momentos.append(momento)
+        bloco.tipos.append(_CODIGOS[tipo])
+        bloco.valores.append(centavos)
+        bloco.contrapartes.append(contraparte)
+
+    def registrar_varios(self, tipo: str, valores, contrapartes, data: datetime = None):
+        """Vários lançamentos do mesmo tipo no mesmo momento, como as pernas de uma transferência em lote."""
+        momento = time.time_ns() // 1000 if data is None else _microssegundos(data)
+        if momento < self._ultimo_momento:
+            momento = self._ultimo_momento
+        self._ultimo_momento = momento
+
+        codigo = _CODIGOS[tipo]
+        feitos = 0
+        while feitos < len(valores):
+            if not self._blocos or len(self._blocos[-1].momentos) == self.TAMANHO_BLOCO:
+                self._blocos.append(_Bloco())
+                self._inicios.append(momento)
+            bloco = self._blocos[-1]
+            ate = min(len(valores), feitos + self.TAMANHO_BLOCO - len(bloco.momentos))
+            bloco.momentos.extend(array("q", [momento]) * (ate - feitos))
+            bloco.tipos.extend(array("b", [codigo]) * (ate - feitos))
+            bloco.valores.extend(valores[feitos:ate])
+            bloco.contrapartes.extend(contrapartes[feitos:ate])
+            feitos = ate
+
+    @staticmethod
+    def _lancamento(bloco: _Bloco, posicao: int) -> Lancamento:
+        return Lancamento(
+            datetime.fromtimestamp(bloco.momentos[posicao] / 1_000_000),
+            TIPOS[bloco.tipos[posicao]],
+            Dinheiro.de_centavos(bloco.valores[posicao]),
+            bloco.contrapartes[posicao],
+        )
+
+    def extrato(self, inicio: datetime = None, fim: datetime = None):
+        """Gera os lançamentos entre inicio e fim (inclusive), em ordem de tempo."""
+        if not self._blocos:
+            return
+        if inicio is None:
+            indice_bloco, posicao = 0, 0
+        else:
+            de = _microssegundos(inicio)
+            # o bloco antes do primeiro que começa em de: lançamentos no momento de
+            # podem estar no fim dele e em vários blocos seguidos que começam em de
+            indice_bloco = max(bisect_left(self._inicios, de) - 1, 0)
+            posicao = bisect_left(self._blocos[indice_bloco].momentos, de)
+        ate = None if fim is None else _microssegundos(fim)
+
+        for bloco in self._blocos[indice_bloco:]:
+            momentos = bloco.momentos
+            ultima = len(momentos) if ate is None else bisect_right(momentos, ate)
+            for i in range(posicao, ultima):
+                yield self._lancamento(bloco, i)
+            if ultima < len(momentos):
+                return
+            posicao = 0
+
+    def __iter__(self):
+        return self.extrato()
+
+
+if __name__ == "__main__":
+    # extrato de um dia em um histórico grande: python historico.py [lancamentos]
+    import sys
+    from datetime import timedelta
+
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    historico = Historico()
+    comeco = datetime(2020, 1, 1)
+    passo = timedelta(minutes=1)
+    for i in range(quantidade):
+        historico.registrar("deposito" if i % 2 else "saque", 100, data=comeco + i * passo)
+
+    inicio = comeco + (quantidade // 2) * passo
+    fim = inicio + timedelta(days=1)
+
+    t0 = time.perf_counter()
+    com_busca = list(historico.extrato(inicio, fim))
+    t1 = time.perf_counter()
+    varredura = [l for l in historico if inicio <= l.data <= fim]
+    t2 = time.perf_counter()
+    assert com_busca == varredura
+    print(f"{quantidade} lançamentos, extrato de {len(com_busca)}: "
+          f"busca binária {(t1 - t0) * 1e3:.2f} ms, varredura {(t2 - t1) * 1e3:.0f} ms")
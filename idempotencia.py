@@ -0,0 +1,162 @@
+import threading
+import time
+from array import array
+
+_DESPEJOS_POR_REGISTRO = 4  # chaves vencidas tiradas a cada registro, no máximo
+_TAMANHO_INICIAL = 64  # posições da fila de cada fragmento antes de crescer
+_LIBERADA = object()  # posição da fila de uma chave liberada
+
+
+class _Fragmento:
+    """Um pedaço do registro: as chaves vivas e a fila delas em ordem de chegada.
+
+    A fila é circular (a chave e o vencimento de cada posição); ela dobra
+    de tamanho até a capacidade do fragmento e, a partir daí, a chave mais
+    antiga sai para a nova entrar.
+    """
+
+    __slots__ = ("trava", "chaves", "fila", "vencimentos", "inicio", "tamanho", "antecipadas")
+
+    def __init__(self, posicoes: int):
+        self.trava = threading.Lock()
+        self.chaves = {}  # chave -> vencimento
+        self.fila = [None] * posicoes
+        self.vencimentos = array("d", bytes(8 * posicoes))
+        self.inicio = 0
+        self.tamanho = 0
+        self.antecipadas = 0  # chaves tiradas antes de vencer, por falta de espaço
+
+    def despejar(self):
+        inicio = self.inicio
+        chave = self.fila[inicio]
+        # a chave pode ter vencido e sido registrada de novo depois desta posição
+        if self.chaves.get(chave) == self.vencimentos[inicio]:
+            del self.chaves[chave]
+        self.fila[inicio] = None
+        self.inicio = (inicio + 1) % len(self.fila)
+        self.tamanho -= 1
+
+    def crescer(self, posicoes: int):
+        # só é chamado com a fila cheia: ela é desenrolada no começo das novas
+        inicio = self.inicio
+        self.fila = self.fila[inicio:] + self.fila[:inicio] + [None] * (posicoes - self.tamanho)
+        self.vencimentos = (self.vencimentos[inicio:] + self.vencimentos[:inicio]
+                            + array("d", bytes(8 * (posicoes - self.tamanho))))
+        self.inicio = 0
+
+
+class RegistroIdempotencia:
+    """Chaves de operações já aplicadas, lembradas por validade segundos.
+
+    Serve para reconhecer reenvios: depositar, sacar e transferir
+    recebem uma chave opcional e, se ela já está aqui, não fazem nada.
+    As chaves ficam espalhadas em fragmentos, cada um com sua trava, um
+    dict com o vencimento de cada chave e uma fila em ordem de chegada.
+    Não há varredura: a cada registro, até _DESPEJOS_POR_REGISTRO chaves
+    vencidas saem da frente da fila do fragmento, então registrar e
+    consultar custam O(1) e a memória não passa de capacidade chaves.
+    Uma chave vencida que ainda não saiu da fila já não é reconhecida.
+    Se chegam mais chaves do que cabem na validade, as mais antigas saem
+    antes de vencer (ver antecipadas).
+
+    O registro fica só na memória: depois de reiniciar o processo, um
+    reenvio com uma chave antiga é aplicado de novo.
+    """
+
+    def __init__(self, validade: float = 300.0, capacidade: int = 1_000_000, fragmentos: int = 64,
+                 relogio=time.monotonic):
+        if fragmentos & (fragmentos - 1):
+            raise ValueError("fragmentos deve ser uma potência de 2.")
+        self.validade = validade
+        self._por_fragmento = max(1, capacidade // fragmentos)
+        self._fragmentos = [_Fragmento(min(_TAMANHO_INICIAL, self._por_fragmento)) for _ in range(fragmentos)]
+        self._mascara = fragmentos - 1
+        self._relogio = relogio
+
+    def __len__(self) -> int:
+        return sum(len(fragmento.chaves) for fragmento in self._fragmentos)
+
+    def __contains__(self, chave) -> bool:
+        # consultar o dict não precisa da trava
+        vencimento = self._fragmentos[hash(chave) & self._mascara].chaves.get(chave)
+        return vencimento is not None and vencimento > self._relogio()
+
+    @property
+    def antecipadas(self) -> int:
+        """Chaves esquecidas antes de vencer porque o registro estava cheio."""
+        return sum(fragmento.antecipadas for fragmento in self._fragmentos)
+
+    def registrar(self, chave) -> bool:
+        """Guarda a chave; False se ela já estava registrada e não venceu."""
+        fragmento = self._fragmentos[hash(chave) & self._mascara]
+        agora = self._relogio()
+        with fragmento.trava:
+            vencimentos = fragmento.vencimentos
+            for _ in range(_DESPEJOS_POR_REGISTRO):
+                if not fragmento.tamanho or vencimentos[fragmento.inicio] > agora:
+                    break
+                fragmento.despejar()
+            vencimento = fragmento.chaves.get(chave)
+            if vencimento is not None and vencimento > agora:
+                return False
+            posicoes = len(fragmento.fila)
+            if fragmento.tamanho == posicoes:
+                if posicoes < self._por_fragmento:
+                    fragmento.crescer(min(2 * posicoes, self._por_fragmento))
+                else:
+                    fragmento.despejar()
+                    fragmento.antecipadas += 1
+            fim = (fragmento.inicio + fragmento.tamanho) % len(fragmento.fila)
+            vencimento = agora + self.validade
+            fragmento.fila[fim] = chave
+            fragmento.vencimentos[fim] = vencimento
+            fragmento.tamanho += 1
+            fragmento.chaves[chave] = vencimento
+        return True
+
+    def liberar(self, chave):
+        """Esquece a chave de uma operação que falhou depois de registrá-la; um reenvio volta a valer."""
+        fragmento = self._fragmentos[hash(chave) & self._mascara]
+        with fragmento.trava:
+            if fragmento.chaves.pop(chave, None) is None:
+                return
+            # a posição dela também sai da fila, para não apagar um registro novo da mesma
+            # chave ao ser despejada; em geral é a última, registrada pela mesma operação
+            fila = fragmento.fila
+            fim = fragmento.inicio + fragmento.tamanho
+            for i in range(fim - 1, fragmento.inicio - 1, -1):
+                if fila[i % len(fila)] == chave:
+                    fila[i % len(fila)] = _LIBERADA
+                    return
+
+
+if __name__ == "__main__":
+    # custo e memória do registro cheio: python idempotencia.py [capacidade]
+    # (a correção, inclusive com reenvios concorrentes, está em tests/test_idempotencia.py)
+    import random
+    import sys
+    import tracemalloc
+    import uuid
+
+    capacidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(8)
+    chaves = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(2 * capacidade)]
+    registro = RegistroIdempotencia(capacidade=capacidade)
+    inicio = time.perf_counter()
+    for chave in chaves:
+        registro.registrar(chave)
+    duracao = time.perf_counter() - inicio
+    consultadas = chaves[-100_000:]
+    inicio = time.perf_counter()
+    for chave in consultadas:
+        chave in registro
+    consulta = time.perf_counter() - inicio
+    # as chaves já existem antes do registro: a medida é só a do que ele acrescenta
+    tracemalloc.start()
+    registro = RegistroIdempotencia(capacidade=capacidade)
+    for chave in chaves[:capacidade]:
+        registro.registrar(chave)
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{len(chaves):,} chaves (UUID) num registro de {capacidade:,}: registrar {duracao / len(chaves) * 1e9:,.0f} ns, "
+          f"consultar {consulta / len(consultadas) * 1e9:,.0f} ns, {memoria / len(registro):.0f} bytes por chave guardada")
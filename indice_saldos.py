@@ -0,0 +1,192 @@
+# A ListaOrdenada tem uma cópia em Desktop/banco/lista_ordenada.py; mudanças vão nas duas.
+import threading
+from bisect import bisect_left, insort
+from itertools import islice
+
+_CARGA = 1_000  # tamanho de referência dos blocos da ListaOrdenada
+_BITS_NUMERO = 40  # o número da conta ocupa os bits de baixo da chave (até ~10**12 contas)
+_MASCARA_NUMERO = (1 << _BITS_NUMERO) - 1
+
+
+class ListaOrdenada:
+    """Valores sempre em ordem, guardados em blocos de até 2 * _CARGA itens.
+
+    É a ideia da SortedList do sortedcontainers: uma lista de listas
+    ordenadas mais o maior valor de cada bloco. Um bisect nos máximos
+    acha o bloco e outro acha a posição dentro dele; inserir ou remover
+    só desloca os itens de um bloco, e um bloco que passa do dobro da
+    carga é dividido em dois. Percorrer k valores a partir de um ponto
+    custa O(log n + k).
+    """
+
+    def __init__(self, valores=()):
+        valores = sorted(valores)
+        self._blocos = [valores[i:i + _CARGA] for i in range(0, len(valores), _CARGA)]
+        self._maximos = [bloco[-1] for bloco in self._blocos]
+        self._tamanho = len(valores)
+
+    def __len__(self) -> int:
+        return self._tamanho
+
+    def adicionar(self, valor):
+        blocos = self._blocos
+        maximos = self._maximos
+        self._tamanho += 1
+        if not blocos:
+            blocos.append([valor])
+            maximos.append(valor)
+            return
+        i = bisect_left(maximos, valor)
+        if i == len(maximos):
+            # maior que tudo: entra no fim do último bloco
+            i -= 1
+            blocos[i].append(valor)
+            maximos[i] = valor
+        else:
+            insort(blocos[i], valor)
+        bloco = blocos[i]
+        if len(bloco) > 2 * _CARGA:
+            blocos[i:i + 1] = [bloco[:_CARGA], bloco[_CARGA:]]
+            maximos[i:i + 1] = [bloco[_CARGA - 1], bloco[-1]]
+
+    def remover(self, valor):
+        """Remove uma ocorrência de valor; ValueError se ele não está na lista."""
+        maximos = self._maximos
+        i = bisect_left(maximos, valor)
+        if i < len(maximos):
+            bloco = self._blocos[i]
+            j = bisect_left(bloco, valor)
+            if bloco[j] == valor:
+                del bloco[j]
+                self._tamanho -= 1
+                if not bloco:
+                    del self._blocos[i]
+                    del maximos[i]
+                elif j == len(bloco):
+                    maximos[i] = bloco[-1]
+                return
+        raise ValueError(f"{valor!r} não está na lista.")
+
+    def trocar(self, antigo, novo):
+        """Substitui antigo por novo; quando os dois caem no mesmo bloco, num passo só."""
+        maximos = self._maximos
+        i = bisect_left(maximos, antigo)
+        # o bloco i guarda os valores em (maximos[i - 1], maximos[i]]; o último aceita qualquer maior
+        if (i < len(maximos) and (i == 0 or maximos[i - 1] < novo)
+                and (novo <= maximos[i] or i == len(maximos) - 1)):
+            bloco = self._blocos[i]
+            j = bisect_left(bloco, antigo)
+            if bloco[j] != antigo:
+                raise ValueError(f"{antigo!r} não está na lista.")
+            del bloco[j]
+            insort(bloco, novo)
+            maximos[i] = bloco[-1]
+            return
+        self.remover(antigo)
+        self.adicionar(novo)
+
+    def a_partir_de(self, valor):
+        """Percorre em ordem crescente os valores >= valor."""
+        blocos = self._blocos
+        i = bisect_left(self._maximos, valor)
+        if i == len(blocos):
+            return
+        bloco = blocos[i]
+        yield from islice(bloco, bisect_left(bloco, valor), None)
+        for bloco in islice(blocos, i + 1, None):
+            yield from bloco
+
+    def __iter__(self):
+        for bloco in self._blocos:
+            yield from bloco
+
+    def decrescente(self):
+        """Percorre os valores do maior para o menor."""
+        for bloco in reversed(self._blocos):
+            yield from reversed(bloco)
+
+
+class IndiceSaldos:
+    """As contas de um banco ordenadas por saldo, atualizadas a cada operação.
+
+    Cada conta é uma chave inteira saldo * 2**40 + numero numa
+    ListaOrdenada: a ordem é por saldo e, no empate, por número, e um int
+    compara mais rápido e ocupa menos que uma tupla. As contas chamam
+    mover() com a própria trava adquirida; a trava do índice protege os
+    blocos, que são compartilhados entre contas.
+    """
+
+    def __init__(self, dados=()):
+        """dados: pares (numero, centavos) das contas que já existem."""
+        self._lista = ListaOrdenada((centavos << _BITS_NUMERO) + numero for numero, centavos in dados)
+        self._trava = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lista)
+
+    def adicionar(self, numero: int, centavos: int):
+        with self._trava:
+            self._lista.adicionar((centavos << _BITS_NUMERO) + numero)
+
+    def mover(self, numero: int, antes: int, depois: int):
+        """O saldo da conta passou de antes para depois (em centavos)."""
+        with self._trava:
+            self._lista.trocar((antes << _BITS_NUMERO) + numero, (depois << _BITS_NUMERO) + numero)
+
+    def maiores(self, n: int) -> list:
+        """(numero, centavos) das n contas de maior saldo, da maior para a menor."""
+        with self._trava:
+            chaves = list(islice(self._lista.decrescente(), n))
+        return [(chave & _MASCARA_NUMERO, chave >> _BITS_NUMERO) for chave in chaves]
+
+    def entre(self, minimo: int, maximo: int) -> list:
+        """(numero, centavos) das contas com saldo entre minimo e maximo centavos, em ordem de saldo."""
+        limite = (maximo + 1) << _BITS_NUMERO
+        resultado = []
+        with self._trava:
+            for chave in self._lista.a_partir_de(minimo << _BITS_NUMERO):
+                if chave >= limite:
+                    break
+                resultado.append((chave & _MASCARA_NUMERO, chave >> _BITS_NUMERO))
+        return resultado
+
+
+if __name__ == "__main__":
+    # índice contra ordenar na hora: python indice_saldos.py [contas]
+    import heapq
+    import random
+    import sys
+    import time
+
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    rng = random.Random(11)
+    saldos = {numero: rng.randrange(1, 10_000_000) for numero in range(1, quantidade + 1)}
+
+    inicio = time.perf_counter()
+    indice = IndiceSaldos(saldos.items())
+    print(f"{quantidade} contas, índice montado em {time.perf_counter() - inicio:.1f} s")
+
+    def medir(rotulo, funcao, vezes):
+        inicio = time.perf_counter()
+        for _ in range(vezes):
+            funcao()
+        print(f"  {rotulo}: {(time.perf_counter() - inicio) / vezes * 1e3:,.3f} ms")
+
+    medir("top 100, ordenando tudo (sorted)",
+          lambda: sorted(saldos.items(), key=lambda item: item[1], reverse=True)[:100], 1)
+    medir("top 100, heapq.nlargest", lambda: heapq.nlargest(100, saldos.items(), key=lambda item: item[1]), 1)
+    medir("top 100, índice", lambda: indice.maiores(100), 1_000)
+    medir("saldo entre 50.000,00 e 50.010,00, filtrando tudo",
+          lambda: sorted((n, c) for n, c in saldos.items() if 5_000_000 <= c <= 5_001_000), 1)
+    medir("saldo entre 50.000,00 e 50.010,00, índice", lambda: indice.entre(5_000_000, 5_001_000), 1_000)
+
+    # custo de manter: cada depósito tira a chave velha e põe a nova
+    numeros = [rng.randrange(1, quantidade + 1) for _ in range(200_000)]
+    inicio = time.perf_counter()
+    for numero in numeros:
+        antes = saldos[numero]
+        saldos[numero] = antes + 100
+        indice.mover(numero, antes, antes + 100)
+    print(f"  atualização: {(time.perf_counter() - inicio) / len(numeros) * 1e9:,.0f} ns por operação")
+    assert indice.maiores(1)[0][1] == max(saldos.values())
+    assert len(indice.entre(0, 10 ** 12)) == quantidade
@@ -0,0 +1,214 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from dinheiro import para_centavos
+from errors import (
+    LimiteSaqueExcedidoError,
+    LimiteTransferenciaExcedidoError,
+    LimiteDeTransacoesErro,
+)
+
+SAQUE = 0
+TRANSFERENCIA = 1
+
+
+class Limites(NamedTuple):
+    """Limites por conta, em reais; None significa sem limite."""
+    saque_por_operacao: Optional[float] = None
+    saque_diario: Optional[float] = None
+    transferencia_por_operacao: Optional[float] = None
+    transferencia_diaria: Optional[float] = None
+    transacoes_diarias: Optional[int] = None
+
+
+LIMITES_PADRAO = Limites(
+    saque_por_operacao=5_000,
+    saque_diario=10_000,
+    transferencia_por_operacao=20_000,
+    transferencia_diaria=50_000,
+    transacoes_diarias=100,
+)
+
+
+class _Janela:
+    """Totais das últimas 24h de uma conta, em baldes de uma hora."""
+
+    __slots__ = ("balde", "valores", "quantidades", "total_valores", "total_quantidade")
+
+    def __init__(self, baldes: int, balde_atual: int):
+        self.balde = balde_atual
+        # valores[tipo][i]: centavos movimentados no balde i; quantidades[i]: operações
+        self.valores = ([0] * baldes, [0] * baldes)
+        self.quantidades = [0] * baldes
+        self.total_valores = [0, 0]
+        self.total_quantidade = 0
+
+    def avancar(self, balde_atual: int):
+        """Esvazia os baldes que saíram da janela desde a última operação."""
+        baldes = len(self.quantidades)
+        passos = balde_atual - self.balde
+        if passos <= 0:
+            return
+        if passos >= baldes:
+            for valores in self.valores:
+                valores[:] = [0] * baldes
+            self.quantidades[:] = [0] * baldes
+            self.total_valores = [0, 0]
+            self.total_quantidade = 0
+        else:
+            for balde in range(self.balde + 1, balde_atual + 1):
+                i = balde % baldes
+                for tipo in (SAQUE, TRANSFERENCIA):
+                    self.total_valores[tipo] -= self.valores[tipo][i]
+                    self.valores[tipo][i] = 0
+                self.total_quantidade -= self.quantidades[i]
+                self.quantidades[i] = 0
+        self.balde = balde_atual
+
+    def somar(self, balde_atual: int, tipo: int, centavos: int):
+        i = balde_atual % len(self.quantidades)
+        self.valores[tipo][i] += centavos
+        self.total_valores[tipo] += centavos
+        self.quantidades[i] += 1
+        self.total_quantidade += 1
+
+
+class MotorLimites:
+    """Aplica os limites de saque e transferência com janelas deslizantes de 24h.
+
+    Só contas com movimento recente têm estado guardado: a cada operação
+    até duas janelas paradas há mais de 24h são descartadas, então a
+    memória acompanha as contas ativas e não o total de contas.
+    """
+
+    def __init__(self, limites: Limites = LIMITES_PADRAO, largura_balde: float = 3600.0,
+                 baldes: int = 24, relogio=time.time):
+        self._largura = largura_balde
+        self._baldes = baldes
+        self._relogio = relogio
+        self._por_operacao = (
+            None if limites.saque_por_operacao is None else para_centavos(limites.saque_por_operacao),
+            None if limites.transferencia_por_operacao is None else para_centavos(limites.transferencia_por_operacao),
+        )
+        self._diario = (
+            None if limites.saque_diario is None else para_centavos(limites.saque_diario),
+            None if limites.transferencia_diaria is None else para_centavos(limites.transferencia_diaria),
+        )
+        self._quantidade_diaria = limites.transacoes_diarias
+        # numero -> _Janela, na ordem da última atividade (mais antiga primeiro)
+        self._janelas = OrderedDict()
+        self._trava = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._janelas)
+
+    def consumir(self, numero: int, tipo: int, centavos: int):
+        """Verifica os limites da operação e, se couber, a contabiliza.
+
+        Deve ser chamado depois das outras validações da operação, quando
+        nada mais pode falhar.
+        """
+        por_operacao = self._por_operacao[tipo]
+        if por_operacao is not None and centavos > por_operacao:
+            self._recusar(tipo, "por operação")
+
+        # o mesmo que consumir_lote faz com _janela, _verificar e somar, escrito aqui
+        # direto: é o caminho de cada saque e transferência
+        balde = int(self._relogio() // self._largura)
+        with self._trava:
+            janela = self._janelas.get(numero)
+            if janela is None:
+                janela = self._janelas[numero] = _Janela(self._baldes, balde)
+            else:
+                janela.avancar(balde)
+                self._janelas.move_to_end(numero)
+            self._expirar(balde)
+
+            if self._quantidade_diaria is not None and janela.total_quantidade >= self._quantidade_diaria:
+                raise LimiteDeTransacoesErro("Limite diário de transações atingido.")
+            diario = self._diario[tipo]
+            if diario is not None and janela.total_valores[tipo] + centavos > diario:
+                self._recusar(tipo, "diário")
+
+            i = balde % self._baldes
+            janela.valores[tipo][i] += centavos
+            janela.total_valores[tipo] += centavos
+            janela.quantidades[i] += 1
+            janela.total_quantidade += 1
+
+    def consumir_lote(self, tipo: int, valores: dict, maiores: dict = None):
+        """Como consumir, para várias contas de uma vez (valores: numero -> centavos).
+
+        Cada conta conta como uma operação. Se a conta fez várias
+        operações somadas em valores, maiores (numero -> centavos) traz a
+        maior delas, que é o que o limite por operação verifica; sem
+        maiores, vale o total. Ou todas cabem nos limites e são
+        contabilizadas, ou nenhuma é: o erro diz qual conta recusou.
+        """
+        if not valores:
+            return
+        por_operacao = self._por_operacao[tipo]
+        if por_operacao is not None:
+            for numero, centavos in (maiores if maiores is not None else valores).items():
+                if centavos > por_operacao:
+                    self._recusar(tipo, "por operação", numero)
+
+        balde = int(self._relogio() // self._largura)
+        with self._trava:
+            janelas = [self._janela(numero, balde) for numero in valores]
+            self._expirar(balde)
+            for janela, (numero, centavos) in zip(janelas, valores.items()):
+                self._verificar(janela, tipo, centavos, numero)
+            for janela, centavos in zip(janelas, valores.values()):
+                janela.somar(balde, tipo, centavos)
+
+    def _janela(self, numero: int, balde: int) -> _Janela:
+        janela = self._janelas.get(numero)
+        if janela is None:
+            janela = self._janelas[numero] = _Janela(self._baldes, balde)
+        else:
+            janela.avancar(balde)
+            self._janelas.move_to_end(numero)
+        return janela
+
+    def _verificar(self, janela: _Janela, tipo: int, centavos: int, numero: int = None):
+        if self._quantidade_diaria is not None and janela.total_quantidade >= self._quantidade_diaria:
+            raise LimiteDeTransacoesErro(f"{_conta(numero)}Limite diário de transações atingido.")
+        diario = self._diario[tipo]
+        if diario is not None and janela.total_valores[tipo] + centavos > diario:
+            self._recusar(tipo, "diário", numero)
+
+    def _expirar(self, balde_atual: int):
+        for _ in range(2):
+            numero = next(iter(self._janelas))
+            if balde_atual - self._janelas[numero].balde < self._baldes:
+                return
+            del self._janelas[numero]
+
+    @staticmethod
+    def _recusar(tipo: int, qual: str, numero: int = None):
+        if tipo == SAQUE:
+            raise LimiteSaqueExcedidoError(f"{_conta(numero)}Saque acima do limite {qual}.")
+        raise LimiteTransferenciaExcedidoError(f"{_conta(numero)}Transferência acima do limite {qual}.")
+
+
+def _conta(numero) -> str:
+    # prefixo das mensagens de consumir_lote, que precisam dizer qual conta foi recusada
+    return "" if numero is None else f"Conta {numero}: "
+
+
+if __name__ == "__main__":
+    # custo por operação: python limites.py [operacoes]
+    import sys
+
+    operacoes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    motor = MotorLimites(Limites(transacoes_diarias=10 ** 12, saque_diario=10 ** 12))
+    contas = 10_000
+
+    inicio = time.perf_counter()
+    for i in range(operacoes):
+        motor.consumir(i % contas, SAQUE, 100)
+    duracao = time.perf_counter() - inicio
+    print(f"consumir: {duracao / operacoes * 1e9:.0f} ns/op com {len(motor)} contas ativas")
@@ -1,4 +1,10 @@
-from banco import Banco
+import sys
+import time
+
+from diario import abrir_banco
+from dinheiro import Dinheiro
+from snapshot import salvar_snapshot
+from limites import MotorLimites
 from errors import (
     BancoError,
     ValorInvalidoError,
@@ -9,10 +15,51 @@ from errors import (
     OperacaoCanceladaError,
     LimiteSaqueExcedidoError,
     LimiteTransferenciaExcedidoError,
+    LimiteDeTransacoesErro,
     ContaJaExisteError,
 )
 
 
+# como cada erro é mostrado ao usuário; erros sem entrada própria usam a da classe mãe
+MENSAGENS_DE_ERRO = {
+    ValueError: "[ERRO] Valor numérico inválido. Tente novamente.",
+    TypeError: "[ERRO] Valor numérico inválido. Tente novamente.",
+    ValorInvalidoError: "[ERRO DE VALOR] {}",
+    SaldoInsuficienteError: "[ERRO DE SALDO] {}",
+    ContaNaoEncontradaError: "[ERRO] Conta não encontrada: {}",
+    NomeObrigatorioError: "[ERRO DE DADOS] {}",
+    OpcaoInvalidaError: "[AVISO] {}",
+    OperacaoCanceladaError: "[INFO] {}",
+    LimiteSaqueExcedidoError: "[ERRO DE LIMITE] {}",
+    LimiteTransferenciaExcedidoError: "[ERRO DE LIMITE] {}",
+    LimiteDeTransacoesErro: "[ERRO DE LIMITE] {}",
+    ContaJaExisteError: "[ERRO DE CONTA] {}",
+    BancoError: "[ERRO DE SISTEMA] {}",
+}
+
+
+def mensagem_de_erro(erro: Exception) -> str:
+    for classe in type(erro).__mro__:
+        modelo = MENSAGENS_DE_ERRO.get(classe)
+        if modelo is not None:
+            return modelo.format(erro)
+    return f"[ERRO] {erro}"
+
+
+def abrir(limites: bool = False):
+    # as operações ficam no diário e são recuperadas na próxima execução; os limites de
+    # saque e transferência (LIMITES_PADRAO) só valem com --limites
+    banco = abrir_banco("Banco do Brasil", "banco.diario", "banco.snapshot")
+    if limites:
+        banco.definir_limites(MotorLimites())
+    return banco
+
+
+def encerrar(banco):
+    salvar_snapshot(banco, "banco.snapshot")
+    banco.fechar()
+
+
 def mostrar_menu():
     print("\n=== Banco do Brasil ===")
     print("1 - Criar nova conta")
@@ -21,176 +68,263 @@ def mostrar_menu():
     print("4 - Sacar")
     print("5 - Transferir")
     print("6 - Alterar nome do titular")
+    print("7 - Buscar cliente pelo nome")
     print("0 - Sair")
 
 
-def main():
-    banco = Banco("Banco do Brasil")
+def main(limites: bool = False):
+    """Modo interativo: python main.py [--limites]."""
+    banco = abrir(limites)
 
-    while True:
-        try:
-            mostrar_menu()
-            opcao = input("Escolha uma opção: ").strip()
+    # o snapshot é gravado e o diário fechado em qualquer saída: opção 0, fim da
+    # entrada (EOFError) ou uma interrupção fora de uma operação
+    try:
+        while True:
+            try:
+                mostrar_menu()
+                opcao = input("Escolha uma opção: ").strip()
 
-            if opcao == "0":
-                print("\nSaindo... Obrigado por usar o Banco do Brasil!")
-                break
+                if opcao == "0":
+                    print("\nSaindo... Obrigado por usar o Banco do Brasil!")
+                    break
 
-            if opcao == "1":
-                nome = input("Nome do titular: ").strip()
-                if not nome:
-                    raise NomeObrigatorioError("O nome do titular não pode ser vazio.")
+                if opcao == "1":
+                    nome = input("Nome do titular: ").strip()
+                    if not nome:
+                        raise NomeObrigatorioError("O nome do titular não pode ser vazio.")
 
-                saldo_str = input("Saldo inicial (vazio para 0): ").strip()
+                    saldo_str = input("Saldo inicial (vazio para 0): ").strip()
 
-                if saldo_str == "0":
-                    raise ValorInvalidoError(
-                        "O saldo inicial não pode ser zero. Deixe em branco para usar o padrão."
-                    )
+                    if saldo_str == "0":
+                        raise ValorInvalidoError(
+                            "O saldo inicial não pode ser zero. Deixe em branco para usar o padrão."
+                        )
 
-                saldo = float(saldo_str) if saldo_str else 0.0
-                conta = banco.criar_conta(nome, saldo)
+                    # o texto digitado vira centavos direto, sem passar por float
+                    saldo = Dinheiro(saldo_str) if saldo_str else 0
+                    conta = banco.criar_conta(nome, saldo)
 
-                print("\n[SUCESSO] Conta criada com sucesso!")
-                conta.exibir_resumo()
+                    print("\n[SUCESSO] Conta criada com sucesso!")
+                    conta.exibir_resumo()
 
-            elif opcao == "2":
-                banco.listar_contas()
+                elif opcao == "2":
+                    banco.listar_contas()
 
         
-            elif opcao == "3":
-                num_str = input("Número da conta (vazio para cancelar): ").strip()
-                if not num_str:
-                    raise OperacaoCanceladaError("Depósito cancelado pelo usuário.")
+                elif opcao == "3":
+                    num_str = input("Número da conta (vazio para cancelar): ").strip()
+                    if not num_str:
+                        raise OperacaoCanceladaError("Depósito cancelado pelo usuário.")
 
-                num = int(num_str)
-                conta = banco.buscar_conta_por_numero(num)
+                    num = int(num_str)
+                    conta = banco.buscar_conta_por_numero(num)
 
-                valor_str = input("Valor do depósito: R$ ").strip()
-                if not valor_str:
-                    raise OperacaoCanceladaError("Depósito cancelado (sem valor informado).")
+                    valor_str = input("Valor do depósito: R$ ").strip()
+                    if not valor_str:
+                        raise OperacaoCanceladaError("Depósito cancelado (sem valor informado).")
 
-                valor = float(valor_str)
-                conta.depositar(valor)
-                print("\n[SUCESSO] Depósito realizado!")
-                conta.exibir_resumo()
+                    valor = Dinheiro(valor_str)
+                    conta.depositar(valor)
+                    print("\n[SUCESSO] Depósito realizado!")
+                    conta.exibir_resumo()
 
     
-            elif opcao == "4":
-                num_str = input("Número da conta (vazio para cancelar): ").strip()
-                if not num_str:
-                    raise OperacaoCanceladaError("Saque cancelado pelo usuário.")
+                elif opcao == "4":
+                    num_str = input("Número da conta (vazio para cancelar): ").strip()
+                    if not num_str:
+                        raise OperacaoCanceladaError("Saque cancelado pelo usuário.")
 
-                num = int(num_str)
-                conta = banco.buscar_conta_por_numero(num)
+                    num = int(num_str)
+                    conta = banco.buscar_conta_por_numero(num)
 
-                valor_str = input("Valor do saque: R$ ").strip()
-                if not valor_str:
-                    raise OperacaoCanceladaError("Saque cancelado (sem valor informado).")
+                    valor_str = input("Valor do saque: R$ ").strip()
+                    if not valor_str:
+                        raise OperacaoCanceladaError("Saque cancelado (sem valor informado).")
 
-                valor = float(valor_str)
-                conta.sacar(valor)
-                print("\n[SUCESSO] Saque realizado!")
-                conta.exibir_resumo()
+                    valor = Dinheiro(valor_str)
+                    conta.sacar(valor)
+                    print("\n[SUCESSO] Saque realizado!")
+                    conta.exibir_resumo()
 
             
-            elif opcao == "5":
-                num_origem_str = input("Número da conta ORIGEM (vazio para cancelar): ").strip()
-                if not num_origem_str:
-                    raise OperacaoCanceladaError("Transferência cancelada (sem conta de origem).")
+                elif opcao == "5":
+                    num_origem_str = input("Número da conta ORIGEM (vazio para cancelar): ").strip()
+                    if not num_origem_str:
+                        raise OperacaoCanceladaError("Transferência cancelada (sem conta de origem).")
 
-                num_origem = int(num_origem_str)
-                conta_origem = banco.buscar_conta_por_numero(num_origem)
+                    num_origem = int(num_origem_str)
+                    conta_origem = banco.buscar_conta_por_numero(num_origem)
 
-                num_destino_str = input("Número da conta DESTINO (vazio para cancelar): ").strip()
-                if not num_destino_str:
-                    raise OperacaoCanceladaError("Transferência cancelada (sem conta de destino).")
+                    num_destino_str = input("Número da conta DESTINO (vazio para cancelar): ").strip()
+                    if not num_destino_str:
+                        raise OperacaoCanceladaError("Transferência cancelada (sem conta de destino).")
 
-                num_destino = int(num_destino_str)
-                conta_destino = banco.buscar_conta_por_numero(num_destino)
+                    num_destino = int(num_destino_str)
+                    conta_destino = banco.buscar_conta_por_numero(num_destino)
 
-                valor_str = input("Valor da transferência: R$ ").strip()
-                if not valor_str:
-                    raise OperacaoCanceladaError("Transferência cancelada (sem valor informado).")
+                    valor_str = input("Valor da transferência: R$ ").strip()
+                    if not valor_str:
+                        raise OperacaoCanceladaError("Transferência cancelada (sem valor informado).")
 
-                valor = float(valor_str)
+                    valor = Dinheiro(valor_str)
 
-                conta_origem.transferir(conta_destino, valor)
+                    conta_origem.transferir(conta_destino, valor)
 
-                print("\n[SUCESSO] Transferência realizada!")
-                print("Conta ORIGEM:")
-                conta_origem.exibir_resumo()
-                print("Conta DESTINO:")
-                conta_destino.exibir_resumo()
+                    print("\n[SUCESSO] Transferência realizada!")
+                    print("Conta ORIGEM:")
+                    conta_origem.exibir_resumo()
+                    print("Conta DESTINO:")
+                    conta_destino.exibir_resumo()
 
     
-            elif opcao == "6":
-                num_str = input("Número da conta (vazio para cancelar): ").strip()
-                if not num_str:
-                    raise OperacaoCanceladaError("Alteração de nome cancelada pelo usuário.")
-
-                num = int(num_str)
-                conta = banco.buscar_conta_por_numero(num)
-
-                novo_nome = input("Novo nome do titular: ").strip()
-                if not novo_nome:
-                    raise NomeObrigatorioError("O novo nome do titular não pode ser vazio.")
-
-                conta.titular.nome = novo_nome
-                print("\n[SUCESSO] Nome do titular alterado!")
-                conta.exibir_resumo()
-
-            else:
+                elif opcao == "6":
+                    num_str = input("Número da conta (vazio para cancelar): ").strip()
+                    if not num_str:
+                        raise OperacaoCanceladaError("Alteração de nome cancelada pelo usuário.")
+
+                    num = int(num_str)
+                    banco.buscar_conta_por_numero(num)
+
+                    novo_nome = input("Novo nome do titular: ").strip()
+                    if not novo_nome:
+                        raise NomeObrigatorioError("O novo nome do titular não pode ser vazio.")
+
+                    # só esta conta muda de titular; as outras contas do titular atual ficam com ele
+                    conta = banco.renomear_titular(num, novo_nome)
+                    print("\n[SUCESSO] Nome do titular alterado!")
+                    conta.exibir_resumo()
+
+                elif opcao == "7":
+                    prefixo = input("Início do nome (vazio para cancelar): ").strip()
+                    if not prefixo:
+                        raise OperacaoCanceladaError("Busca cancelada pelo usuário.")
+
+                    clientes = banco.buscar_clientes(prefixo)
+                    if not clientes:
+                        print(f"\nNenhum cliente com nome começando por '{prefixo}'.")
+                    for cliente in clientes:
+                        print(f"\n{cliente.nome}:")
+                        for conta in banco.contas_do_cliente(cliente):
+                            conta.exibir_resumo()
+
+                else:
                 
-                raise OpcaoInvalidaError(f"A opção '{opcao}' não é válida. Tente novamente.")
+                    raise OpcaoInvalidaError(f"A opção '{opcao}' não é válida. Tente novamente.")
 
         
 
-        except (ValueError, TypeError):
-            print("\n[ERRO] Valor numérico inválido. Tente novamente.")
+            except (ValueError, TypeError, BancoError) as e:
+                print(f"\n{mensagem_de_erro(e)}")
 
-        except ValorInvalidoError as e:
-            print(f"\n[ERRO DE VALOR] {e}")
-
-        except SaldoInsuficienteError as e:
-            print(f"\n[ERRO DE SALDO] {e}")
-
-        except ContaNaoEncontradaError as e:
-            print(f"\n[ERRO] Conta não encontrada: {e}")
-
-        except NomeObrigatorioError as e:
-            print(f"\n[ERRO DE DADOS] {e}")
-
-        except OpcaoInvalidaError as e:
-            print(f"\n[AVISO] {e}")
-
-        except OperacaoCanceladaError as e:
-            print(f"\n[INFO] {e}")
-
-        except LimiteSaqueExcedidoError as e:
-            print(f"\n[ERRO DE LIMITE] {e}")
-
-        except LimiteTransferenciaExcedidoError as e:
-            print(f"\n[ERRO DE LIMITE] {e}")
-
-        except ContaJaExisteError as e:
-            print(f"\n[ERRO DE CONTA] {e}")
-
-        except BancoError as e:
-            print(f"\n[ERRO DE SISTEMA] {e}")
+            except EOFError:
+                print("\nFim da entrada. Saindo...")
+                break
 
-        except KeyboardInterrupt as e:
-            print(f"\n[ERRO] {e.__class__}: Operação interrompida pelo usuário.")
-            print("Se quiser sair do sistema, escolha a opção 0 no menu.")
+            except KeyboardInterrupt as e:
+                print(f"\n[ERRO] {e.__class__}: Operação interrompida pelo usuário.")
+                print("Se quiser sair do sistema, escolha a opção 0 no menu.")
 
-        else:
+            else:
         
-            if opcao not in {"1", "3", "4", "5", "6"}:
-                print("Operação realizada com sucesso (sem erros).")
-
-        finally:
-            print("Retornando ao menu principal...")
+                if opcao not in {"1", "3", "4", "5", "6", "7"}:
+                    print("Operação realizada com sucesso (sem erros).")
+
+            finally:
+                print("Retornando ao menu principal...")
+    finally:
+        encerrar(banco)
+
+
+USOS = {
+    "criar": "criar <saldo_inicial> <nome do titular>",
+    "depositar": "depositar <conta> <valor>",
+    "sacar": "sacar <conta> <valor>",
+    "transferir": "transferir <origem> <destino> <valor>",
+    "renomear": "renomear <conta> <novo nome do titular>",
+}
+_LINHAS_POR_ESCRITA = 10_000
+
+
+def executar_lote(banco, linhas, saida) -> tuple:
+    """Executa um comando por linha (ver USOS) e retorna (comandos, erros).
+
+    Linhas vazias e começadas por # são ignoradas. Cada erro vira uma
+    linha "linha N: <mensagem>" na saida, com a mesma mensagem do modo
+    interativo, e a execução segue para o próximo comando. As contas
+    criadas são informadas como "linha N: conta <numero>". A saída é
+    acumulada e escrita em blocos.
+    """
+    buscar = banco.buscar_conta_por_numero
+    pendentes = []
+    comandos = erros = 0
+    for numero_linha, linha in enumerate(linhas, 1):
+        partes = linha.split()
+        if not partes or partes[0].startswith("#"):
+            continue
+        comandos += 1
+        comando = partes[0]
+        try:
+            uso = USOS.get(comando)
+            if uso is None:
+                raise OpcaoInvalidaError(f"O comando '{comando}' não é válido (use {', '.join(USOS)}).")
+            if len(partes) < uso.count("<") + 1:
+                raise OpcaoInvalidaError(f"Uso: {uso}")
+
+            # os valores vão do texto direto para centavos (Dinheiro), sem passar por float
+            if comando == "depositar":
+                buscar(int(partes[1])).depositar(Dinheiro(partes[2]))
+            elif comando == "sacar":
+                buscar(int(partes[1])).sacar(Dinheiro(partes[2]))
+            elif comando == "transferir":
+                buscar(int(partes[1])).transferir(buscar(int(partes[2])), Dinheiro(partes[3]))
+            elif comando == "criar":
+                conta = banco.criar_conta(" ".join(partes[2:]), Dinheiro(partes[1]))
+                pendentes.append(f"linha {numero_linha}: conta {conta.numero}")
+            else:
+                banco.renomear_titular(int(partes[1]), " ".join(partes[2:]))
+        except (ValueError, TypeError, BancoError) as e:
+            erros += 1
+            pendentes.append(f"linha {numero_linha}: {mensagem_de_erro(e)}")
+        if len(pendentes) >= _LINHAS_POR_ESCRITA:
+            saida.write("\n".join(pendentes) + "\n")
+            pendentes.clear()
+    if pendentes:
+        saida.write("\n".join(pendentes) + "\n")
+    return comandos, erros
+
+
+def main_lote(caminho: str, limites: bool = False) -> int:
+    """Modo em lote: python main.py --lote [--limites] [arquivo] (sem arquivo ou "-", lê da entrada padrão).
+
+    Usa o mesmo banco (diário e snapshot) do modo interativo e, como ele,
+    só aplica os limites de saque e transferência com --limites: com
+    LIMITES_PADRAO, a 101ª operação de uma conta no dia já seria recusada.
+    A vazão informada é a dos comandos que deram certo. Termina com
+    código 1 se algum comando falhou.
+    """
+    banco = abrir(limites)
+    inicio = time.perf_counter()
+    try:
+        if caminho == "-":
+            comandos, erros = executar_lote(banco, sys.stdin, sys.stdout)
+        else:
+            with open(caminho, encoding="utf-8", buffering=1 << 20) as arquivo:
+                comandos, erros = executar_lote(banco, arquivo, sys.stdout)
+    finally:
+        encerrar(banco)
+    duracao = time.perf_counter() - inicio
+    # comandos recusados custam pouco e inflariam a vazão: só os que deram certo contam
+    feitos = comandos - erros
+    print(f"{comandos} comandos, {erros} com erro, em {duracao:.2f}s "
+          f"({feitos / duracao * 60 if duracao else 0:,.0f} feitos/min)", file=sys.stderr)
+    return 1 if erros else 0
 
 
 if __name__ == "__main__":
-    main()
+    argumentos = sys.argv[1:]
+    limites = "--limites" in argumentos
+    if limites:
+        argumentos.remove("--limites")
+    if argumentos and argumentos[0] == "--lote":
+        sys.exit(main_lote(argumentos[1] if len(argumentos) > 1 else "-", limites))
+    main(limites)
@@ -0,0 +1,297 @@
+import functools
+import os
+import time
+
+from banco import Banco
+from conta import ContaBancaria
+from errors import BancoError
+
+# operações medidas: nome -> (classe, método)
+OPERACOES = {
+    "depositar": (ContaBancaria, "depositar"),
+    "sacar": (ContaBancaria, "sacar"),
+    "transferir": (ContaBancaria, "transferir"),
+    "transferir_em_lote": (Banco, "transferir_em_lote"),
+    "criar_conta": (Banco, "criar_conta"),
+    "buscar_conta": (Banco, "buscar_conta_por_numero"),
+}
+
+# limites (em segundos) dos baldes exportados no formato do Prometheus
+LIMITES_PROMETHEUS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_BITS = 5  # bits de mantissa: cada potência de 2 tem 32 baldes, erro relativo de até ~3%
+_SUB = 1 << _BITS
+_MAIOR_DESLOCAMENTO = 40 - _BITS
+_LIMITE = 1 << (_MAIOR_DESLOCAMENTO + _BITS + 1)  # 2**41 ns (~37 min): daqui para cima, transbordo
+_TRANSBORDO = (_MAIOR_DESLOCAMENTO + 2) * _SUB  # balde só dos valores >= _LIMITE, depois do último normal
+
+
+def _indice(valor: int) -> int:
+    deslocamento = valor.bit_length() - (_BITS + 1)
+    if deslocamento <= 0:
+        return valor
+    if deslocamento > _MAIOR_DESLOCAMENTO:
+        return _TRANSBORDO
+    return (deslocamento << _BITS) + (valor >> deslocamento)
+
+
+def _limite_inferior(indice: int) -> int:
+    deslocamento = max(0, indice // _SUB - 1)
+    return (indice - (deslocamento << _BITS)) << deslocamento
+
+
+def _limite_superior(indice: int) -> int:
+    deslocamento = max(0, indice // _SUB - 1)
+    return ((indice - (deslocamento << _BITS) + 1) << deslocamento) - 1
+
+
+class Histograma:
+    """Histograma de latências em nanossegundos, no estilo HDR.
+
+    Os baldes são log-lineares: cada potência de 2 é dividida em 32
+    partes iguais, então qualquer percentil (e o máximo) sai com erro
+    relativo de no máximo ~3%, com memória fixa e registro O(1). Valores
+    de 2**41 ns ou mais vão para um balde de transbordo, separado dos
+    outros; dele só se guarda o maior valor, que é o que um percentil ou
+    o máximo que caia nele devolve.
+    """
+
+    __slots__ = ("contagens", "soma", "maior_transbordo")
+
+    def __init__(self):
+        self.contagens = [0] * (_TRANSBORDO + 1)
+        self.soma = 0
+        self.maior_transbordo = 0
+
+    def registrar(self, nanossegundos: int):
+        indice = _indice(nanossegundos)
+        self.contagens[indice] += 1
+        self.soma += nanossegundos
+        if indice == _TRANSBORDO and nanossegundos > self.maior_transbordo:
+            self.maior_transbordo = nanossegundos
+
+    def _superior(self, indice: int) -> int:
+        return self.maior_transbordo if indice == _TRANSBORDO else _limite_superior(indice)
+
+    @property
+    def quantidade(self) -> int:
+        return sum(self.contagens)
+
+    @property
+    def maximo(self) -> int:
+        for indice in range(len(self.contagens) - 1, -1, -1):
+            if self.contagens[indice]:
+                return self._superior(indice)
+        return 0
+
+    def percentil(self, p: float) -> int:
+        """Valor (em ns) abaixo do qual estão p% das medidas."""
+        quantidade = self.quantidade
+        if not quantidade:
+            return 0
+        alvo = max(1, -(-quantidade * p // 100))
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return self._superior(indice)
+        return 0
+
+    def ate(self, nanossegundos: int) -> int:
+        """Quantas medidas foram de no máximo nanossegundos (aproximado pelo balde)."""
+        total = 0
+        for indice, contagem in enumerate(self.contagens):
+            inferior = _LIMITE if indice == _TRANSBORDO else _limite_inferior(indice)
+            if contagem and inferior <= nanossegundos:
+                total += contagem
+        return total
+
+
+class Metricas:
+    """Contadores, histogramas de latência e erros por tipo das operações do banco.
+
+    Enquanto desativada, nada é medido e nada custa: ativar() troca os
+    métodos de OPERACOES por versões medidas e desativar() devolve os
+    originais. Só uma instância pode estar ativa por vez, porque a troca
+    vale para a classe inteira.
+
+    Chamadas e erros são sempre contados; a latência é medida em uma a
+    cada amostragem chamadas, porque ler o relógio e registrar no
+    histograma custam mais que as operações mais rápidas (uma busca por
+    número leva ~60 ns). Os contadores usam += sem trava; com várias
+    threads alguma contagem isolada pode se perder.
+    """
+
+    _ativa = None
+
+    def __init__(self, amostragem: int = 8):
+        self.amostragem = amostragem
+        self.histogramas = {nome: Histograma() for nome in OPERACOES}
+        self.chamadas = {nome: [0] for nome in OPERACOES}  # lista de um item: o contador muda no lugar
+        self.erros = {}  # (operacao, nome da classe do erro) -> quantidade
+        self._originais = {}
+
+    def ativar(self):
+        if Metricas._ativa is not None:
+            Metricas._ativa.desativar()
+        for nome, (classe, metodo) in OPERACOES.items():
+            original = classe.__dict__[metodo]
+            self._originais[nome] = original
+            setattr(classe, metodo, self._medido(nome, original))
+        Metricas._ativa = self
+        return self
+
+    def desativar(self):
+        for nome, original in self._originais.items():
+            classe, metodo = OPERACOES[nome]
+            setattr(classe, metodo, original)
+        self._originais.clear()
+        if Metricas._ativa is self:
+            Metricas._ativa = None
+
+    def __enter__(self):
+        return self.ativar()
+
+    def __exit__(self, *exc):
+        self.desativar()
+
+    def _medido(self, nome: str, funcao):
+        histograma = self.histogramas[nome]
+        contagens = histograma.contagens
+        chamadas = self.chamadas[nome]
+        amostragem = self.amostragem
+        erros = self.erros
+        relogio = time.perf_counter_ns
+
+        def contar_erro(erro):
+            chave = (nome, type(erro).__name__)
+            erros[chave] = erros.get(chave, 0) + 1
+
+        @functools.wraps(funcao)
+        def medido(*args, **kwargs):
+            chamadas[0] += 1
+            if chamadas[0] % amostragem:
+                try:
+                    return funcao(*args, **kwargs)
+                except BancoError as e:
+                    contar_erro(e)
+                    raise
+            inicio = relogio()
+            try:
+                return funcao(*args, **kwargs)
+            except BancoError as e:
+                contar_erro(e)
+                raise
+            finally:
+                # Histograma.registrar escrito aqui dentro: é uma chamada a menos por medida
+                duracao = relogio() - inicio
+                deslocamento = duracao.bit_length() - (_BITS + 1)
+                if deslocamento <= 0:
+                    contagens[duracao] += 1
+                elif deslocamento <= _MAIOR_DESLOCAMENTO:
+                    contagens[(deslocamento << _BITS) + (duracao >> deslocamento)] += 1
+                else:
+                    contagens[_TRANSBORDO] += 1
+                    if duracao > histograma.maior_transbordo:
+                        histograma.maior_transbordo = duracao
+                histograma.soma += duracao
+
+        return medido
+
+    def resumo(self) -> dict:
+        """Por operação: chamadas, erros por tipo e, das medidas, média, p50, p99, p99.9 e máximo (em ns)."""
+        resumo = {}
+        for nome, histograma in self.histogramas.items():
+            quantidade = histograma.quantidade
+            resumo[nome] = {
+                "chamadas": self.chamadas[nome][0],
+                "medidas": quantidade,
+                "media": histograma.soma // quantidade if quantidade else 0,
+                "p50": histograma.percentil(50),
+                "p99": histograma.percentil(99),
+                "p99.9": histograma.percentil(99.9),
+                "maximo": histograma.maximo,
+                "erros": {erro: n for (operacao, erro), n in self.erros.items() if operacao == nome},
+            }
+        return resumo
+
+    def prometheus(self) -> str:
+        """As métricas no formato de texto do Prometheus."""
+        linhas = ["# HELP banco_operacoes_total Chamadas de cada operação do banco.",
+                  "# TYPE banco_operacoes_total counter"]
+        for nome, chamadas in self.chamadas.items():
+            linhas.append(f'banco_operacoes_total{{operacao="{nome}"}} {chamadas[0]}')
+        linhas.append("# HELP banco_operacao_segundos Latência das operações do banco (amostrada).")
+        linhas.append("# TYPE banco_operacao_segundos histogram")
+        for nome, histograma in self.histogramas.items():
+            for limite in LIMITES_PROMETHEUS:
+                linhas.append(
+                    f'banco_operacao_segundos_bucket{{operacao="{nome}",le="{limite:g}"}} '
+                    f"{histograma.ate(int(limite * 1e9))}"
+                )
+            linhas.append(f'banco_operacao_segundos_bucket{{operacao="{nome}",le="+Inf"}} {histograma.quantidade}')
+            linhas.append(f'banco_operacao_segundos_sum{{operacao="{nome}"}} {histograma.soma / 1e9:.9f}')
+            linhas.append(f'banco_operacao_segundos_count{{operacao="{nome}"}} {histograma.quantidade}')
+        linhas.append("# HELP banco_erros_total Operações que terminaram em erro, por tipo de erro.")
+        linhas.append("# TYPE banco_erros_total counter")
+        for (nome, erro), quantidade in sorted(self.erros.items()):
+            linhas.append(f'banco_erros_total{{operacao="{nome}",erro="{erro}"}} {quantidade}')
+        return "\n".join(linhas) + "\n"
+
+    def escrever_prometheus(self, caminho: str):
+        """Grava prometheus() em caminho de forma atômica, para o textfile collector do node_exporter."""
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            arquivo.write(self.prometheus())
+        os.replace(temporario, caminho)
+
+
+if __name__ == "__main__":
+    # custo da instrumentação: python metricas.py [operacoes]
+    import random
+    import sys
+    import tempfile
+
+    from errors import SaldoInsuficienteError
+
+    operacoes = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+
+    def carga():
+        banco = Banco("Banco")
+        contas = [banco.criar_conta(f"Cliente {i}", 1_000) for i in range(1_000)]
+        rng = random.Random(3)
+        sorteio = [(rng.randint(1, 1_000), rng.randint(1, 1_000), rng.random()) for _ in range(operacoes)]
+        inicio = time.perf_counter()
+        for numero, outro, escolha in sorteio:
+            conta = banco.buscar_conta_por_numero(contas[0].numero + numero - 1)
+            try:
+                if escolha < 0.4:
+                    conta.depositar(10)
+                elif escolha < 0.7:
+                    conta.sacar(30)
+                else:
+                    conta.transferir(banco.buscar_conta_por_numero(contas[0].numero + outro - 1), 20)
+            except SaldoInsuficienteError:
+                pass
+        return time.perf_counter() - inicio
+
+    carga()  # aquecimento
+    tempos = {"desativada": float("inf"), "ativada, toda chamada": float("inf"), "ativada, 1 a cada 8": float("inf")}
+    # os modos se alternam a cada rodada, para que o ruído da máquina afete todos igual
+    for _ in range(5):
+        tempos["desativada"] = min(tempos["desativada"], carga())
+        with Metricas(amostragem=1):
+            tempos["ativada, toda chamada"] = min(tempos["ativada, toda chamada"], carga())
+        with Metricas() as metricas:
+            tempos["ativada, 1 a cada 8"] = min(tempos["ativada, 1 a cada 8"], carga())
+    for modo, duracao in tempos.items():
+        print(f"{modo}: {duracao / operacoes * 1e9:.0f} ns/op "
+              f"({(duracao / tempos['desativada'] - 1) * 100:+.1f}%)")
+    for nome, dados in metricas.resumo().items():
+        print(f"  {nome}: {dados}")
+    caminho = os.path.join(tempfile.mkdtemp(), "banco.prom")
+    metricas.escrever_prometheus(caminho)
+    print(f"prometheus: {caminho}")
@@ -0,0 +1,167 @@
+import asyncio
+
+from banco import Banco
+from errors import BancoError
+
+
+class ProcessadorTransacoes:
+    """Processa depósitos, saques e transferências de um Banco com asyncio.
+
+    As requisições entram em uma fila limitada (quem envia espera quando
+    ela está cheia) e são consumidas por um único trabalhador, uma de
+    cada vez e na ordem de chegada. Requisições de contas diferentes
+    também não rodam ao mesmo tempo: as operações da conta são síncronas
+    e não cedem o laço de eventos, então vários trabalhadores (um por
+    grupo de contas, por exemplo) só se revezariam no mesmo fio. O
+    processamento é serializado, e quem protege as contas de outras
+    threads são as travas da própria ContaBancaria; para usar vários
+    núcleos, ver BancoParticionado.
+    A chave opcional das operações é repassada à conta (ver
+    Banco.definir_idempotencia), para que reenvios não valham duas vezes.
+
+        async with ProcessadorTransacoes(banco) as processador:
+            await processador.depositar(1, 100)
+    """
+
+    def __init__(self, banco: Banco, capacidade: int = 10_000):
+        self.banco = banco
+        self._fila = asyncio.Queue(maxsize=capacidade)
+        self._trabalhador = None
+        self._aceitando = False
+        # quem já passou da checagem de _aceitando e ainda não conseguiu pôr na fila
+        self._enviando = 0
+
+    async def __aenter__(self):
+        await self.iniciar()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.encerrar()
+
+    async def iniciar(self):
+        self._aceitando = True
+        self._trabalhador = asyncio.create_task(self._trabalhar())
+
+    async def encerrar(self):
+        """Para de aceitar requisições e espera a fila esvaziar.
+
+        Requisições que estavam esperando espaço na fila quando o
+        encerramento começou também são processadas.
+        """
+        self._aceitando = False
+        while True:
+            await self._fila.join()
+            # cada vaga aberta acorda um dos que esperavam no put, e eles podem ter posto
+            # na fila entre o fim do join e este ponto
+            if not self._enviando and self._fila.empty():
+                break
+            await asyncio.sleep(0)
+        if self._trabalhador is not None:
+            self._trabalhador.cancel()
+            await asyncio.gather(self._trabalhador, return_exceptions=True)
+            self._trabalhador = None
+
+    async def depositar(self, numero: int, valor, chave=None):
+        return await self._enviar(self._depositar, numero, valor, chave)
+
+    async def sacar(self, numero: int, valor, chave=None):
+        return await self._enviar(self._sacar, numero, valor, chave)
+
+    async def transferir(self, origem: int, destino: int, valor, chave=None):
+        return await self._enviar(self._transferir, origem, destino, valor, chave)
+
+    async def _enviar(self, operacao, *args):
+        if not self._aceitando:
+            raise BancoError("O processador não está aceitando requisições.")
+        futuro = asyncio.get_running_loop().create_future()
+        # put espera enquanto a fila estiver cheia (backpressure)
+        self._enviando += 1
+        try:
+            await self._fila.put((operacao, args, futuro))
+        finally:
+            self._enviando -= 1
+        return await futuro
+
+    def _depositar(self, numero, valor, chave):
+        conta = self.banco.buscar_conta_por_numero(numero)
+        conta.depositar(valor, chave)
+        return conta
+
+    def _sacar(self, numero, valor, chave):
+        conta = self.banco.buscar_conta_por_numero(numero)
+        conta.sacar(valor, chave)
+        return conta
+
+    def _transferir(self, origem, destino, valor, chave):
+        conta_origem = self.banco.buscar_conta_por_numero(origem)
+        conta_destino = self.banco.buscar_conta_por_numero(destino)
+        conta_origem.transferir(conta_destino, valor, chave)
+        return conta_origem
+
+    async def _trabalhar(self):
+        fila = self._fila
+        while True:
+            requisicao = await fila.get()
+            # o que já estiver na fila é processado sem voltar ao laço de eventos
+            while True:
+                operacao, args, futuro = requisicao
+                try:
+                    resultado = operacao(*args)
+                except Exception as e:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                else:
+                    if not futuro.done():
+                        futuro.set_result(resultado)
+                finally:
+                    fila.task_done()
+                if fila.empty():
+                    break
+                requisicao = fila.get_nowait()
+
+
+if __name__ == "__main__":
+    # gerador de carga: python processador.py [requisicoes] [contas]
+    import random
+    import sys
+    import time
+
+    requisicoes = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    num_contas = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+
+    async def gerar_carga():
+        banco = Banco("Banco de Carga")
+        numeros = [banco.criar_conta(f"Cliente {i}", 1_000_000).numero for i in range(num_contas)]
+        rng = random.Random(7)
+        latencias = []
+
+        async def requisitar(processador):
+            inicio = time.perf_counter()
+            origem, destino = rng.sample(numeros, 2)
+            try:
+                escolha = rng.random()
+                if escolha < 0.4:
+                    await processador.depositar(origem, 10)
+                elif escolha < 0.8:
+                    await processador.sacar(origem, 10)
+                else:
+                    await processador.transferir(origem, destino, 10)
+            except BancoError:
+                pass
+            latencias.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        async with ProcessadorTransacoes(banco) as processador:
+            lote = 5_000
+            for comeco in range(0, requisicoes, lote):
+                fim = min(comeco + lote, requisicoes)
+                await asyncio.gather(*(requisitar(processador) for _ in range(comeco, fim)))
+        duracao = time.perf_counter() - inicio
+
+        latencias.sort()
+        p50 = latencias[len(latencias) // 2] * 1e3
+        p99 = latencias[int(len(latencias) * 0.99)] * 1e3
+        print(f"{requisicoes} requisições em {duracao:.2f}s ({requisicoes / duracao:,.0f}/s)")
+        print(f"latência p50={p50:.2f} ms  p99={p99:.2f} ms")
+
+    asyncio.run(gerar_carga())
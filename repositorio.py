@@ -0,0 +1,263 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from conta import ContaBancaria
+
+
+class RepositorioMemoria:
+    """Nenhum armazenamento além dos objetos em memória: o comportamento original do Banco.
+
+    As contas existem só no índice do Banco; nada é gravado e nenhuma
+    conta precisa ser carregada de fora.
+    """
+
+    # repositórios duráveis recebem cada operação das contas (registrar_*)
+    duravel = False
+
+    def adicionar_lote(self, linhas):
+        pass
+
+    def buscar(self, numero: int):
+        return None
+
+    def dados(self):
+        return iter(())
+
+    def sincronizar(self):
+        pass
+
+    def fechar(self):
+        pass
+
+
+class RepositorioSQLite:
+    """Contas guardadas num banco SQLite em modo WAL.
+
+    O Banco mantém em memória só as contas já usadas; as outras são
+    lidas do SQLite na primeira busca. As leituras usam um pool de
+    conexões, e no modo WAL os leitores não esperam o escritor.
+
+    As escritas (contas novas e movimentos) são assíncronas: ficam
+    pendentes em memória e vão para o banco com executemany numa única
+    transação quando há tamanho_lote pendências ou quando intervalo
+    segundos se passaram desde o último commit. Os movimentos pendentes de uma mesma
+    conta são somados antes, e as duas pernas de uma transferência sempre
+    entram no mesmo commit. Um fio de fundo faz o commit por tempo mesmo
+    sem novas operações, então nada fica pendente por muito mais que
+    intervalo segundos. sincronizar() força o commit; só o que já foi
+    gravado é durável.
+    """
+
+    duravel = True
+
+    def __init__(self, caminho: str, leitores: int = 4, tamanho_lote: int = 10_000, intervalo: float = 0.05):
+        self.caminho = caminho
+        self._tamanho_lote = tamanho_lote
+        self._intervalo = intervalo
+        self._novas = []  # (numero, nome, centavos)
+        self._movimentos = {}  # numero -> soma dos centavos movimentados
+        self._titulares = {}  # numero -> nome do titular, das contas que mudaram de titular
+        self._pendentes = 0
+        self._ultimo_commit = time.monotonic()
+        self._trava = threading.Lock()
+
+        self._escritor = self._conectar()
+        self._escritor.execute("PRAGMA journal_mode=WAL")
+        # no WAL, synchronous=NORMAL só faz fsync nos checkpoints; cada commit continua atômico
+        self._escritor.execute("PRAGMA synchronous=NORMAL")
+        self._escritor.execute(
+            "CREATE TABLE IF NOT EXISTS contas ("
+            "numero INTEGER PRIMARY KEY, titular TEXT NOT NULL, saldo INTEGER NOT NULL)"
+        )
+        self._escritor.commit()
+        maior = self._escritor.execute("SELECT max(numero) FROM contas").fetchone()[0]
+        if maior is not None and maior >= ContaBancaria._proximo_numero:
+            ContaBancaria._proximo_numero = maior + 1
+
+        self._leitores = queue.Queue()
+        for _ in range(leitores):
+            self._leitores.put(self._conectar())
+
+        self._parar = threading.Event()
+        self._gravador = threading.Thread(target=self._gravar_periodicamente,
+                                          name=f"repositorio {caminho}", daemon=True)
+        self._gravador.start()
+
+    def _conectar(self):
+        # o sqlite3 guarda os comandos já preparados de cada conexão (cached_statements),
+        # então os SQL fixos abaixo são compilados uma vez só
+        conexao = sqlite3.connect(self.caminho, check_same_thread=False, cached_statements=64)
+        conexao.execute("PRAGMA busy_timeout=5000")
+        return conexao
+
+    @contextmanager
+    def _leitor(self):
+        conexao = self._leitores.get()
+        try:
+            yield conexao
+        finally:
+            self._leitores.put(conexao)
+
+    def buscar(self, numero: int):
+        """Retorna (titular, centavos) da conta gravada, ou None se ela não existe."""
+        with self._leitor() as conexao:
+            return conexao.execute("SELECT titular, saldo FROM contas WHERE numero = ?", (numero,)).fetchone()
+
+    def adicionar_lote(self, linhas):
+        """Grava contas novas a partir de linhas (numero, titular, centavos)."""
+        with self._trava:
+            antes = len(self._novas)
+            self._novas.extend(linhas)
+            self._pendentes += len(self._novas) - antes
+            self._talvez_gravar()
+
+    def registrar_deposito(self, numero: int, centavos: int):
+        self._movimentar(numero, centavos)
+
+    def registrar_saque(self, numero: int, centavos: int):
+        self._movimentar(numero, -centavos)
+
+    def registrar_transferencia(self, origem: int, destino: int, centavos: int):
+        with self._trava:
+            movimentos = self._movimentos
+            movimentos[origem] = movimentos.get(origem, 0) - centavos
+            movimentos[destino] = movimentos.get(destino, 0) + centavos
+            self._pendentes += 1
+            self._talvez_gravar()
+
+    def registrar_lote(self, variacoes: dict):
+        """Os saldos líquidos (numero -> centavos) de uma transferência em lote, todos no mesmo commit."""
+        with self._trava:
+            movimentos = self._movimentos
+            for numero, centavos in variacoes.items():
+                movimentos[numero] = movimentos.get(numero, 0) + centavos
+            self._pendentes += len(variacoes)
+            self._talvez_gravar()
+
+    def registrar_renomeacao(self, numero: int, nome: str):
+        """A conta passou a ser do titular chamado nome."""
+        with self._trava:
+            self._titulares[numero] = nome
+            self._pendentes += 1
+            self._talvez_gravar()
+
+    def _movimentar(self, numero: int, centavos: int):
+        with self._trava:
+            self._movimentos[numero] = self._movimentos.get(numero, 0) + centavos
+            self._pendentes += 1
+            self._talvez_gravar()
+
+    def _talvez_gravar(self):
+        if (self._pendentes >= self._tamanho_lote
+                or time.monotonic() - self._ultimo_commit >= self._intervalo):
+            self._gravar()
+
+    def _gravar(self):
+        if self._novas or self._movimentos or self._titulares:
+            with self._escritor:  # uma transação: commit no fim, rollback se falhar
+                if self._novas:
+                    self._escritor.executemany(
+                        "INSERT INTO contas (numero, titular, saldo) VALUES (?, ?, ?)", self._novas
+                    )
+                if self._movimentos:
+                    self._escritor.executemany(
+                        "UPDATE contas SET saldo = saldo + ? WHERE numero = ?",
+                        [(centavos, numero) for numero, centavos in self._movimentos.items() if centavos],
+                    )
+                if self._titulares:
+                    # depois dos INSERT: a conta pode ter sido aberta e renomeada no mesmo lote
+                    self._escritor.executemany(
+                        "UPDATE contas SET titular = ? WHERE numero = ?",
+                        [(nome, numero) for numero, nome in self._titulares.items()],
+                    )
+            self._novas.clear()
+            self._movimentos.clear()
+            self._titulares.clear()
+        self._pendentes = 0
+        self._ultimo_commit = time.monotonic()
+
+    def _gravar_periodicamente(self):
+        # sem operações novas, _talvez_gravar não é chamado e as pendências ficariam paradas
+        while not self._parar.wait(self._intervalo):
+            with self._trava:
+                if self._pendentes and time.monotonic() - self._ultimo_commit >= self._intervalo:
+                    self._gravar()
+
+    def sincronizar(self):
+        """Grava no SQLite tudo o que está pendente."""
+        with self._trava:
+            self._gravar()
+
+    def dados(self):
+        """Percorre (numero, titular, centavos) de todas as contas, em ordem de número, direto do SQLite."""
+        self.sincronizar()
+        with self._leitor() as conexao:
+            yield from conexao.execute("SELECT numero, titular, saldo FROM contas ORDER BY numero")
+
+    def fechar(self):
+        self._parar.set()
+        self._gravador.join()
+        self.sincronizar()
+        self._escritor.close()
+        while not self._leitores.empty():
+            self._leitores.get().close()
+
+
+if __name__ == "__main__":
+    # operações por segundo nos dois repositórios: python repositorio.py [contas]
+    import os
+    import random
+    import sys
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    from banco import Banco
+
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    operacoes = 100_000
+    caminho = os.path.join(tempfile.mkdtemp(), "banco.sqlite3")
+
+    def medir(rotulo, funcao, vezes):
+        inicio = time.perf_counter()
+        funcao()
+        duracao = time.perf_counter() - inicio
+        print(f"  {rotulo}: {vezes / duracao:,.0f}/s")
+
+    backends = (("memória", RepositorioMemoria), ("sqlite", lambda: RepositorioSQLite(caminho)))
+    for rotulo, novo_repositorio in backends:
+        print(f"{rotulo}, {quantidade} contas")
+        ContaBancaria._proximo_numero = 1
+        banco = Banco("Banco", novo_repositorio())
+        medir("abertura em lote", lambda: banco.criar_contas_em_lote(
+            (f"Cliente {i}", 1_000) for i in range(quantidade)
+        ), quantidade)
+        banco._repositorio.sincronizar()
+        if banco._repositorio.duravel:
+            # reabre para que as buscas venham do SQLite e não dos objetos já criados
+            banco.fechar()
+            banco = Banco("Banco", novo_repositorio())
+
+        rng = random.Random(7)
+        numeros = [rng.randint(1, quantidade) for _ in range(operacoes)]
+        medir("busca (1 thread)", lambda: [banco.buscar_conta_por_numero(n) for n in numeros], operacoes)
+        if banco._repositorio.duravel:
+            banco.fechar()
+            banco = Banco("Banco", novo_repositorio())
+            # cada thread usa uma conexão do pool de leitura
+            with ThreadPoolExecutor(4) as executor:
+                medir("busca (4 threads)", lambda: list(
+                    executor.map(banco.buscar_conta_por_numero, numeros, chunksize=1_000)
+                ), operacoes)
+
+        pares = [(rng.randint(1, quantidade), rng.randint(1, quantidade)) for _ in range(operacoes)]
+
+        def transferir():
+            for origem, destino in pares:
+                banco.buscar_conta_por_numero(origem).transferir(banco.buscar_conta_por_numero(destino), 1)
+            banco._repositorio.sincronizar()
+        medir("transferência", transferir, operacoes)
+        medir("abertura de conta", lambda: [banco.criar_conta("Novo", 10) for _ in range(operacoes)], operacoes)
+        banco.fechar()
@@ -0,0 +1,207 @@
+import heapq
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+
+from conta import ContaBancaria
+
+# cabeçalho: assinatura, versão, quantidade de contas, próximo número,
+# posição do diário coberta pelo snapshot
+_CABECALHO = struct.Struct("<4sHQQQ")
+_ASSINATURA = b"BNCS"
+_VERSAO = 1
+
+
+class ContasMapeadas:
+    """Contas de um snapshot, lidas sob demanda de um arquivo mapeado com mmap.
+
+    O arquivo tem colunas de tamanho fixo (números, saldos em centavos,
+    posição e tamanho do nome) seguidas da tabela de nomes. Só as páginas
+    das contas consultadas são de fato lidas do disco.
+    """
+
+    def __init__(self, caminho: str):
+        with open(caminho, "rb") as arquivo:
+            if os.fstat(arquivo.fileno()).st_size < _CABECALHO.size:
+                raise ValueError(f"{caminho} não é um snapshot válido.")
+            self._mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        assinatura, versao, quantidade, proximo_numero, posicao_diario = _CABECALHO.unpack_from(self._mapa, 0)
+        # as quatro colunas de tamanho fixo precisam caber no arquivo (um snapshot cortado no meio)
+        if (assinatura != _ASSINATURA or versao != _VERSAO
+                or _CABECALHO.size + 28 * quantidade > len(self._mapa)):
+            self._mapa.close()
+            raise ValueError(f"{caminho} não é um snapshot válido.")
+        self.quantidade = quantidade
+        self.proximo_numero = proximo_numero
+        self.posicao_diario = posicao_diario
+
+        dados = memoryview(self._mapa)
+        inicio = _CABECALHO.size
+        fim_coluna = inicio + 8 * quantidade
+        self._numeros = dados[inicio:fim_coluna].cast("q")
+        inicio, fim_coluna = fim_coluna, fim_coluna + 8 * quantidade
+        self._saldos = dados[inicio:fim_coluna].cast("q")
+        inicio, fim_coluna = fim_coluna, fim_coluna + 8 * quantidade
+        self._posicoes_nome = dados[inicio:fim_coluna].cast("q")
+        inicio, fim_coluna = fim_coluna, fim_coluna + 4 * quantidade
+        self._tamanhos_nome = dados[inicio:fim_coluna].cast("I")
+        self._nomes = dados[fim_coluna:]
+
+    def __len__(self) -> int:
+        return self.quantidade
+
+    def _dados(self, indice: int):
+        posicao = self._posicoes_nome[indice]
+        nome = bytes(self._nomes[posicao:posicao + self._tamanhos_nome[indice]]).decode("utf-8")
+        return self._numeros[indice], nome, self._saldos[indice]
+
+    def buscar(self, numero: int):
+        """Retorna (numero, nome, centavos) da conta, ou None se ela não está no snapshot."""
+        indice = bisect_left(self._numeros, numero)
+        if indice == self.quantidade or self._numeros[indice] != numero:
+            return None
+        return self._dados(indice)
+
+    def __iter__(self):
+        for indice in range(self.quantidade):
+            yield self._dados(indice)
+
+    def numeros(self):
+        return iter(self._numeros)
+
+    def fechar(self):
+        for coluna in (self._numeros, self._saldos, self._posicoes_nome, self._tamanhos_nome, self._nomes):
+            coluna.release()
+        self._mapa.close()
+
+
+def dados_das_contas(banco):
+    """Percorre (numero, nome, centavos) de todas as contas, sem materializar as do snapshot."""
+    carregadas = banco._contas_por_numero
+    titular_de = banco._clientes.titular_de
+    if banco._repositorio.duravel:
+        # cada operação já foi passada ao repositório: depois de sincronizar, os saldos estão
+        # em dia; os nomes vêm dos titulares, que podem ter mudado depois da gravação
+        for numero, nome, centavos in banco._repositorio.dados():
+            conta = carregadas.get(numero)
+            titular = conta.titular if conta is not None else titular_de(numero)
+            yield numero, nome if titular is None else titular.nome, centavos
+        return
+
+    mapeadas = banco._mapeadas
+
+    def de_objetos(numeros):
+        for numero in numeros:
+            conta = carregadas[numero]
+            yield conta.numero, conta.titular.nome, conta._saldo
+
+    if mapeadas is None:
+        # sem snapshot, o índice do banco já está em ordem de número
+        for conta in carregadas.values():
+            yield conta.numero, conta.titular.nome, conta._saldo
+        return
+
+    def do_snapshot():
+        for dados in mapeadas:
+            conta = carregadas.get(dados[0])
+            if conta is not None:
+                yield conta.numero, conta.titular.nome, conta._saldo
+                continue
+            # conta não carregada de um cliente renomeado depois do snapshot
+            titular = titular_de(dados[0])
+            yield dados if titular is None else (dados[0], titular.nome, dados[2])
+
+    somente_carregadas = sorted(set(carregadas).difference(mapeadas.numeros()))
+    yield from heapq.merge(do_snapshot(), de_objetos(somente_carregadas))
+
+
+def salvar_snapshot(banco, caminho: str):
+    """Grava um snapshot do banco de forma atômica (arquivo temporário + os.replace).
+
+    Se o banco tem diário, o snapshot guarda até onde o diário já está
+    refletido nele. O banco não deve receber operações durante a gravação.
+    """
+    posicao_diario = 0
+    if banco._contexto.diario is not None:
+        banco._contexto.diario.sincronizar()
+        posicao_diario = banco._contexto.diario.posicao()
+
+    numeros = array("q")
+    saldos = array("q")
+    posicoes_nome = array("q")
+    tamanhos_nome = array("I")
+    nomes = bytearray()
+    tabela = {}  # nomes repetidos são gravados uma vez só
+    for numero, nome, centavos in dados_das_contas(banco):
+        nome_bytes = nome.encode("utf-8")
+        posicao = tabela.get(nome_bytes)
+        if posicao is None:
+            posicao = tabela[nome_bytes] = len(nomes)
+            nomes += nome_bytes
+        numeros.append(numero)
+        saldos.append(centavos)
+        posicoes_nome.append(posicao)
+        tamanhos_nome.append(len(nome_bytes))
+
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(_CABECALHO.pack(
+            _ASSINATURA, _VERSAO, len(numeros), ContaBancaria._proximo_numero, posicao_diario
+        ))
+        for coluna in (numeros, saldos, posicoes_nome, tamanhos_nome):
+            coluna.tofile(arquivo)
+        arquivo.write(nomes)
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(temporario, caminho)
+    pasta = os.open(os.path.dirname(os.path.abspath(caminho)), os.O_RDONLY)
+    try:
+        os.fsync(pasta)
+    finally:
+        os.close(pasta)
+
+
+def carregar_snapshot(nome: str, caminho: str):
+    """Abre um Banco a partir de um snapshot; as contas são criadas só quando acessadas."""
+    from banco import Banco
+
+    banco = Banco(nome)
+    mapeadas = ContasMapeadas(caminho)
+    banco._mapeadas = mapeadas
+    if mapeadas.proximo_numero > ContaBancaria._proximo_numero:
+        ContaBancaria._proximo_numero = mapeadas.proximo_numero
+    return banco
+
+
+if __name__ == "__main__":
+    # início a frio: python snapshot.py [contas]
+    import sys
+    import tempfile
+    import time
+
+    from banco import Banco
+
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    caminho = os.path.join(tempfile.mkdtemp(), "banco.snapshot")
+
+    banco = Banco("Banco")
+    banco.criar_contas_em_lote((f"Cliente {i % 50_000}", 100) for i in range(quantidade))
+    alvo = quantidade // 2
+    inicio = time.perf_counter()
+    salvar_snapshot(banco, caminho)
+    print(f"snapshot de {quantidade} contas gravado em {time.perf_counter() - inicio:.2f}s "
+          f"({os.path.getsize(caminho) / quantidade:.1f} bytes/conta)")
+    del banco
+
+    inicio = time.perf_counter()
+    banco = carregar_snapshot("Banco", caminho)
+    banco.buscar_conta_por_numero(alvo)
+    print(f"mmap: primeira busca após {time.perf_counter() - inicio:.4f}s")
+
+    inicio = time.perf_counter()
+    banco = carregar_snapshot("Banco", caminho)
+    banco._carregar_todas()
+    banco.buscar_conta_por_numero(alvo)
+    print(f"desserialização completa: primeira busca após {time.perf_counter() - inicio:.2f}s")
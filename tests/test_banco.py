@@ -0,0 +1,142 @@
+from datetime import datetime
+
+import pytest
+
+from banco import Banco
+from cliente import Cliente
+from conta import ContaBancaria
+from errors import (
+    ContaJaExisteError,
+    LimiteDeTransacoesErro,
+    LimiteSaqueExcedidoError,
+    LimiteTransferenciaExcedidoError,
+    ValorInvalidoError,
+)
+from historico import Historico
+from limites import SAQUE, TRANSFERENCIA, Limites, MotorLimites
+from snapshot import carregar_snapshot, salvar_snapshot
+
+
+@pytest.mark.parametrize("saldo", [0.001, float("inf"), True, "abc"])
+def test_lote_recusa_linha_que_a_conta_recusaria(saldo):
+    banco = Banco("Banco")
+    criadas, erros = banco.criar_contas_em_lote([("A", 10), ("B", saldo), ("C", 5)])
+
+    assert [conta.titular.nome for conta in criadas] == ["A", "C"]
+    assert [indice for indice, _ in erros] == [1]
+    assert isinstance(erros[0][1], ValorInvalidoError)
+    assert banco.contas == criadas
+    assert [float(conta.saldo) for conta in criadas] == [10.0, 5.0]
+
+
+def test_extrato_logo_depois_do_lote():
+    banco = Banco("Banco")
+    pagadora = banco.criar_conta("Empresa", 10_000)
+    pessoas = [banco.criar_conta(f"Pessoa {i}", 1) for i in range(Historico.TAMANHO_BLOCO + 10)]
+    antes = datetime.now()
+    banco.transferir_em_lote([(pagadora.numero, pessoa.numero, 2) for pessoa in pessoas])
+    agora = datetime.now()
+
+    enviadas = list(pagadora.extrato(antes, agora))
+    assert len(enviadas) == len(pessoas) and {l.tipo for l in enviadas} == {"transferencia_enviada"}
+    # todas as pernas têm o mesmo momento, e o extrato só daquele instante traz todas
+    momento = enviadas[0].data
+    assert list(pagadora.extrato(momento, momento)) == enviadas
+    recebida = list(pessoas[-1].extrato(antes, agora))
+    assert [(l.tipo, l.valor, l.contraparte) for l in recebida] == [("transferencia_recebida", 2, pagadora.numero)]
+
+
+def test_lote_respeita_os_limites_de_transferencia():
+    banco = Banco("Banco")
+    motor = MotorLimites(Limites(transferencia_por_operacao=100, transferencia_diaria=150))
+    banco.definir_limites(motor)
+    a, b, c = (banco.criar_conta(nome, 1_000) for nome in "ABC")
+
+    # a envia 90 + 60 e recebe 80: o que conta é o enviado (130), não a variação líquida (70)
+    banco.transferir_em_lote([(a.numero, b.numero, 90), (a.numero, c.numero, 40), (b.numero, a.numero, 80)])
+    assert (a.saldo, b.saldo, c.saldo) == (950, 1_010, 1_040)
+
+    # c passaria do limite por operação: nada é aplicado, nem o consumo de a
+    with pytest.raises(LimiteTransferenciaExcedidoError, match=f"Conta {c.numero}"):
+        banco.transferir_em_lote([(a.numero, b.numero, 10), (c.numero, b.numero, 101)])
+    assert (a.saldo, b.saldo, c.saldo) == (950, 1_010, 1_040)
+    # a já usou 130 dos 150 do dia: mais 20 cabe, 21 não
+    with pytest.raises(LimiteTransferenciaExcedidoError):
+        a.transferir(b, 21)
+    a.transferir(b, 20)
+
+
+def test_pernas_que_se_compensam_nao_escapam_dos_limites():
+    banco = Banco("Banco")
+    banco.definir_limites(MotorLimites(Limites(transferencia_por_operacao=20_000, transferencia_diaria=50_000)))
+    a, b = banco.criar_conta("A", 200_000), banco.criar_conta("B", 200_000)
+
+    # líquido de só 1.000, mas cada perna passa do limite por operação
+    with pytest.raises(LimiteTransferenciaExcedidoError, match=f"Conta {a.numero}"):
+        banco.transferir_em_lote([(a.numero, b.numero, 100_000), (b.numero, a.numero, 99_000)])
+    # várias pernas pequenas: cada uma cabe, mas a soma enviada passa do limite diário
+    with pytest.raises(LimiteTransferenciaExcedidoError, match="diário"):
+        banco.transferir_em_lote([(a.numero, b.numero, 20_000)] * 3 + [(b.numero, a.numero, 19_000)])
+    assert (a.saldo, b.saldo) == (200_000, 200_000)
+
+
+def test_lote_conta_uma_transacao_por_pagadora():
+    banco = Banco("Banco")
+    banco.definir_limites(MotorLimites(Limites(transacoes_diarias=1)))
+    banco.definir_idempotencia()
+    a, b = banco.criar_conta("A", 100), banco.criar_conta("B", 100)
+    banco.transferir_em_lote([(a.numero, b.numero, 10), (a.numero, b.numero, 5)])
+    with pytest.raises(LimiteDeTransacoesErro):
+        banco.transferir_em_lote([(a.numero, b.numero, 1)], chave="lote")
+    # a chave recusada não fica registrada
+    assert "lote" not in banco._contexto.idempotencia
+    assert (a.saldo, b.saldo) == (85, 115)
+
+
+def test_consumir_lote_e_tudo_ou_nada():
+    motor = MotorLimites(Limites(saque_diario=100), relogio=lambda: 0)  # em centavos: 10_000
+    motor.consumir(1, SAQUE, 6_000)
+    motor.consumir_lote(SAQUE, {})
+    with pytest.raises(LimiteSaqueExcedidoError, match="Conta 1"):
+        motor.consumir_lote(SAQUE, {2: 5_000, 1: 5_000})
+    motor.consumir_lote(SAQUE, {2: 10_000, 1: 4_000})
+    assert [motor._janelas[n].total_valores[SAQUE] for n in (1, 2)] == [10_000, 10_000]
+    assert motor._janelas[1].total_valores[TRANSFERENCIA] == 0
+
+
+def test_numeros_escolhidos_e_automaticos_nao_se_repetem(tmp_path):
+    banco = Banco("Banco")
+    escolhido = ContaBancaria._proximo_numero + 2
+    caio = banco.criar_conta("Caio", 30, numero=escolhido)
+    ana = banco.criar_conta("Ana", 10)
+    bia = banco.criar_conta("Bia", 20)
+    assert escolhido < ana.numero < bia.numero
+    # abaixo do maior número já usado: o índice continua em ordem de número
+    davi = banco.criar_conta("Davi", 40, numero=escolhido - 1)
+    assert banco.contas == [davi, caio, ana, bia]
+    with pytest.raises(ContaJaExisteError):
+        banco.criar_conta("Eva", 1, numero=ana.numero)
+    with pytest.raises(ContaJaExisteError):
+        banco._cadastrar(ContaBancaria(Cliente("Eva"), 1, bia.numero))
+    assert banco.buscar_conta_por_numero(bia.numero) is bia
+
+    caminho = str(tmp_path / "banco.snapshot")
+    salvar_snapshot(banco, caminho)
+    carregado = carregar_snapshot("Banco", caminho)
+    for conta in (bia, davi, ana, caio):
+        assert carregado.buscar_conta_por_numero(conta.numero).saldo == conta.saldo
+    assert [c.numero for c in carregado.contas] == [davi.numero, caio.numero, ana.numero, bia.numero]
+
+
+def test_contas_compartilham_o_contexto_do_banco():
+    banco = Banco("Banco")
+    contas, _ = banco.criar_contas_em_lote([("Ana", 100), ("Bia", 100)])
+    assert all(conta._contexto is banco._contexto for conta in contas)
+    # definido depois de abertas, o limite já vale para as contas existentes
+    banco.definir_limites(MotorLimites(Limites(saque_por_operacao=50)))
+    with pytest.raises(LimiteSaqueExcedidoError):
+        contas[0].sacar(60)
+    # uma conta fora de banco não tem nada ligado
+    avulsa = ContaBancaria(Cliente("Caio"), 10)
+    avulsa.sacar(10)
+    assert avulsa._contexto.limites is None and avulsa._contexto is not banco._contexto
@@ -0,0 +1,82 @@
+import pytest
+
+from banco_particionado import BancoParticionado
+from errors import BancoError, ContaNaoEncontradaError, SaldoInsuficienteError
+
+
+def test_erro_inesperado_volta_como_resposta_e_a_particao_continua():
+    with BancoParticionado("Banco", 2) as banco:
+        with pytest.raises(TypeError):
+            banco.criar_conta("Bia", "10")
+        numero = banco.criar_conta("Bia", 10)
+        assert banco.saldo(numero) == 10
+        assert [posicao for posicao, _ in banco.executar_lote([("depositar", numero, "x"),
+                                                              ("depositar", numero, 5)])] == [0]
+        assert banco.saldo(numero) == 15
+
+
+def test_particao_morta_vira_erro_em_vez_de_travar():
+    with BancoParticionado("Banco", 2) as banco:
+        numero = banco.criar_conta("Ana", 10)
+        processo = banco._processos[numero % banco.particoes]
+        processo.kill()
+        processo.join()
+        with pytest.raises(BancoError, match="parou"):
+            banco.saldo(numero)
+        with pytest.raises(BancoError, match="parou"):
+            banco.depositar(numero, 1)
+
+
+def test_transferencia_entre_particoes_desfeita_nas_duas():
+    with BancoParticionado("Banco", 2) as banco:
+        origem = banco.criar_conta("Ana", 10)
+        destino = banco.criar_conta("Bia", 10)
+        assert origem % 2 != destino % 2
+        # a partição de origem recusa o débito: o crédito preparado no destino é descartado
+        with pytest.raises(SaldoInsuficienteError):
+            banco.transferir(origem, destino, 50)
+        # a partição de destino não tem a conta: o débito reservado na origem é devolvido
+        with pytest.raises(ContaNaoEncontradaError):
+            banco.transferir(origem, destino + 2, 5)
+        assert (banco.saldo(origem), banco.saldo(destino)) == (10, 10)
+        banco.transferir(origem, destino, 4)
+        assert (banco.saldo(origem), banco.saldo(destino)) == (6, 14)
+
+
+def _matar_antes_de_confirmar(banco, numero):
+    # entre as duas fases, quando os dois lados já se prepararam, a partição de numero para
+    processo = banco._processos[numero % banco.particoes]
+    enviar = banco._enviar
+
+    def enviar_e_matar(conexao, comando, *args):
+        if comando == "confirmar" and processo.is_alive():
+            processo.kill()
+            processo.join()
+        enviar(conexao, comando, *args)
+
+    banco._enviar = enviar_e_matar
+
+
+def test_origem_que_para_antes_de_confirmar_desfaz_o_destino():
+    with BancoParticionado("Banco", 2) as banco:
+        origem = banco.criar_conta("Ana", 10)
+        destino = banco.criar_conta("Bia", 10)
+        _matar_antes_de_confirmar(banco, origem)
+        with pytest.raises(BancoError, match="parou"):
+            banco.transferir(origem, destino, 4)
+        # o crédito preparado foi descartado, e a partição de destino continua em sincronia
+        assert banco.saldo(destino) == 10
+        assert banco._pedir(banco._conexao(destino), "pendentes") == 0
+        banco.depositar(destino, 1)
+        assert banco.saldo(destino) == 11
+
+
+def test_destino_que_para_antes_de_confirmar_devolve_o_debito():
+    with BancoParticionado("Banco", 2) as banco:
+        origem = banco.criar_conta("Ana", 10)
+        destino = banco.criar_conta("Bia", 10)
+        _matar_antes_de_confirmar(banco, destino)
+        with pytest.raises(BancoError, match="parou"):
+            banco.transferir(origem, destino, 4)
+        assert banco.saldo(origem) == 10
+        assert banco._pedir(banco._conexao(origem), "pendentes") == 0
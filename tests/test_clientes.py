@@ -0,0 +1,123 @@
+import io
+
+import pytest
+
+from banco import Banco
+from diario import abrir_banco
+from errors import ClienteError, ValorInvalidoError
+from main import executar_lote
+from repositorio import RepositorioSQLite
+from snapshot import carregar_snapshot, salvar_snapshot
+
+
+def _banco():
+    banco = Banco("Banco")
+    ana1 = banco.criar_conta("Ana", 10)
+    ana2 = banco.criar_conta("Ana", 20)
+    bia = banco.criar_conta("Bia", 30)
+    return banco, ana1, ana2, bia
+
+
+def test_renomear_titular_muda_so_a_conta_pedida():
+    banco, ana1, ana2, _ = _banco()
+    banco.renomear_titular(ana1.numero, "Ana Maria")
+    assert ana1.titular.nome == "Ana Maria" and ana2.titular.nome == "Ana"
+    assert banco.contas_do_cliente("Ana") == [ana2]
+    assert banco.contas_do_cliente("Ana Maria") == [ana1]
+    assert [c.nome for c in banco.buscar_clientes("ana")] == ["Ana", "Ana Maria"]
+
+
+def test_renomear_titular_para_nome_existente_junta_no_mesmo_cliente():
+    banco, ana1, ana2, bia = _banco()
+    banco.renomear_titular(bia.numero, "Ana")
+    assert bia.titular is ana1.titular
+    assert banco.contas_do_cliente("Ana") == [ana1, ana2, bia]
+    assert banco.buscar_clientes("bia") == [] and banco.contas_do_cliente("Bia") == []
+
+
+def test_cliente_nao_pode_tomar_o_nome_de_outro():
+    banco, ana1, ana2, bia = _banco()
+    with pytest.raises(ClienteError):
+        bia.titular.nome = "Ana"
+    assert bia.titular.nome == "Bia" and banco.contas_do_cliente("Bia") == [bia]
+
+    # um nome livre renomeia o cliente, com todas as contas dele
+    ana1.titular.nome = "Ana Souza"
+    assert banco.contas_do_cliente("Ana Souza") == [ana1, ana2]
+    assert [c.nome for c in banco.buscar_clientes("ana")] == ["Ana Souza"]
+
+
+def test_lote_renomear():
+    banco, ana1, ana2, _ = _banco()
+    saida = io.StringIO()
+    assert executar_lote(banco, [f"renomear {ana2.numero} Ana Lima"], saida) == (1, 0)
+    assert ana1.titular.nome == "Ana" and ana2.titular.nome == "Ana Lima"
+
+
+def test_busca_no_snapshot_nao_carrega_as_contas(tmp_path):
+    caminho = str(tmp_path / "banco.snapshot")
+    banco, ana1, ana2, bia = _banco()
+    salvar_snapshot(banco, caminho)
+
+    carregado = carregar_snapshot("Banco", caminho)
+    (ana,) = carregado.buscar_clientes("an")
+    assert carregado._contas_por_numero == {}
+
+    # renomeado antes de as contas serem carregadas: elas continuam dele
+    ana.nome = "Ana Paula"
+    contas = carregado.contas_do_cliente(ana)
+    assert [c.numero for c in contas] == [ana1.numero, ana2.numero] and all(c.titular is ana for c in contas)
+    assert carregado.buscar_conta_por_numero(bia.numero).titular.nome == "Bia"
+
+    salvar_snapshot(carregado, caminho + "2")
+    de_novo = carregar_snapshot("Banco", caminho + "2")
+    assert [c.titular.nome for c in de_novo.contas] == ["Ana Paula", "Ana Paula", "Bia"]
+
+
+def test_renomear_sobrevive_a_reabrir_pelo_diario(tmp_path):
+    caminho = str(tmp_path / "banco.diario")
+    banco = abrir_banco("Banco", caminho)
+    ana1 = banco.criar_conta("Ana", 10)
+    ana2 = banco.criar_conta("Ana", 20)
+    bia = banco.criar_conta("Bia", 30)
+    banco.renomear_titular(ana1.numero, "Ana Maria")
+    bia.titular.nome = "Beatriz"
+    banco.fechar()
+
+    reaberto = abrir_banco("Banco", caminho)
+    try:
+        assert [c.nome for c in reaberto.buscar_clientes("ana")] == ["Ana", "Ana Maria"]
+        assert [c.numero for c in reaberto.contas_do_cliente("Ana Maria")] == [ana1.numero]
+        assert [c.numero for c in reaberto.contas_do_cliente("Ana")] == [ana2.numero]
+        assert [c.nome for c in reaberto.buscar_clientes("b")] == ["Beatriz"]
+    finally:
+        reaberto.fechar()
+
+
+def test_renomear_sobrevive_a_reabrir_pelo_sqlite(tmp_path):
+    caminho = str(tmp_path / "banco.sqlite3")
+    banco = Banco("Banco", RepositorioSQLite(caminho))
+    ana1 = banco.criar_conta("Ana", 10)
+    ana2 = banco.criar_conta("Ana", 20)
+    bia = banco.criar_conta("Bia", 30)
+    banco.renomear_titular(ana1.numero, "Ana Maria")
+    bia.titular.nome = "Beatriz"
+    banco.fechar()
+
+    reaberto = Banco("Banco", RepositorioSQLite(caminho))
+    try:
+        assert [c.nome for c in reaberto.buscar_clientes("ana")] == ["Ana", "Ana Maria"]
+        assert [c.numero for c in reaberto.contas_do_cliente("Ana Maria")] == [ana1.numero]
+        assert [c.numero for c in reaberto.contas_do_cliente("Ana")] == [ana2.numero]
+        assert reaberto.buscar_conta_por_numero(bia.numero).titular.nome == "Beatriz"
+    finally:
+        reaberto.fechar()
+
+
+@pytest.mark.parametrize("saldo", [0.001, float("inf")])
+def test_abertura_recusada_nao_registra_o_cliente(saldo):
+    banco, *_ = _banco()
+    with pytest.raises(ValorInvalidoError):
+        banco.criar_conta("Fulano", saldo)
+    assert banco.buscar_clientes("Ful") == []
+    assert banco.contas_do_cliente("Fulano") == []
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from cliente import Cliente
+from conta import ContaBancaria
+from errors import ValorInvalidoError
+
+
+def test_abertura_entra_no_historico_so_quando_ele_e_usado():
+    antes = datetime.now() - timedelta(seconds=1)
+    conta = ContaBancaria(Cliente("Ana"), 100)
+    assert conta._historico is None
+    assert conta.saldo == 100
+
+    lancamentos = list(conta.extrato(antes))
+    assert [(l.tipo, l.valor) for l in lancamentos] == [("deposito", 100)]
+    assert conta._historico is None, "o extrato de uma conta parada não deve guardar o histórico"
+
+    conta.sacar(30)
+    lancamentos = list(conta.historico)
+    assert [(l.tipo, l.valor) for l in lancamentos] == [("deposito", 100), ("saque", 30)]
+    assert lancamentos[0].data >= antes
+    assert list(conta.extrato(lancamentos[0].data, lancamentos[0].data))[0].tipo == "deposito"
+
+
+def test_conta_sem_saldo_inicial_nao_tem_lancamentos():
+    conta = ContaBancaria(Cliente("Ana"))
+    assert list(conta.extrato()) == [] and len(conta.historico) == 0
+
+
+def test_abertura_com_menos_de_um_centavo_e_recusada():
+    with pytest.raises(ValorInvalidoError):
+        ContaBancaria(Cliente("Ana"), 0.001)
@@ -0,0 +1,36 @@
+import pytest
+
+from cliente import Cliente
+from conta_store import ContaStore
+from errors import SaldoInsuficienteError, ValorInvalidoError
+
+
+def test_adicionar_nao_cria_trava_nem_historico():
+    store = ContaStore()
+    conta = store.adicionar(Cliente("Ana"), 50)
+    assert conta.saldo == 50
+    assert store._travas == {} and store._historicos == {}
+
+    conta.depositar(10)
+    assert [(l.tipo, l.valor) for l in conta.historico] == [("deposito", 50), ("deposito", 10)]
+    assert store.buscar_conta_por_numero(conta.numero).saldo == 60
+
+
+def test_adicionar_recusa_abertura_menor_que_um_centavo():
+    store = ContaStore()
+    with pytest.raises(ValorInvalidoError):
+        store.adicionar(Cliente("Ana"), 0.001)
+    assert len(store) == 0
+
+
+def test_transferir_entre_duas_visoes_da_mesma_conta():
+    store = ContaStore()
+    store.adicionar(Cliente("Ana"), 100)
+    conta = store.conta(0)
+    mesma = store.buscar_conta_por_numero(conta.numero)
+    assert mesma is not conta
+    # as duas visões usam a mesma trava: adquiri-la duas vezes travaria para sempre
+    conta.transferir(mesma, 10)
+    with pytest.raises(SaldoInsuficienteError):
+        conta.transferir(mesma, 101)
+    assert conta.saldo == 100 and [l.tipo for l in conta.historico] == ["deposito"]
@@ -0,0 +1,117 @@
+import os
+import random
+import subprocess
+import sys
+import textwrap
+
+from conta import ContaBancaria
+from diario import abrir_banco, ler_registros
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_queda_sem_sincronizar_nao_perde_o_que_ficou_no_buffer(tmp_path):
+    # o processo morre sem fechar o diário e sem chamar sincronizar(), depois de ficar
+    # parado mais que o intervalo: só o fio de fundo pode ter gravado os registros
+    caminho = tmp_path / "banco.diario"
+    codigo = textwrap.dedent(f"""
+        import os, time
+        from diario import abrir_banco, ler_registros
+        banco = abrir_banco("Banco", {str(caminho)!r}, intervalo=0.2)
+        conta = banco.criar_conta("Ana", 100)
+        conta.depositar(5)
+        conta.sacar(30)
+        time.sleep(1.0)
+        os._exit(0)
+    """)
+    subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, check=True, timeout=60)
+
+    banco = abrir_banco("Banco", str(caminho))
+    try:
+        assert [conta.saldo for conta in banco.iterar_contas()] == [75]
+    finally:
+        banco.fechar()
+
+
+def _diario_com_operacoes(caminho, estados=None):
+    # estados, se dado, recebe os saldos depois de cada registro gravado (cada operação é um registro)
+    ContaBancaria._proximo_numero = 1
+    banco = abrir_banco("Banco", caminho)
+    contas = []
+    for i in range(50):
+        contas.append(banco.criar_conta(f"Cliente {i}", 1_000))
+        if estados is not None:
+            estados.append({conta.numero: conta._saldo for conta in contas})
+    rng = random.Random(11)
+    for _ in range(2_000):
+        origem, destino = rng.sample(contas, 2)
+        escolha = rng.random()
+        if escolha < 0.4:
+            origem.depositar(5)
+        elif escolha < 0.7:
+            origem.sacar(5)
+        else:
+            origem.transferir(destino, 5)
+        if estados is not None:
+            estados.append({conta.numero: conta._saldo for conta in contas})
+    # um lote vira um registro só: um corte no meio dele descarta o lote inteiro
+    banco.transferir_em_lote((origem.numero, destino.numero, 1)
+                             for origem, destino in (rng.sample(contas, 2) for _ in range(500)))
+    esperado = {conta.numero: conta._saldo for conta in contas}
+    banco.fechar()
+    return esperado
+
+
+def test_recuperacao_completa(tmp_path):
+    caminho = str(tmp_path / "banco.diario")
+    esperado = _diario_com_operacoes(caminho)
+    banco = abrir_banco("Banco", caminho)
+    assert {conta.numero: conta._saldo for conta in banco.iterar_contas()} == esperado
+    banco.fechar()
+
+
+def test_recuperacao_apos_cortes_no_meio_de_registros(tmp_path):
+    # cada corte simula uma queda no meio de uma gravação: a recuperação para no
+    # último registro completo e continua gravando depois dele
+    caminho = str(tmp_path / "banco.diario")
+    _diario_com_operacoes(caminho)
+    with open(caminho, "rb") as arquivo:
+        original = arquivo.read()
+    fins = [posicao for _, _, posicao in ler_registros(caminho)]
+    for corte in sorted(random.Random(3).sample(range(1, len(original)), 20)):
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(original[:corte])
+        ContaBancaria._proximo_numero = 1
+        banco = abrir_banco("Banco", caminho)
+        # o diário fica cortado no fim do último registro inteiro antes do corte
+        assert os.path.getsize(caminho) == max((fim for fim in fins if fim <= corte), default=0)
+        conta = banco.criar_conta("Depois da queda", 1)
+        banco.fechar()
+        reaberto = abrir_banco("Banco", caminho)
+        assert reaberto.buscar_conta_por_numero(conta.numero).saldo == 1
+        reaberto.fechar()
+
+
+def test_byte_corrompido_interrompe_a_recuperacao(tmp_path):
+    caminho = str(tmp_path / "banco.diario")
+    estados = []
+    estados.append(_diario_com_operacoes(caminho, estados))
+    fins = [posicao for _, _, posicao in ler_registros(caminho)]
+    assert len(fins) == len(estados) == 50 + 2_000 + 1
+    with open(caminho, "rb") as arquivo:
+        corrompido = bytearray(arquivo.read())
+    meio = len(corrompido) // 2
+    corrompido[meio] ^= 0xFF
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(corrompido)
+    # valem exatamente os registros que terminam antes do byte corrompido
+    inteiros = sum(1 for fim in fins if fim <= meio)
+
+    ContaBancaria._proximo_numero = 1
+    banco = abrir_banco("Banco", caminho)
+    try:
+        assert os.path.getsize(caminho) == fins[inteiros - 1]
+        assert sum(1 for _ in ler_registros(caminho)) == inteiros
+        assert {conta.numero: conta._saldo for conta in banco.iterar_contas()} == estados[inteiros - 1]
+    finally:
+        banco.fechar()
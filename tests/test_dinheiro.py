@@ -0,0 +1,48 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from dinheiro import Dinheiro, para_centavos
+
+
+def test_soma_de_muitos_valores_e_exata():
+    rng = random.Random(42)
+    centavos = [rng.randint(-100_000, 100_000) for _ in range(100_000)]
+    total = Dinheiro(0)
+    for c in centavos:
+        total += Dinheiro(f"{c / 100:.2f}")
+    assert total.centavos == sum(centavos)
+
+
+def test_comparacao_exata_com_int_e_decimal():
+    um_centavo = Dinheiro("0.01")
+    assert Dinheiro(10) == 10
+    assert Dinheiro("0.10") == Decimal("0.1")
+    assert um_centavo != Decimal("0.014")
+    assert um_centavo < Decimal("0.014")
+    assert um_centavo > 0 and Dinheiro(-1) < 0
+    assert Dinheiro(5) >= Dinheiro("5.00") and Dinheiro(5) <= 5
+
+
+def test_comparacao_com_float_nao_e_suportada():
+    assert Dinheiro("0.1") != 0.1
+    assert Dinheiro("0.01") != 0.014
+    with pytest.raises(TypeError):
+        Dinheiro(1) < 1.5
+    assert Dinheiro(1) != "1"
+
+
+@pytest.mark.parametrize("outro", [10, Decimal("10"), Decimal("10.00"), Dinheiro(10)])
+def test_hash_acompanha_igualdade(outro):
+    assert Dinheiro(10) == outro and hash(Dinheiro(10)) == hash(outro)
+
+
+def test_hash_de_valor_com_centavos():
+    assert hash(Dinheiro("12.34")) == hash(Decimal("12.34"))
+    assert len({Dinheiro("12.34"), Decimal("12.34"), Dinheiro(1234 / 100)}) == 1
+
+
+def test_para_centavos_arredonda_float_so_na_entrada():
+    assert para_centavos(0.1 + 0.2) == 30
+    assert para_centavos("1.005") == 100
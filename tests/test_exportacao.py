@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+
+import pytest
+
+from banco import Banco
+from errors import ValorInvalidoError
+from exportacao import exportar_contas, exportar_lancamentos
+from repositorio import RepositorioSQLite
+from snapshot import carregar_snapshot, salvar_snapshot
+
+
+def _banco():
+    banco = Banco("Banco")
+    contas = [banco.criar_conta(nome, saldo) for nome, saldo in (("Ana", 10), ("Bia", 20.5), ("Caio", 300))]
+    return banco, contas
+
+
+def test_contas_em_csv_e_jsonl_com_faixa_de_saldo():
+    banco, (ana, bia, caio) = _banco()
+    saida = io.StringIO()
+    assert exportar_contas(banco, saida) == 3
+    linhas = list(csv.reader(io.StringIO(saida.getvalue())))
+    assert linhas == [["numero", "titular", "saldo"], [str(ana.numero), "Ana", "10.00"],
+                      [str(bia.numero), "Bia", "20.50"], [str(caio.numero), "Caio", "300.00"]]
+
+    saida = io.StringIO()
+    assert exportar_contas(banco, saida, "jsonl", saldo_minimo=20, saldo_maximo="20.50") == 1
+    assert [json.loads(linha) for linha in saida.getvalue().splitlines()] == [
+        {"numero": bia.numero, "titular": "Bia", "saldo": "20.50"}]
+    with pytest.raises(ValorInvalidoError):
+        exportar_contas(banco, io.StringIO(), "xml")
+
+
+def test_lancamentos_em_ordem_de_conta():
+    banco, (ana, bia, caio) = _banco()
+    caio.transferir(ana, 5)
+    saida = io.StringIO()
+    assert exportar_lancamentos(banco, saida, "jsonl") == 5
+    linhas = [json.loads(linha) for linha in saida.getvalue().splitlines()]
+    assert [(l["conta"], l["tipo"], l["valor"]) for l in linhas] == [
+        (ana.numero, "deposito", "10.00"), (ana.numero, "transferencia_recebida", "5.00"),
+        (bia.numero, "deposito", "20.50"),
+        (caio.numero, "deposito", "300.00"), (caio.numero, "transferencia_enviada", "5.00")]
+    assert linhas[1]["contraparte"] == caio.numero
+
+
+def test_contas_do_snapshot_e_do_sqlite_entram_sem_ser_carregadas(tmp_path):
+    banco, (ana, bia, caio) = _banco()
+    caminho = str(tmp_path / "banco.snapshot")
+    salvar_snapshot(banco, caminho)
+    carregado = carregar_snapshot("Banco", caminho)
+    assert exportar_contas(carregado, io.StringIO()) == 3
+    assert carregado._contas_por_numero == {}
+
+    repositorio = Banco("Banco", RepositorioSQLite(str(tmp_path / "banco.sqlite3")))
+    for conta in (ana, bia, caio):
+        repositorio.criar_conta(conta.titular.nome, conta.saldo)
+    repositorio.fechar()
+    reaberto = Banco("Banco", RepositorioSQLite(str(tmp_path / "banco.sqlite3")))
+    try:
+        assert exportar_contas(reaberto, io.StringIO()) == 3
+        assert reaberto._contas_por_numero == {}
+    finally:
+        reaberto.fechar()
+
+
+def test_lancamentos_so_das_contas_usadas_desde_o_snapshot(tmp_path):
+    # o histórico fica só em memória: as contas do snapshot começam sem lançamentos
+    banco, (ana, bia, caio) = _banco()
+    caminho = str(tmp_path / "banco.snapshot")
+    salvar_snapshot(banco, caminho)
+    carregado = carregar_snapshot("Banco", caminho)
+    carregado.buscar_conta_por_numero(caio.numero).depositar(1)
+    carregado.buscar_conta_por_numero(ana.numero).sacar(2)
+    saida = io.StringIO()
+    assert exportar_lancamentos(carregado, saida, "jsonl") == 2
+    linhas = [json.loads(linha) for linha in saida.getvalue().splitlines()]
+    assert [(l["conta"], l["tipo"]) for l in linhas] == [(ana.numero, "saque"), (caio.numero, "deposito")]
+    assert bia.numero not in carregado._contas_por_numero
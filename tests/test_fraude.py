@@ -0,0 +1,58 @@
+from eventos import BarramentoEventos
+from fraude import DetectorFraude
+
+
+def test_fila_limitada_sem_thread():
+    detector = DetectorFraude(capacidade=100)
+    for i in range(1_000):
+        detector.receber(("deposito", 1, 100, None))
+    detector._aparar()
+    assert len(detector._fila) == 100
+    assert detector.descartados == 900
+
+
+def test_fila_cheia_e_contada_e_o_resto_e_analisado():
+    detector = DetectorFraude(capacidade=100, lote=10)
+    for i in range(1_000):
+        detector.receber(("deposito", i % 7, 100, None))
+    detector._parar.set()
+    detector._trabalhar()
+    assert detector.descartados == 900
+    assert detector.processados == 100
+
+
+def test_alertas():
+    detector = DetectorFraude(rajada_limite=1_000, espalhamento_limite=3)
+    for i in range(50):
+        detector.analisar(("deposito", 1, 100 + i % 5, None), float(i))
+    detector.analisar(("deposito", 1, 1_000_000, None), 50.0)
+    for destino in range(5):
+        detector.analisar(("transferencia", 2, 10, destino), 0.0)
+    assert [(a.motivo, a.numero) for a in detector.alertas] == [("valor_atipico", 1), ("espalhamento", 2)]
+
+
+def test_perfis_limitados_por_uso_e_por_inatividade():
+    detector = DetectorFraude(perfis_maximos=3, inativas_ha=100)
+    for numero in (1, 2, 3):
+        detector.analisar(("deposito", numero, 10, None), 0.0)
+    detector.analisar(("deposito", 1, 10, None), 50.0)
+    # a conta 2 é a usada há mais tempo
+    detector.analisar(("deposito", 4, 10, None), 60.0)
+    assert list(detector._perfis) == [3, 1, 4]
+    # 3 está parada há mais de 100 s; 1 e 4 não
+    detector.analisar(("deposito", 4, 10, None), 120.0)
+    assert list(detector._perfis) == [1, 4]
+
+
+def test_analise_em_outro_processo():
+    recebidos = []
+    detector = DetectorFraude(rajada_limite=1_000, espalhamento_limite=3, lote=7, ao_alertar=recebidos.append,
+                              em_processo=True)
+    barramento = BarramentoEventos()
+    detector.iniciar(barramento)
+    for destino in range(100):
+        barramento.publicar(("transferencia", 2, 10, destino))
+    detector.parar(barramento)
+    assert detector.processados == 100 and detector.descartados == 0
+    assert [(a.motivo, a.numero, a.detalhe) for a in recebidos] == [("espalhamento", 2, 4)]
+    assert list(detector.alertas) == recebidos
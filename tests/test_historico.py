@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+
+from historico import Historico
+
+
+def test_extrato_pega_lancamentos_no_inicio_espalhados_por_varios_blocos():
+    historico = Historico()
+    comeco = datetime(2026, 1, 1)
+    momento = comeco + timedelta(hours=1)
+    historico.registrar("deposito", 1, data=comeco)
+    # mais de dois blocos inteiros no mesmo momento, começando no meio do primeiro bloco
+    iguais = 2 * Historico.TAMANHO_BLOCO + 10
+    for _ in range(iguais):
+        historico.registrar("deposito", 2, data=momento)
+    historico.registrar("saque", 3, data=momento + timedelta(minutes=1))
+
+    lancamentos = list(historico.extrato(momento, momento))
+    assert len(lancamentos) == iguais
+    assert {lancamento.valor.centavos for lancamento in lancamentos} == {2}
+    assert len(list(historico.extrato(momento))) == iguais + 1
+    assert len(list(historico.extrato(comeco))) == iguais + 2
+
+
+def test_extrato_de_periodo_sem_lancamentos():
+    historico = Historico()
+    historico.registrar("deposito", 1, data=datetime(2026, 1, 1))
+    assert list(historico.extrato(datetime(2026, 2, 1), datetime(2026, 3, 1))) == []
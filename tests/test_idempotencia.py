@@ -0,0 +1,141 @@
+import random
+import threading
+
+import pytest
+
+from banco import Banco
+from errors import (
+    LimiteDeTransacoesErro,
+    LimiteSaqueExcedidoError,
+    LimiteTransferenciaExcedidoError,
+    SaldoInsuficienteError,
+)
+from idempotencia import RegistroIdempotencia
+from limites import Limites, MotorLimites
+
+
+def _registro(**kwargs):
+    agora = [0.0]
+    return RegistroIdempotencia(relogio=lambda: agora[0], **kwargs), agora
+
+
+def test_chave_vencida_deixa_de_ser_reconhecida():
+    registro, agora = _registro(validade=60, capacidade=1_000, fragmentos=4)
+    assert registro.registrar("a") and not registro.registrar("a") and "a" in registro
+    agora[0] = 60
+    # venceu, ainda que continue na fila: a consulta e o registro concordam
+    assert "a" not in registro
+    assert registro.registrar("a") and not registro.registrar("a")
+
+
+def test_registro_cheio_esquece_as_mais_antigas():
+    registro, _ = _registro(validade=60, capacidade=1_000, fragmentos=4)
+    for i in range(4_000):
+        registro.registrar(i)
+    assert len(registro) == 1_000 and registro.antecipadas == 3_000
+    assert 0 not in registro and 3_999 in registro
+
+
+def test_chaves_com_o_mesmo_hash_sao_distintas():
+    assert hash(-1) == hash(-2)
+    registro, _ = _registro()
+    assert registro.registrar(-1)
+    assert -2 not in registro and registro.registrar(-2)
+    assert -1 in registro and -2 in registro
+
+
+def test_liberar():
+    registro, agora = _registro(validade=60, capacidade=4, fragmentos=1)
+    registro.registrar("a")
+    registro.liberar("a")
+    assert "a" not in registro and registro.registrar("a")
+    # a posição antiga de "a" na fila, ao sair, não leva junto o registro novo
+    agora[0] = 1
+    for chave in "bcd":
+        registro.registrar(chave)
+    assert "a" in registro and len(registro) == 4
+
+
+def test_reenvios_concorrentes_valem_uma_vez():
+    # cada operação é mandada por todas as threads, em ordens diferentes; os saldos
+    # são altos para que nenhuma falhe, então o resultado é conhecido de antemão
+    banco = Banco("Banco")
+    banco.definir_idempotencia()
+    contas = [banco.criar_conta(f"Cliente {i}", 1_000_000) for i in range(20)]
+    rng = random.Random(8)
+    lote = []
+    esperados = {conta.numero: conta._saldo for conta in contas}
+    lancamentos = {conta.numero: 1 for conta in contas}  # o depósito de abertura
+    for i in range(3_000):
+        origem, destino = rng.sample(contas, 2)
+        tipo = rng.choice(("depositar", "sacar", "transferir"))
+        valor = rng.randint(1, 50)
+        lote.append((f"op-{i}", tipo, origem, destino, valor))
+        esperados[origem.numero] += valor * 100 if tipo == "depositar" else -valor * 100
+        lancamentos[origem.numero] += 1
+        if tipo == "transferir":
+            esperados[destino.numero] += valor * 100
+            lancamentos[destino.numero] += 1
+
+    def enviar(semente):
+        ordem = list(lote)
+        random.Random(semente).shuffle(ordem)
+        for chave, tipo, origem, destino, valor in ordem:
+            if tipo == "depositar":
+                origem.depositar(valor, chave=chave)
+            elif tipo == "sacar":
+                origem.sacar(valor, chave=chave)
+            else:
+                origem.transferir(destino, valor, chave=chave)
+
+    threads = [threading.Thread(target=enviar, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert esperados == {conta.numero: conta._saldo for conta in contas}
+    assert lancamentos == {conta.numero: len(conta.historico) for conta in contas}
+
+
+def test_saque_recusado_nao_gasta_a_chave():
+    banco = Banco("Banco")
+    banco.definir_idempotencia()
+    conta = banco.criar_conta("Ana", 100)
+    with pytest.raises(SaldoInsuficienteError):
+        conta.sacar(101, chave="grande")
+    conta.sacar(100, chave="grande")
+    conta.sacar(1, chave="grande")  # o reenvio não falha por falta de saldo
+    assert conta.saldo == 0
+
+
+def test_chave_liberada_quando_o_limite_recusa():
+    banco = Banco("Banco")
+    banco.definir_idempotencia()
+    banco.definir_limites(MotorLimites(Limites(saque_por_operacao=50, transferencia_por_operacao=50)))
+    conta = banco.criar_conta("Ana", 100)
+    with pytest.raises(LimiteSaqueExcedidoError):
+        conta.sacar(60, chave="s")
+    assert "s" not in banco._contexto.idempotencia
+    with pytest.raises(LimiteTransferenciaExcedidoError):
+        conta.transferir(banco.criar_conta("Bia", 1), 60, chave="t")
+    assert "t" not in banco._contexto.idempotencia
+
+
+class _SemConsulta(RegistroIdempotencia):
+    # o reenvio concorrente passou pela consulta antes de o original registrar a chave
+    def __contains__(self, chave):
+        return False
+
+
+def test_reenvio_concorrente_nao_consome_o_limite():
+    banco = Banco("Banco")
+    banco.definir_idempotencia(_SemConsulta())
+    banco.definir_limites(MotorLimites(Limites(transacoes_diarias=2)))
+    conta, outra = banco.criar_conta("Ana", 100), banco.criar_conta("Bia", 1)
+    conta.sacar(10, chave="s")
+    conta.sacar(10, chave="s")
+    conta.transferir(outra, 10, chave="t")
+    conta.transferir(outra, 10, chave="t")
+    assert conta.saldo == 80 and outra.saldo == 11
+    with pytest.raises(LimiteDeTransacoesErro):
+        conta.sacar(10)
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+import indice_saldos
+from banco import Banco
+from indice_saldos import IndiceSaldos, ListaOrdenada
+
+
+def test_lista_ordenada_com_blocos_pequenos(monkeypatch):
+    # com blocos de 4, as trocas e remoções atravessam e dividem blocos
+    monkeypatch.setattr(indice_saldos, "_CARGA", 4)
+    rng = random.Random(2)
+    valores = [rng.randrange(1_000) for _ in range(200)]
+    lista = ListaOrdenada(valores[:50])
+    for valor in valores[50:]:
+        lista.adicionar(valor)
+    for _ in range(300):
+        antigo = rng.choice(valores)
+        novo = rng.randrange(1_000)
+        lista.trocar(antigo, novo)
+        valores[valores.index(antigo)] = novo
+    for valor in valores[:20]:
+        lista.remover(valor)
+    esperado = sorted(valores[20:])
+    assert list(lista) == esperado and len(lista) == len(esperado)
+    assert list(lista.decrescente()) == esperado[::-1]
+    assert list(lista.a_partir_de(500)) == [v for v in esperado if v >= 500]
+    assert max(len(bloco) for bloco in lista._blocos) <= 8
+    with pytest.raises(ValueError):
+        lista.remover(1_000)
+
+
+def test_indice_maiores_e_entre():
+    indice = IndiceSaldos([(1, 500), (2, 100), (3, 500), (4, 0)])
+    indice.adicionar(5, 700)
+    assert indice.maiores(3) == [(5, 700), (3, 500), (1, 500)]
+    assert indice.maiores(10)[-1] == (4, 0)
+    assert indice.entre(100, 500) == [(2, 100), (1, 500), (3, 500)]
+    assert indice.entre(501, 699) == []
+    indice.mover(2, 100, 800)
+    assert indice.maiores(1) == [(2, 800)]
+    with pytest.raises(ValueError):
+        indice.mover(2, 100, 900)
+
+
+def _banco_indexado():
+    banco = Banco("Banco")
+    a, b, c = (banco.criar_conta(nome, saldo) for nome, saldo in (("Ana", 100), ("Bia", 200), ("Caio", 300)))
+    banco.indexar_saldos()
+    return banco, a, b, c
+
+
+def test_indice_acompanha_deposito_saque_e_transferencia():
+    banco, a, b, c = _banco_indexado()
+    a.depositar(250)
+    assert banco.maiores_saldos(2) == [a, c]
+    c.sacar(150)
+    assert banco.contas_com_saldo_entre(100, 200) == [c, b]
+    b.transferir(a, 200)
+    assert banco.maiores_saldos(3) == [a, c, b]
+    assert banco.contas_com_saldo_entre(0, 0) == [b]
+    banco.transferir_em_lote([(a.numero, b.numero, 500), (c.numero, b.numero, 50)])
+    assert banco.maiores_saldos(3) == [b, c, a]
+    assert banco.contas_com_saldo_entre(50, 100) == [a, c]
+    d = banco.criar_conta("Davi", 1_000)
+    assert banco.maiores_saldos(1) == [d]
+
+
+def test_consultas_com_e_sem_indice_concordam():
+    rng = random.Random(4)
+    sem = Banco("Sem índice")
+    com = Banco("Com índice")
+    for banco in (sem, com):
+        for i in range(200):
+            banco.criar_conta(f"Cliente {i}", 100)
+    com.indexar_saldos()
+    for _ in range(2_000):
+        i, j = rng.sample(range(200), 2)
+        valor = rng.randint(1, 50)
+        for banco in (sem, com):
+            origem, destino = banco.contas[i], banco.contas[j]
+            if origem.saldo >= valor:
+                origem.transferir(destino, valor)
+    assert [c.saldo for c in com.maiores_saldos(20)] == [c.saldo for c in sem.maiores_saldos(20)]
+    assert [(c.titular.nome, c.saldo) for c in com.contas_com_saldo_entre(80, 120)] == \
+        [(c.titular.nome, c.saldo) for c in sem.contas_com_saldo_entre(80, 120)]
@@ -0,0 +1,119 @@
+import pytest
+
+from errors import LimiteDeTransacoesErro, LimiteSaqueExcedidoError, LimiteTransferenciaExcedidoError
+from limites import SAQUE, TRANSFERENCIA, Limites, MotorLimites
+
+HORA = 3600
+
+
+class Relogio:
+    def __init__(self, agora=0.0):
+        self.agora = agora
+
+    def __call__(self):
+        return self.agora
+
+
+def _motor(relogio, **limites):
+    # valores em reais nos limites; consumir recebe centavos
+    return MotorLimites(Limites(**limites), relogio=relogio)
+
+
+def test_limite_por_operacao():
+    motor = _motor(Relogio(), saque_por_operacao=100, transferencia_por_operacao=50)
+    motor.consumir(1, SAQUE, 10_000)
+    with pytest.raises(LimiteSaqueExcedidoError, match="por operação"):
+        motor.consumir(1, SAQUE, 10_001)
+    motor.consumir(1, TRANSFERENCIA, 5_000)
+    with pytest.raises(LimiteTransferenciaExcedidoError, match="por operação"):
+        motor.consumir(1, TRANSFERENCIA, 5_001)
+
+
+def test_limite_diario_de_valor_separado_por_tipo():
+    motor = _motor(Relogio(), saque_diario=100, transferencia_diaria=100)
+    motor.consumir(1, SAQUE, 6_000)
+    motor.consumir(1, SAQUE, 4_000)
+    with pytest.raises(LimiteSaqueExcedidoError, match="diário"):
+        motor.consumir(1, SAQUE, 1)
+    # o que foi sacado não conta para as transferências, nem para outra conta
+    motor.consumir(1, TRANSFERENCIA, 10_000)
+    motor.consumir(2, SAQUE, 10_000)
+    with pytest.raises(LimiteTransferenciaExcedidoError, match="diário"):
+        motor.consumir(1, TRANSFERENCIA, 1)
+
+
+def test_limite_diario_de_transacoes_conta_os_dois_tipos():
+    motor = _motor(Relogio(), transacoes_diarias=3, saque_por_operacao=1)
+    motor.consumir(1, SAQUE, 100)
+    # recusada por outro limite: não conta como transação
+    with pytest.raises(LimiteSaqueExcedidoError):
+        motor.consumir(1, SAQUE, 101)
+    motor.consumir(1, TRANSFERENCIA, 100)
+    motor.consumir(1, SAQUE, 100)
+    with pytest.raises(LimiteDeTransacoesErro):
+        motor.consumir(1, TRANSFERENCIA, 1)
+    with pytest.raises(LimiteDeTransacoesErro, match="Conta 1"):
+        motor.consumir_lote(SAQUE, {1: 1})
+
+
+def test_janela_libera_cada_balde_ao_completar_24h():
+    relogio = Relogio()
+    motor = _motor(relogio, saque_diario=100)
+    relogio.agora = HORA - 1  # fim do primeiro balde
+    motor.consumir(1, SAQUE, 6_000)
+    relogio.agora = 5 * HORA
+    motor.consumir(1, SAQUE, 4_000)
+
+    # os baldes são de hora cheia: o primeiro sai da janela no início da 25ª hora,
+    # mesmo que o saque tenha sido no fim da primeira
+    relogio.agora = 24 * HORA - 1
+    with pytest.raises(LimiteSaqueExcedidoError):
+        motor.consumir(1, SAQUE, 1)
+    relogio.agora = 24 * HORA
+    motor.consumir(1, SAQUE, 6_000)
+    with pytest.raises(LimiteSaqueExcedidoError):
+        motor.consumir(1, SAQUE, 1)
+    # no início da 30ª hora sai o saque de 40
+    relogio.agora = 29 * HORA
+    motor.consumir(1, SAQUE, 4_000)
+    assert motor._janelas[1].total_valores[SAQUE] == 10_000
+
+
+def test_janela_parada_mais_de_24h_comeca_do_zero():
+    relogio = Relogio()
+    motor = _motor(relogio, saque_diario=100, transacoes_diarias=1)
+    motor.consumir(1, SAQUE, 10_000)
+    relogio.agora = 1_000 * HORA
+    motor.consumir(1, SAQUE, 10_000)
+    janela = motor._janelas[1]
+    assert janela.total_valores == [10_000, 0] and janela.total_quantidade == 1
+
+
+def test_janelas_paradas_sao_descartadas():
+    relogio = Relogio()
+    motor = _motor(relogio, saque_diario=100)
+    for numero in (1, 2, 3):
+        motor.consumir(numero, SAQUE, 100)
+    relogio.agora = 23 * HORA
+    motor.consumir(3, SAQUE, 100)
+    assert len(motor) == 3
+
+    # na 25ª hora, 1 e 2 estão paradas há 24 baldes; cada operação descarta até duas
+    relogio.agora = 24 * HORA
+    motor.consumir(4, SAQUE, 100)
+    assert list(motor._janelas) == [3, 4]
+    # 3 ainda está na janela: continua guardada
+    motor.consumir(4, SAQUE, 100)
+    assert list(motor._janelas) == [3, 4]
+
+
+def test_consumir_lote_verifica_a_maior_operacao_de_cada_conta():
+    motor = _motor(Relogio(), transferencia_por_operacao=100, transferencia_diaria=150)
+    # 150 em duas operações de até 100: cabe
+    motor.consumir_lote(TRANSFERENCIA, {1: 15_000}, {1: 10_000})
+    with pytest.raises(LimiteTransferenciaExcedidoError, match="Conta 2: .*por operação"):
+        motor.consumir_lote(TRANSFERENCIA, {2: 10_100}, {2: 10_100})
+    with pytest.raises(LimiteTransferenciaExcedidoError, match="Conta 1: .*diário"):
+        motor.consumir_lote(TRANSFERENCIA, {2: 100, 1: 1})
+    # nada da tentativa recusada ficou contabilizado para a conta 2
+    assert 2 not in motor._janelas or motor._janelas[2].total_quantidade == 0
@@ -0,0 +1,55 @@
+import io
+import os
+import subprocess
+import sys
+from decimal import Decimal
+
+from banco import Banco
+from main import executar_lote
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _menu(pasta, entrada):
+    return subprocess.run([sys.executable, os.path.join(RAIZ, "main.py")], input=entrada, cwd=pasta,
+                          capture_output=True, text=True, timeout=60)
+
+
+def test_fim_da_entrada_grava_o_snapshot(tmp_path):
+    resultado = _menu(tmp_path, "1\nAna\n50\n")
+    assert resultado.returncode == 0, resultado.stderr
+    assert (tmp_path / "banco.snapshot").exists()
+
+    resultado = _menu(tmp_path, "2\n0\n")
+    assert "Ana" in resultado.stdout
+
+
+def _lote(pasta, entrada, *opcoes):
+    return subprocess.run([sys.executable, os.path.join(RAIZ, "main.py"), "--lote", *opcoes], input=entrada,
+                          cwd=pasta, capture_output=True, text=True, timeout=60)
+
+
+def test_lote_sem_limites_a_menos_que_pedidos(tmp_path):
+    # 150 saques da mesma conta: acima das 100 transações diárias de LIMITES_PADRAO
+    entrada = "criar 1000 Ana\n" + "sacar 1 1\n" * 150
+    resultado = _lote(tmp_path, entrada)
+    assert resultado.returncode == 0, resultado.stdout
+    assert resultado.stderr.startswith("151 comandos, 0 com erro")
+
+    for arquivo in ("banco.diario", "banco.snapshot"):
+        (tmp_path / arquivo).unlink()
+    resultado = _lote(tmp_path, entrada, "--limites")
+    assert resultado.returncode == 1
+    assert resultado.stdout.count("[ERRO DE LIMITE]") == 50
+    assert resultado.stderr.startswith("151 comandos, 50 com erro")
+
+
+def test_valores_digitados_viram_centavos_sem_passar_por_float():
+    banco = Banco("Banco")
+    saida = io.StringIO()
+    # 2.675 em float é 2.67499...: o arredondamento daria 2,67
+    conta = banco.criar_conta("Ana", 10)
+    linhas = [f"depositar {conta.numero} 2.675", f"sacar {conta.numero} abc"]
+    assert executar_lote(banco, linhas, saida) == (2, 1)
+    assert conta.saldo == Decimal("12.68")
+    assert "[ERRO DE VALOR]" in saida.getvalue()
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+import metricas
+from banco import Banco
+from cliente import Cliente
+from conta import ContaBancaria
+from errors import SaldoInsuficienteError
+from metricas import Histograma, Metricas, _indice, _limite_inferior, _limite_superior
+
+
+def test_baldes_cobrem_os_valores_sem_buracos():
+    # os baldes normais são contíguos, em ordem, e cada um tem largura de até 1/32 do valor
+    anterior = -1
+    for indice in range(metricas._TRANSBORDO):
+        inferior, superior = _limite_inferior(indice), _limite_superior(indice)
+        assert inferior == anterior + 1 and superior >= inferior
+        assert superior - inferior <= max(1, inferior // metricas._SUB)
+        assert _indice(inferior) == indice and _indice(superior) == indice
+        anterior = superior
+    assert anterior == metricas._LIMITE - 1
+    rng = random.Random(1)
+    for valor in (rng.randrange(metricas._LIMITE) for _ in range(10_000)):
+        indice = _indice(valor)
+        assert _limite_inferior(indice) <= valor <= _limite_superior(indice)
+
+
+def test_transbordo_nao_se_mistura_ao_ultimo_balde():
+    histograma = Histograma()
+    histograma.registrar(metricas._LIMITE - 1)
+    histograma.registrar(metricas._LIMITE)
+    histograma.registrar(10 * metricas._LIMITE)
+    assert histograma.contagens[metricas._TRANSBORDO - 1] == 1
+    assert histograma.contagens[metricas._TRANSBORDO] == 2
+    assert histograma.maximo == 10 * metricas._LIMITE
+    assert histograma.percentil(30) == metricas._LIMITE - 1
+    assert histograma.ate(metricas._LIMITE - 1) == 1 and histograma.ate(metricas._LIMITE) == 3
+
+
+def test_percentis_com_erro_relativo_pequeno():
+    histograma = Histograma()
+    valores = list(range(1, 10_001))
+    random.Random(2).shuffle(valores)
+    for valor in valores:
+        histograma.registrar(valor * 1_000)
+    assert histograma.quantidade == 10_000 and histograma.soma == sum(valores) * 1_000
+    for p, esperado in ((50, 5_000_000), (99, 9_900_000), (99.9, 9_990_000), (100, 10_000_000)):
+        assert esperado <= histograma.percentil(p) <= esperado * 1.04
+    assert histograma.maximo == histograma.percentil(100)
+    assert Histograma().percentil(50) == 0 and Histograma().maximo == 0
+
+
+def test_ativar_conta_chamadas_e_erros_e_desativar_devolve_os_metodos():
+    originais = {nome: classe.__dict__[metodo] for nome, (classe, metodo) in metricas.OPERACOES.items()}
+    banco = Banco("Banco")
+    with Metricas(amostragem=1) as medidas:
+        assert ContaBancaria.depositar is not originais["depositar"]
+        conta = banco.criar_conta("Ana", 10)
+        for _ in range(5):
+            conta.depositar(1)
+        with pytest.raises(SaldoInsuficienteError):
+            conta.sacar(100)
+    assert {nome: classe.__dict__[metodo] for nome, (classe, metodo) in metricas.OPERACOES.items()} == originais
+    conta.depositar(1)  # já sem medir
+
+    resumo = medidas.resumo()
+    assert resumo["depositar"]["chamadas"] == resumo["depositar"]["medidas"] == 5
+    assert resumo["criar_conta"]["chamadas"] == 1
+    assert resumo["sacar"]["erros"] == {"SaldoInsuficienteError": 1}
+    assert resumo["depositar"]["maximo"] >= resumo["depositar"]["p50"] > 0
+    texto = medidas.prometheus()
+    assert 'banco_operacoes_total{operacao="depositar"} 5' in texto
+    assert 'banco_erros_total{operacao="sacar",erro="SaldoInsuficienteError"} 1' in texto
+
+
+def test_ativar_outra_instancia_desativa_a_anterior():
+    original = ContaBancaria.__dict__["depositar"]
+    primeira = Metricas(amostragem=4).ativar()
+    segunda = Metricas().ativar()
+    try:
+        assert Metricas._ativa is segunda and not primeira._originais
+        ContaBancaria(Cliente("Ana"), 10).depositar(1)
+        assert segunda.chamadas["depositar"][0] == 1 and primeira.chamadas["depositar"][0] == 0
+    finally:
+        segunda.desativar()
+    assert ContaBancaria.__dict__["depositar"] is original and Metricas._ativa is None
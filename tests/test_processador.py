@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from banco import Banco
+from errors import BancoError, SaldoInsuficienteError
+from processador import ProcessadorTransacoes
+
+
+def test_operacoes_na_ordem_de_chegada_e_erros_devolvidos_a_quem_pediu():
+    async def rodar():
+        banco = Banco("Banco")
+        a = banco.criar_conta("Ana", 100)
+        b = banco.criar_conta("Bia", 100)
+        async with ProcessadorTransacoes(banco, capacidade=10) as processador:
+            pedidos = [processador.transferir(a.numero, b.numero, 1) for _ in range(100)]
+            pedidos.append(processador.sacar(a.numero, 1))
+            resultados = await asyncio.gather(*pedidos, return_exceptions=True)
+        assert isinstance(resultados[-1], SaldoInsuficienteError)
+        assert a.saldo == 0 and b.saldo == 200
+        with pytest.raises(BancoError):
+            await processador.depositar(a.numero, 1)
+
+    asyncio.run(rodar())
+
+
+def test_encerrar_com_fila_cheia_atende_quem_esperava_vaga():
+    async def rodar():
+        banco = Banco("Banco")
+        conta = banco.criar_conta("Ana", 100)
+        processador = ProcessadorTransacoes(banco, capacidade=2)
+        await processador.iniciar()
+        pedidos = [asyncio.create_task(processador.depositar(conta.numero, 1)) for _ in range(20)]
+        # todos os pedidos já passaram da checagem; a maioria espera vaga na fila
+        await asyncio.sleep(0)
+        assert processador._enviando > 0
+        await processador.encerrar()
+        # sem resposta, os pedidos ficariam esperando para sempre
+        await asyncio.wait_for(asyncio.gather(*pedidos), 1)
+        assert conta.saldo == 120
+
+    asyncio.run(rodar())
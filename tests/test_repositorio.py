@@ -0,0 +1,26 @@
+import sqlite3
+import time
+
+from repositorio import RepositorioSQLite
+
+
+def test_pendencias_sao_gravadas_por_tempo_sem_novas_operacoes(tmp_path):
+    caminho = str(tmp_path / "banco.sqlite3")
+    repositorio = RepositorioSQLite(caminho, intervalo=0.2)
+    try:
+        repositorio.adicionar_lote([(1, "Ana", 100)])
+        repositorio.registrar_deposito(1, 50)
+        # nenhuma operação nova e nenhum sincronizar(): só o fio de fundo grava
+        limite = time.monotonic() + 5
+        saldo = None
+        while time.monotonic() < limite:
+            with sqlite3.connect(caminho) as conexao:
+                linha = conexao.execute("SELECT saldo FROM contas WHERE numero = 1").fetchone()
+            if linha is not None:
+                saldo = linha[0]
+                break
+            time.sleep(0.05)
+        assert saldo == 150
+    finally:
+        repositorio.fechar()
+    assert not repositorio._gravador.is_alive()
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from banco import Banco
+from conta import ContaBancaria
+from diario import abrir_banco
+from snapshot import ContasMapeadas, carregar_snapshot, salvar_snapshot
+
+
+def _banco():
+    banco = Banco("Banco")
+    contas, _ = banco.criar_contas_em_lote([("Ana", 10), ("Bia", 20.5), ("Ana", 30), ("Caio", 1)])
+    contas[1].sacar(0.5)
+    return banco, contas
+
+
+def test_ida_e_volta(tmp_path):
+    caminho = str(tmp_path / "banco.snapshot")
+    banco, contas = _banco()
+    salvar_snapshot(banco, caminho)
+    assert not os.path.exists(caminho + ".tmp")
+
+    ContaBancaria._proximo_numero = 1
+    carregado = carregar_snapshot("Banco", caminho)
+    assert ContaBancaria._proximo_numero == contas[-1].numero + 1
+    assert [(c.numero, c.titular.nome, c.saldo) for c in carregado.contas] == \
+        [(c.numero, c.titular.nome, c.saldo) for c in contas]
+    # os dois "Ana" voltam como o mesmo cliente
+    assert carregado.contas[0].titular is carregado.contas[2].titular
+
+
+def test_contas_carregadas_sob_demanda(tmp_path):
+    caminho = str(tmp_path / "banco.snapshot")
+    banco, contas = _banco()
+    salvar_snapshot(banco, caminho)
+
+    mapeadas = ContasMapeadas(caminho)
+    try:
+        assert len(mapeadas) == 4
+        assert mapeadas.buscar(contas[1].numero) == (contas[1].numero, "Bia", 2_000)
+        assert mapeadas.buscar(contas[-1].numero + 1) is None and mapeadas.buscar(0) is None
+    finally:
+        mapeadas.fechar()
+
+    carregado = carregar_snapshot("Banco", caminho)
+    assert carregado._contas_por_numero == {}
+    conta = carregado.buscar_conta_por_numero(contas[2].numero)
+    assert conta.saldo == 30 and list(carregado._contas_por_numero) == [contas[2].numero]
+    assert carregado.buscar_conta_por_numero(contas[2].numero) is conta
+    conta.depositar(5)
+    # a conta já carregada vale mais que a do arquivo num novo snapshot
+    salvar_snapshot(carregado, caminho + "2")
+    assert ContasMapeadas(caminho + "2").buscar(conta.numero)[2] == 3_500
+
+
+def test_diario_reaplicado_a_partir_do_snapshot(tmp_path):
+    caminho_diario = str(tmp_path / "banco.diario")
+    caminho = str(tmp_path / "banco.snapshot")
+    banco = abrir_banco("Banco", caminho_diario)
+    ana = banco.criar_conta("Ana", 100)
+    bia = banco.criar_conta("Bia", 50)
+    ana.transferir(bia, 30)
+    salvar_snapshot(banco, caminho)
+    posicao = os.path.getsize(caminho_diario)
+    # depois do snapshot: só isto precisa ser reaplicado
+    bia.sacar(10)
+    caio = banco.criar_conta("Caio", 7)
+    banco.fechar()
+
+    mapeadas = ContasMapeadas(caminho)
+    assert mapeadas.posicao_diario == posicao
+    assert mapeadas.buscar(bia.numero)[2] == 8_000
+    mapeadas.fechar()
+
+    reaberto = abrir_banco("Banco", caminho_diario, caminho)
+    try:
+        assert [(c.numero, c.saldo) for c in reaberto.contas] == [(ana.numero, 70), (bia.numero, 70), (caio.numero, 7)]
+    finally:
+        reaberto.fechar()
+
+
+@pytest.mark.parametrize("conteudo", [
+    b"",
+    b"BNCS",
+    b"nada a ver com um snapshot, mas comprido o bastante para o cabecalho",
+    # versão desconhecida
+    b"BNCS\x63\x00" + bytes(24),
+    # cabeçalho de 10 contas num arquivo sem as colunas
+    b"BNCS\x01\x00" + (10).to_bytes(8, "little") + bytes(16),
+])
+def test_arquivo_que_nao_e_snapshot(tmp_path, conteudo):
+    caminho = tmp_path / "banco.snapshot"
+    caminho.write_bytes(conteudo)
+    with pytest.raises(ValueError):
+        carregar_snapshot("Banco", str(caminho))